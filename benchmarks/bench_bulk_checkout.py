@@ -0,0 +1,56 @@
+import argparse
+import gc
+import time
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer, RetailCustomer
+from src.product import Product
+from src.user import User
+
+def build(carts: int, lines: int) -> tuple:
+    """
+    Returns a system with carts filled carts of lines products each, and their customer IDs.
+    Every tenth customer is a retail customer.
+    """
+    system = EMarketSystem()
+    products = system.add_products_bulk([(Product(f"Product {i}", "Synthetic product", 10.0 + i % 50, 8.0, 10 ** 9),
+                                          f"Category {i % 10}") for i in range(1000)])
+    ids = []
+    for i in range(carts):
+        args = (f"user{i}", "benchPass", f"user{i}@example.com", "Bench", "Addr", "1234567890")
+        customer = RetailCustomer(*args, "Bench Store") if i % 10 == 0 else IndividualCustomer(*args)
+        ids.append(system.register_customer(customer).user_id)
+        for j in range(lines):
+            system.add_to_cart(ids[-1], products[(i * lines + j) % len(products)].product_id, 1)
+    return system, ids
+
+def main():
+    """
+    Compares checking out every cart one call at a time with a single checkout_orders_bulk call.
+    """
+    parser = argparse.ArgumentParser(description="Bulk checkout benchmark")
+    parser.add_argument("--carts", type=int, default=20_000, help="carts checked out per run")
+    parser.add_argument("--lines", type=int, default=5, help="products in each cart")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode; the fastest is reported")
+    args = parser.parse_args()
+    User.password_iterations = 1000  # Registration cost is not what is measured here
+
+    timings = {"loop": [], "bulk": []}
+    for _ in range(args.repeat):
+        for mode in timings:
+            system, ids = build(args.carts, args.lines)
+            gc.collect()  # Leave the garbage from building the system out of the timing
+            start = time.perf_counter()
+            if mode == "loop":
+                for customer_id in ids:
+                    system.checkout_order(customer_id)
+            else:
+                system.checkout_orders_bulk(ids)
+            timings[mode].append(time.perf_counter() - start)
+            assert len(system.orders) == args.carts
+
+    loop, bulk = min(timings["loop"]), min(timings["bulk"])
+    print(f"loop: {args.carts / loop:12,.0f} checkouts/s")
+    print(f"bulk: {args.carts / bulk:12,.0f} checkouts/s ({loop / bulk:.1f}x)")
+
+if __name__ == "__main__":
+    main()
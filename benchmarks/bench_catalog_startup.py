@@ -0,0 +1,62 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from src.EMarketSystem import EMarketSystem
+from src.binaryCatalog import convert_json_catalog
+from src.main import addBaseProducts
+from benchmarks.synthetic import write_products
+
+def timed(func) -> tuple:
+    """
+    Returns (result, milliseconds) for a call.
+    """
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    """
+    Compares system startup from products.json with startup from a binary catalog snapshot.
+    """
+    parser = argparse.ArgumentParser(description="Catalog startup time benchmark")
+    parser.add_argument("--count", type=int, default=100_000, help="number of products")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "products.json")
+        target = os.path.join(directory, "products.emcat")
+        write_products(source, args.count)
+        _, convert_ms = timed(lambda: convert_json_catalog(source, target))
+
+        def from_json():
+            system = EMarketSystem()
+            addBaseProducts(system, source)
+            return system
+
+        def from_snapshot():
+            system = EMarketSystem()
+            system.open_catalog(target)
+            return system
+
+        _, json_ms = timed(from_json)
+        system, snapshot_ms = timed(from_snapshot)
+        product_id = system.catalog.product_id(args.count // 2)
+        _, lookup_ms = timed(lambda: system.products[product_id])
+        _, search_ms = timed(lambda: system.search_products("Product 4242"))
+
+        print(f"products:                 {args.count:,}")
+        print(f"snapshot size:            {os.path.getsize(target) / 1e6:.1f} MB "
+              f"(JSON {os.path.getsize(source) / 1e6:.1f} MB)")
+        print(f"one-off conversion:       {convert_ms:10.1f} ms")
+        print(f"startup from JSON:        {json_ms:10.1f} ms")
+        print(f"startup from snapshot:    {snapshot_ms:10.1f} ms")
+        print(f"first product lookup:     {lookup_ms:10.3f} ms")
+        print(f"first name search:        {search_ms:10.1f} ms (indexes catalog names)")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
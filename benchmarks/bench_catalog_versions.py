@@ -0,0 +1,95 @@
+import argparse
+import threading
+import time
+from src.EMarketSystem import EMarketSystem
+from src.catalogLoader import product_from_record
+from benchmarks import synthetic
+
+def run(system: EMarketSystem, mode: str, readers: int, seconds: float) -> tuple:
+    """
+    Runs reader threads listing a category with its details while one writer reprices
+    products, and returns (reads per second, writes per second).
+
+    In "snapshot" mode readers pin a catalog version and take no lock. In "locked"
+    mode readers and the writer share one lock around the live products.
+    """
+    lock = threading.Lock()
+    category = next(iter(system.categories.values())).category_name
+    products = list(system.products.values())
+    stop = threading.Event()
+    reads, writes = [0] * readers, [0]
+
+    def reader(index: int):
+        count = 0
+        while not stop.is_set():
+            if mode == "snapshot":
+                details = [p.get_details() for p in system.catalog_snapshot().search_by_category(category)[:50]]
+            else:
+                with lock:
+                    details = [p.get_details() for p in system.search_category(category)[:50]]
+            count += len(details) > 0
+        reads[index] = count
+
+    def writer():
+        count = 0
+        while not stop.is_set():
+            product = products[count % len(products)]
+            if mode == "snapshot":
+                product.set_discount(count % 30)
+            else:
+                with lock:
+                    product.set_discount(count % 30)
+            count += 1
+        writes[0] = count
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, writes[0] / seconds
+
+def name_search(version, queries: list) -> tuple:
+    """
+    Returns the milliseconds per query for a version's indexed name search and for a scan of every name.
+    """
+    start = time.perf_counter()
+    for query in queries:
+        version.search_by_name(query)
+    indexed = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in queries:
+        [product for product in version.products() if query.lower() in product[8]]
+    scanned = time.perf_counter() - start
+    return indexed * 1000 / len(queries), scanned * 1000 / len(queries)
+
+def main():
+    """
+    Compares category reads and concurrent repricing with pinned catalog versions and with a global lock,
+    then times name search on a version with and without its name index.
+    """
+    parser = argparse.ArgumentParser(description="Catalog version benchmark")
+    parser.add_argument("--count", type=int, default=100_000, help="products in the catalog")
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 2, 4, 8], help="reader thread counts")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each run")
+    args = parser.parse_args()
+
+    system = EMarketSystem()
+    records = synthetic.product_records(args.count)
+    system.add_products_bulk([product_from_record(record) for record in records])
+    system.catalog_snapshot()
+
+    print(f"{'readers':>8} {'mode':>9} {'reads/s':>10} {'writes/s':>10}")
+    for readers in args.readers:
+        for mode in ["locked", "snapshot"]:
+            reads, writes = run(system, mode, readers, args.seconds)
+            print(f"{readers:>8} {mode:>9} {reads:>10,.0f} {writes:>10,.0f}")
+
+    indexed, scanned = name_search(system.catalog_snapshot(), synthetic.search_queries(records, 200))
+    print(f"\nname search per query: indexed {indexed:.3f} ms, full scan {scanned:.3f} ms "
+          f"({scanned / indexed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import datetime
+import random
+import time
+from src.coupon import Coupon
+from src.couponRegistry import CouponRegistry
+
+def main():
+    """
+    Loads a large batch of coupons and compares validating and applying them one
+    order at a time, as checkout did with a dict and date.today(), against the registry.
+    """
+    parser = argparse.ArgumentParser(description="Coupon registry benchmark")
+    parser.add_argument("--coupons", type=int, default=500_000, help="coupons loaded in one batch")
+    parser.add_argument("--orders", type=int, default=200_000, help="orders priced with a random coupon")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    today = datetime.date.today()
+    coupons = [Coupon(f"PROMO{i}", rng.randint(5, 50), today + datetime.timedelta(days=rng.randint(-30, 30)))
+               for i in range(args.coupons)]
+    orders = [(rng.uniform(5.0, 500.0), f"PROMO{rng.randrange(args.coupons)}") for _ in range(args.orders)]
+
+    start = time.perf_counter()
+    by_code = {}
+    for coupon in coupons:
+        by_code[coupon.coupon_code] = coupon
+    print(f"load, dict:         {time.perf_counter() - start:8.3f} s")
+    start = time.perf_counter()
+    registry = CouponRegistry(retention_days=0)
+    registry.add_many(coupons)
+    print(f"load, registry:     {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    for amount, code in orders:
+        if code in by_code:
+            if by_code[code].is_valid():
+                by_code[code].apply_discount(amount)
+    elapsed = time.perf_counter() - start
+    print(f"price, per order:   {args.orders / elapsed:12,.0f} orders/s")
+
+    start = time.perf_counter()
+    for amount, code in orders:
+        try:
+            registry.validate(code).apply_discount(amount)
+        except ValueError:
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"price, validate:    {args.orders / elapsed:12,.0f} orders/s")
+
+    start = time.perf_counter()
+    registry.apply_many(orders)
+    elapsed = time.perf_counter() - start
+    print(f"price, apply_many:  {args.orders / elapsed:12,.0f} orders/s")
+
+    start = time.perf_counter()
+    registry.registry_today = today + datetime.timedelta(days=1)
+    evicted = registry.evict_expired()
+    print(f"evict:              {time.perf_counter() - start:8.3f} s for {evicted:,} expired coupons")
+
+if __name__ == "__main__":
+    main()
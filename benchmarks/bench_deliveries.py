@@ -0,0 +1,57 @@
+import argparse
+import gc
+import time
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer
+from src.product import Product
+from src.user import User
+
+STATUSES = ["Shipped", "Out for Delivery", "Delivered"]
+
+def build(orders: int) -> EMarketSystem:
+    """
+    Returns a system with orders placed orders, all still preparing.
+    """
+    system = EMarketSystem()
+    product = system.add_product(Product("Parcel", "Synthetic product", 10.0, 8.0, 10 ** 9), "Parcels")
+    ids = [system.register_customer(IndividualCustomer(f"user{i}", "benchPass", f"user{i}@example.com",
+                                                       "Bench", "Addr", "1234567890")).user_id
+           for i in range(100)]
+    for i in range(orders):
+        system.add_to_cart(ids[i % len(ids)], product.product_id, 1)
+        system.checkout_order(ids[i % len(ids)])
+    return system
+
+def main():
+    """
+    Compares moving every delivery through its statuses one call at a time and in bulk,
+    with a subscriber attached, and times listing deliveries by status.
+    """
+    parser = argparse.ArgumentParser(description="Delivery status update benchmark")
+    parser.add_argument("--orders", type=int, default=50_000, help="orders to update")
+    args = parser.parse_args()
+    User.password_iterations = 1000  # Registration cost is not what is measured here
+
+    for mode in ("single", "bulk"):
+        system = build(args.orders)
+        notifications = []
+        system.deliveries.subscribe(notifications.append)
+        order_ids = list(system.orders)
+        gc.collect()  # Leave the garbage from building the system out of the timing
+        start = time.perf_counter()
+        for status in STATUSES:
+            if mode == "single":
+                for order_id in order_ids:
+                    system.update_delivery_status(order_id, status)
+            else:
+                system.update_delivery_statuses([(order_id, status) for order_id in order_ids])
+        elapsed = time.perf_counter() - start
+        updates = args.orders * len(STATUSES)
+        print(f"{mode:>6}: {updates / elapsed:12,.0f} updates/s, {len(notifications):,} notifications")
+
+    start = time.perf_counter()
+    delivered = system.deliveries.by_status("Delivered")
+    print(f"by_status: {len(delivered):,} delivered orders listed in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
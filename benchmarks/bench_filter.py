@@ -0,0 +1,59 @@
+import argparse
+import time
+from src.EMarketSystem import EMarketSystem
+from src.catalogLoader import product_from_record
+from benchmarks import synthetic
+
+def timed(func, repeat: int) -> float:
+    """
+    Returns the fastest of repeat calls to func in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+def scan(system: EMarketSystem, category_name: str, max_price: float, min_stock: int) -> tuple:
+    """
+    Filters the catalog the way callers had to before, by walking every product.
+    """
+    products, counts = [], {}
+    for cat in system.categories.values():
+        for product in cat.category_products:
+            if product.get_price("individual") <= max_price and product.product_stock >= min_stock:
+                counts[cat.category_name] = counts.get(cat.category_name, 0) + 1
+                if cat.category_name == category_name:
+                    products.append(product)
+    products.sort(key=lambda product: product.get_price("individual"))
+    return products, counts
+
+def main():
+    """
+    Compares filtering by category, price and stock through the facet index with a full scan.
+    """
+    parser = argparse.ArgumentParser(description="Faceted filtering benchmark")
+    parser.add_argument("--count", type=int, default=200_000, help="products in the catalog")
+    parser.add_argument("--limit", type=int, default=20, help="products per filtered page")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per filter; the fastest is reported")
+    args = parser.parse_args()
+
+    system = EMarketSystem()
+    system.add_products_bulk([product_from_record(record) for record in synthetic.product_records(args.count)])
+    start = time.perf_counter()
+    system.filter_products(limit=1)
+    print(f"index build: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    print(f"{'max price':>10} {'matches':>9} {'scan (ms)':>10} {'facets (ms)':>12} {'page (ms)':>10}")
+    for max_price in [10.0, 200.0, 1000.0]:
+        matches = len(scan(system, "Electronics 0", max_price, 1)[0])
+        full = timed(lambda: scan(system, "Electronics 0", max_price, 1), args.repeat)
+        facets = timed(lambda: system.filter_products("Electronics 0", max_price=max_price, min_stock=1),
+                       args.repeat)
+        page = timed(lambda: system.filter_products("Electronics 0", max_price=max_price, min_stock=1,
+                                                    limit=args.limit), args.repeat)
+        print(f"{max_price:>10.0f} {matches:>9,} {full:>10.2f} {facets:>12.2f} {page:>10.2f}")
+
+if __name__ == "__main__":
+    main()
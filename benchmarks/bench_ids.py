@@ -0,0 +1,70 @@
+import argparse
+import gc
+import sys
+import time
+import uuid
+from src.idGenerator import IdGenerator, set_generator
+from src.order import Order
+from src.product import Product
+from src.shoppingCart import ShoppingCart
+
+class Uuid4Generator:
+    """
+    Hands out uuid4 hex IDs, as every constructor did before the ID generator.
+    """
+
+    def next_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def next_ids(self, count: int) -> list:
+        return [uuid.uuid4().hex for _ in range(count)]
+
+def creation_rate(count: int) -> float:
+    """
+    Returns products, carts and orders created per second under the current generator.
+    """
+    items = [(Product("Item", "Desc", 10.0, 8.0, 1), 1)]
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(count):
+        Product("Item", "Desc", 10.0, 8.0, 1)
+        ShoppingCart("customer")
+        Order("customer", items)
+    return 3 * count / (time.perf_counter() - start)
+
+def key_memory(generator, count: int) -> tuple:
+    """
+    Returns (bytes per ID string, bytes per entry of a dict keyed by the IDs).
+    """
+    ids = generator.next_ids(count)
+    strings = sum(sys.getsizeof(text) for text in ids) / count
+    table = dict.fromkeys(ids)
+    return strings, (sys.getsizeof(table) / count) + strings
+
+def main():
+    """
+    Compares object creation rate and ID key memory for uuid4 and the Snowflake style generator.
+    """
+    parser = argparse.ArgumentParser(description="ID generator benchmark")
+    parser.add_argument("--count", type=int, default=200_000, help="objects of each kind created per run")
+    parser.add_argument("--rounds", type=int, default=3, help="alternating runs; the best is reported")
+    args = parser.parse_args()
+
+    generators = {"uuid4": Uuid4Generator(), "snowflake": IdGenerator()}
+    best = dict.fromkeys(generators, 0.0)
+    previous = set_generator(generators["uuid4"])
+    try:
+        for _ in range(args.rounds):
+            for name, generator in generators.items():
+                set_generator(generator)
+                best[name] = max(best[name], creation_rate(args.count))
+    finally:
+        set_generator(previous)
+
+    print(f"{'ids':>10} {'objects/s':>12} {'id bytes':>9} {'dict bytes/key':>15}")
+    for name, generator in generators.items():
+        strings, per_key = key_memory(generator, args.count)
+        print(f"{name:>10} {best[name]:>12,.0f} {strings:>9.0f} {per_key:>15.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer
+from src.journal import Journal
+from src.product import Product
+from src.user import User
+
+def build_system(journal: Journal, customers: int) -> tuple:
+    """
+    Creates a system with one product and the given number of customers.
+    """
+    system = EMarketSystem(journal=journal)
+    product = system.add_product(Product("Widget", "Synthetic product", 10.0, 8.0, 10 ** 9), "Bench")
+    ids = []
+    for i in range(customers):
+        customer = IndividualCustomer(f"user{i}", "benchPass", f"user{i}@example.com",
+                                      "Bench", "Addr", "1234567890")
+        ids.append(system.register_customer(customer).user_id)
+    return system, product, ids
+
+def run(journal: Journal, checkouts: int, threads: int) -> float:
+    """
+    Performs add-to-cart plus checkout repeatedly from several threads, each with its own
+    customers, and returns checkouts per second. Every call is durable when it returns.
+    """
+    system, product, ids = build_system(journal, 100 * threads)
+
+    def shop(thread: int):
+        mine = ids[thread::threads]
+        for i in range(checkouts // threads):
+            customer_id = mine[i % len(mine)]
+            system.add_to_cart(customer_id, product.product_id, 1)
+            system.checkout_order(customer_id)
+
+    workers = [threading.Thread(target=shop, args=(thread,)) for thread in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return checkouts // threads * threads / (time.perf_counter() - start)
+
+def main():
+    """
+    Compares checkout throughput without a journal, with an fsync per record and with group commit.
+    """
+    parser = argparse.ArgumentParser(description="Journal checkout throughput benchmark")
+    parser.add_argument("--checkouts", type=int, default=5000, help="checkouts per run")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16], help="concurrent shopper threads")
+    args = parser.parse_args()
+    User.password_iterations = 1000  # Registration cost is not what is measured here
+
+    modes = [
+        ("no journal", None),
+        ("fsync per record", {"group_commit": False}),
+        ("group commit", {"group_commit": True}),
+    ]
+    print(f"{'mode':>18} {'threads':>8} {'checkouts/s':>12} {'records/fsync':>14}")
+    for threads in args.threads:
+        for name, options in modes:
+            directory = tempfile.mkdtemp()
+            journal = Journal(directory, snapshot_every=0, **options) if options is not None else None
+            try:
+                rate = run(journal, args.checkouts, threads)
+                per_fsync = journal.journal_durable / max(journal.journal_commits, 1) if journal else 0
+            finally:
+                if journal is not None:
+                    journal.close()
+                shutil.rmtree(directory)
+            print(f"{name:>18} {threads:>8} {rate:>12,.0f} {per_fsync:>14.1f}")
+
+if __name__ == "__main__":
+    main()
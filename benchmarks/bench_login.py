@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import time
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer
+from src.passwordHasher import PasswordHasher
+from src.user import User
+
+PASSWORD = "benchmark-password"
+
+def build_system(users: int, iterations: int) -> EMarketSystem:
+    """
+    Registers users that all share one precomputed hash at the given work factor.
+    """
+    User.password_iterations = iterations
+    shared_hash = IndividualCustomer("seed", PASSWORD, "seed@example.com", "Bench", "Addr", "9999999999").password_hash
+
+    User.password_iterations = 1  # Build customers cheaply, then copy in the real hash
+    system = EMarketSystem()
+    for i in range(users):
+        customer = IndividualCustomer(f"user{i}", PASSWORD, f"user{i}@example.com", "Bench", "Addr", "9999999999")
+        customer.password_hash = shared_hash
+        system.register_customer(customer)
+    User.password_iterations = iterations
+    return system
+
+async def concurrent_logins(system: EMarketSystem, attempts: int, users: int) -> float:
+    """
+    Runs all login attempts concurrently and returns the elapsed seconds.
+    """
+    start = time.perf_counter()
+    await asyncio.gather(*(system.login_customer_async(f"user{i % users}", PASSWORD) for i in range(attempts)))
+    return time.perf_counter() - start
+
+def main():
+    """
+    Compares blocking login throughput with logins verified on the password pool.
+    """
+    parser = argparse.ArgumentParser(description="Password hashing login throughput benchmark")
+    parser.add_argument("--iterations", type=int, default=User.password_iterations, help="PBKDF2 work factor")
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--attempts", type=int, default=64, help="logins per measurement")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    system = build_system(args.users, args.iterations)
+    print(f"PBKDF2 iterations: {args.iterations}, logins per run: {args.attempts}")
+
+    start = time.perf_counter()
+    for i in range(args.attempts):
+        system.login_customer(f"user{i % args.users}", PASSWORD)
+    print(f"{'blocking':>10} {args.attempts / (time.perf_counter() - start):>10.1f} logins/s")
+
+    for workers in args.workers:
+        system.password_hasher.shutdown()
+        system.password_hasher = PasswordHasher(max_workers=workers, max_pending=args.attempts)
+        elapsed = asyncio.run(concurrent_logins(system, args.attempts, args.users))
+        print(f"{f'{workers} workers':>10} {args.attempts / elapsed:>10.1f} logins/s")
+    system.password_hasher.shutdown()
+
+if __name__ == "__main__":
+    main()
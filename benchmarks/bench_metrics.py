@@ -0,0 +1,55 @@
+import argparse
+import time
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer
+from src.metrics import MetricsRegistry, instrument_system
+from src.product import Product
+from src.user import User
+
+def run(checkouts: int) -> float:
+    """
+    Performs add-to-cart, checkout and delivery tracking repeatedly and returns seconds per checkout.
+    """
+    system = EMarketSystem()
+    products = system.add_products_bulk([(Product(f"Product {i}", "Synthetic product", 10.0, 8.0, 10 ** 9),
+                                          f"Category {i % 10}") for i in range(100)])
+    ids = [system.register_customer(IndividualCustomer(f"user{i}", "benchPass", f"user{i}@example.com",
+                                                       "Bench", "Addr", "1234567890")).user_id
+           for i in range(100)]
+    start = time.perf_counter()
+    for i in range(checkouts):
+        customer_id = ids[i % len(ids)]
+        for j in range(3):
+            system.add_to_cart(customer_id, products[(i + j) % len(products)].product_id, 1)
+        system.track_delivery(system.checkout_order(customer_id).order_id)
+    return (time.perf_counter() - start) / checkouts
+
+def main():
+    """
+    Reports the cost of leaving the metrics instrumentation on.
+    """
+    parser = argparse.ArgumentParser(description="Metrics instrumentation overhead benchmark")
+    parser.add_argument("--checkouts", type=int, default=20_000, help="checkouts per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per mode; the fastest is reported")
+    args = parser.parse_args()
+    User.password_iterations = 1000  # Registration cost is not what is measured here
+
+    # Alternate the two modes so drift in machine speed affects both alike
+    plain, measured, calls = [], [], 0
+    for _ in range(args.repeat):
+        plain.append(run(args.checkouts))
+        registry = instrument_system(MetricsRegistry())
+        try:
+            measured.append(run(args.checkouts))
+        finally:
+            registry.uninstrument()
+        calls = sum(stats.snapshot()[0] for stats in registry.registry_stats.values())
+    plain, measured = min(plain), min(measured)
+    per_call = (measured - plain) * args.checkouts / calls
+
+    print(f"without metrics: {plain * 1e6:8.2f} us per checkout")
+    print(f"with metrics:    {measured * 1e6:8.2f} us per checkout ({(measured / plain - 1) * 100:+.1f}%)")
+    print(f"overhead:        {per_call * 1e6:8.2f} us per instrumented call ({calls:,} calls)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import time
+from src.EMarketSystem import EMarketSystem
+from src.catalogLoader import product_from_record
+from src.customerType import CustomerType
+from src.order import Order
+from src.shoppingCart import ShoppingCart
+from benchmarks import synthetic
+
+def formula_total(lines: list, customer_type: str) -> float:
+    """
+    Totals (Product, quantity) lines by working out each discounted price from the
+    store's price and discount columns, as get_price did before the price tables.
+    """
+    total = 0.0
+    for product, qty in lines:
+        store, row = product.product_store, product.product_row
+        base = store.store_wholesale_prices[row] if customer_type == "retail" else store.store_retail_prices[row]
+        total += round(base * (1 - store.store_discounts[row] / 100), 2) * qty
+    return total
+
+def table_total(lines: list, customer_type: CustomerType) -> float:
+    """
+    Totals (Product, quantity) lines from the store's precomputed price table.
+    """
+    total = 0.0
+    for product, qty in lines:
+        total += product.product_store.price_table(customer_type)[product.product_row] * qty
+    return total
+
+def timed(function, repeat: int) -> float:
+    """
+    Returns the best of repeat timings of function, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    """
+    Times totaling a large cart from price tables against recomputing each discounted
+    price, along with cart building, order placement, repricing and totaling the cart
+    again after one of its products is repriced.
+    """
+    parser = argparse.ArgumentParser(description="Price table benchmark")
+    parser.add_argument("--lines", type=int, default=10_000, help="lines in the cart")
+    parser.add_argument("--repeat", type=int, default=5, help="timings taken per operation; the best is kept")
+    args = parser.parse_args()
+
+    system = EMarketSystem()
+    products = system.add_products_bulk([product_from_record(record) for record in synthetic.product_records(args.lines)])
+    for index, product in enumerate(products[::4]):
+        product.set_discount(index % 40)
+    lines = [(product, 1) for product in products]
+
+    def build_cart():
+        cart = ShoppingCart("bench", system.reservations)
+        cart.add_items(lines)
+        cart.clear_cart()
+
+    cart = ShoppingCart("bench", system.reservations)
+    cart.add_items(lines)
+    order = Order("bench", lines)
+
+    def reprice():
+        for index, product in enumerate(products):
+            product.set_discount(index % 40)
+
+    def reprice_and_total():
+        products[0].set_discount(products[0].product_discount_percent % 40 + 1)
+        cart.calculate_total(CustomerType.RETAIL)
+
+    rows = [
+        ("total, recomputed prices", lambda: formula_total(lines, "retail")),
+        ("total, price tables", lambda: table_total(lines, CustomerType.RETAIL)),
+        ("cart add_items + clear", build_cart),
+        ("cart calculate_total", lambda: cart.calculate_total(CustomerType.RETAIL)),
+        ("cart view_cart", cart.view_cart),
+        ("order place_order", lambda: order.place_order(CustomerType.RETAIL)),
+        ("reprice every product", reprice),
+        ("reprice one + cart total", reprice_and_total),
+    ]
+    print(f"{'operation':<26} {'ms':>10}")
+    for name, function in rows:
+        print(f"{name:<26} {timed(function, args.repeat):>10.3f}")
+    cart.clear_cart()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import gc
+import sys
+import time
+import uuid
+from src.product import Product
+from src.productStore import ProductStore
+
+class LegacyProduct:
+    """
+    Dict-backed product with the attribute layout Product had before ProductStore.
+    """
+
+    def __init__(self, name: str, description: str, retail_price: float, wholesale_price: float, stock: int):
+        self.product_id = uuid.uuid4().hex
+        self.product_name = name
+        self.product_description = description
+        self.product_retail_price = retail_price
+        self.product_wholesale_price = wholesale_price
+        self.product_stock = stock
+        self.product_discount_percent = 0
+
+    def get_price(self, customer_type: str) -> float:
+        base_price = self.product_wholesale_price if customer_type == "retail" else self.product_retail_price
+        return round(base_price * (1 - self.product_discount_percent / 100), 2)
+
+def build_legacy(count: int) -> list:
+    """
+    Creates count legacy products.
+    """
+    return [LegacyProduct(f"Product {i}", "Synthetic product", 10.0 + i % 500, 8.0 + i % 400, i % 100)
+            for i in range(count)]
+
+def build_columnar(count: int) -> tuple:
+    """
+    Creates count products attached to one shared ProductStore.
+    """
+    store = ProductStore()
+    products = []
+    for i in range(count):
+        product = Product(f"Product {i}", "Synthetic product", 10.0 + i % 500, 8.0 + i % 400, i % 100)
+        store.attach(product)
+        products.append(product)
+    return store, products
+
+def legacy_bytes(products: list) -> int:
+    """
+    Sums the memory held by legacy products: list slots, objects, attribute dicts, IDs, names and prices.
+    """
+    total = sys.getsizeof(products)
+    for p in products:
+        total += sys.getsizeof(p) + sys.getsizeof(p.__dict__)
+        total += sys.getsizeof(p.product_id) + sys.getsizeof(p.product_name)
+        total += sys.getsizeof(p.product_retail_price) + sys.getsizeof(p.product_wholesale_price)
+    return total
+
+def columnar_bytes(store: ProductStore, products: list) -> int:
+    """
+    Sums the memory held by columnar products: list slots, slotted views, IDs, names and columns.
+    """
+    total = sys.getsizeof(products)
+    total += sum(sys.getsizeof(column) for column in (
+        store.store_retail_prices, store.store_wholesale_prices, store.store_stock, store.store_discounts))
+    for p in products:
+        total += sys.getsizeof(p) + sys.getsizeof(p.product_id) + sys.getsizeof(p.product_name)
+    return total
+
+def timed(build, count: int) -> tuple:
+    """
+    Runs build(count) and returns its result with the elapsed seconds.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = build(count)
+    return result, time.perf_counter() - start
+
+def main():
+    """
+    Compares memory per SKU and bulk pricing speed of legacy and columnar products.
+    """
+    parser = argparse.ArgumentParser(description="ProductStore memory and pricing benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of products to create")
+    args = parser.parse_args()
+
+    legacy, legacy_build = timed(build_legacy, args.count)
+    start = time.perf_counter()
+    [p.get_price("retail") for p in legacy]
+    legacy_pricing = time.perf_counter() - start
+    legacy_size = legacy_bytes(legacy) / args.count
+    del legacy
+
+    (store, products), columnar_build = timed(build_columnar, args.count)
+    start = time.perf_counter()
+    store.price_all("retail")
+    columnar_pricing = time.perf_counter() - start
+    columnar_size = columnar_bytes(store, products) / args.count
+
+    print(f"Products: {args.count}")
+    print(f"{'':<10} {'bytes/SKU':>10} {'build (s)':>10} {'price all (s)':>14}")
+    print(f"{'legacy':<10} {legacy_size:>10.1f} {legacy_build:>10.2f} {legacy_pricing:>14.3f}")
+    print(f"{'columnar':<10} {columnar_size:>10.1f} {columnar_build:>10.2f} {columnar_pricing:>14.3f}")
+
+if __name__ == "__main__":
+    main()
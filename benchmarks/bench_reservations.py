@@ -0,0 +1,72 @@
+import argparse
+import threading
+import time
+from src.product import Product
+from src.productStore import ProductStore
+from src.reservation import ReservationEngine
+
+def build_products(count: int, stock: int) -> list:
+    """
+    Creates count products sharing one ProductStore, each with the given stock.
+    """
+    store = ProductStore()
+    products = []
+    for i in range(count):
+        product = Product(f"Product {i}", "Synthetic product", 10.0, 8.0, stock)
+        store.attach(product)
+        products.append(product)
+    return products
+
+def run(engine: ReservationEngine, products: list, threads: int, per_thread: int) -> float:
+    """
+    Reserves one unit per call from every thread and returns reservations per second.
+    Raises AssertionError if more units were reserved than were in stock.
+    """
+    initial = sum(p.product_stock for p in products)
+    successes = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int):
+        barrier.wait()
+        count = 0
+        for i in range(per_thread):
+            try:
+                engine.reserve(products[(index * 7919 + i) % len(products)], 1)
+                count += 1
+            except ValueError:
+                pass
+        successes[index] = count
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    remaining = sum(p.product_stock for p in products)
+    assert remaining >= 0 and initial - remaining == sum(successes), "stock was oversold"
+    return sum(successes) / elapsed
+
+def main():
+    """
+    Reports reservation throughput as the number of threads grows.
+    """
+    parser = argparse.ArgumentParser(description="Stock reservation throughput benchmark")
+    parser.add_argument("--products", type=int, default=1000, help="number of products")
+    parser.add_argument("--stock", type=int, default=50, help="initial stock per product")
+    parser.add_argument("--reservations", type=int, default=200_000, help="reservation attempts per run")
+    parser.add_argument("--stripes", type=int, default=64, help="lock stripes in the engine")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'reservations/s':>16}")
+    for threads in args.threads:
+        products = build_products(args.products, args.stock)
+        rate = run(ReservationEngine(args.stripes), products, threads, args.reservations // threads)
+        print(f"{threads:>8} {rate:>16,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import time
+from src.EMarketSystem import EMarketSystem
+from src.catalogLoader import product_from_record
+from benchmarks import synthetic
+
+def timed(func, repeat: int) -> float:
+    """
+    Returns the fastest of repeat calls to func in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+def main():
+    """
+    Compares returning every match of broad and narrow queries with ranking the first page.
+    """
+    parser = argparse.ArgumentParser(description="Ranked search benchmark")
+    parser.add_argument("--count", type=int, default=200_000, help="products in the catalog")
+    parser.add_argument("--limit", type=int, default=20, help="results per ranked page")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the fastest is reported")
+    args = parser.parse_args()
+
+    system = EMarketSystem()
+    system.add_products_bulk([product_from_record(record) for record in synthetic.product_records(args.count)])
+
+    print(f"{'query':>12} {'matches':>9} {'all (ms)':>10} {'page (ms)':>10}")
+    for query in ["a", "pro", "laptop", "smart watch", "kettle 42"]:
+        matches = len(system.search_products(query))
+        every = timed(lambda: system.search_products(query), args.repeat)
+        page = timed(lambda: system.search_products_page(query, args.limit), args.repeat)
+        print(f"{query:>12} {matches:>9,} {every:>10.2f} {page:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+QUERIES = ["lap", "ban", "sofa", "shirt", "a", "phone", "book", "tea"]
+
+async def client(host: str, port: int, requests: int, depth: int) -> int:
+    """
+    Sends requests over one keep-alive connection, depth pipelined requests at a time.
+    Returns the number of successful responses.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    ok = 0
+    sent = 0
+    while sent < requests:
+        batch = min(depth, requests - sent)
+        writer.write(b"".join(
+            f"GET /search?q={QUERIES[(sent + i) % len(QUERIES)]} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+            for i in range(batch)
+        ))
+        await writer.drain()
+        for _ in range(batch):
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+            await reader.readexactly(length)
+            ok += head.startswith(b"HTTP/1.1 200")
+        sent += batch
+    writer.close()
+    return ok
+
+async def run_load(host: str, port: int, connections: int, requests: int, depth: int) -> tuple:
+    """
+    Runs all clients concurrently and returns (successful responses, elapsed seconds).
+    """
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client(host, port, requests, depth) for _ in range(connections)))
+    return sum(results), time.perf_counter() - start
+
+def start_local_server() -> tuple:
+    """
+    Starts the JSON service in a subprocess on a free port and returns (process, port).
+    """
+    process = subprocess.Popen([sys.executable, "-m", "src.server", "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # "Serving on http://127.0.0.1:<port>"
+    return process, int(line.rsplit(":", 1)[1])
+
+def main():
+    """
+    Measures request throughput of the JSON service with many concurrent keep-alive sessions.
+    """
+    parser = argparse.ArgumentParser(description="E-Mart JSON service benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="benchmark a running server instead of starting one")
+    parser.add_argument("--connections", type=int, default=1000, help="concurrent keep-alive sessions")
+    parser.add_argument("--requests", type=int, default=20, help="requests per session")
+    parser.add_argument("--depth", type=int, default=4, help="requests pipelined at a time")
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_local_server()
+    try:
+        ok, elapsed = asyncio.run(run_load(args.host, port, args.connections, args.requests, args.depth))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    total = args.connections * args.requests
+    print(f"Sessions: {args.connections}, requests: {total}, pipeline depth: {args.depth}")
+    print(f"Successful: {ok}, elapsed: {elapsed:.2f}s, throughput: {total / elapsed:,.0f} req/s")
+
+if __name__ == "__main__":
+    main()
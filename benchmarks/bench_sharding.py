@@ -0,0 +1,84 @@
+import argparse
+import os
+import time
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer
+from src.product import Product
+from src.shardRouter import ShardRouter
+from src.user import User
+
+def build_products(count: int) -> list:
+    """
+    Creates (Product, category_name) pairs with enough stock never to run out.
+    """
+    return [(Product(f"Product {i}", "Synthetic product", 10.0, 8.0, 10 ** 9), f"Category {i % 20}")
+            for i in range(count)]
+
+def workload(customer_ids: list, products: list, checkouts: int) -> list:
+    """
+    Returns (op, args) calls: each checkout follows three add-to-cart calls.
+    """
+    calls = []
+    for i in range(checkouts):
+        customer_id = customer_ids[i % len(customer_ids)]
+        for j in range(3):
+            calls.append(("add_to_cart", (customer_id, products[(i * 3 + j) % len(products)].product_id, 1)))
+        calls.append(("checkout_order", (customer_id,)))
+    return calls
+
+def run_single(products: list, customers: int, checkouts: int) -> float:
+    """
+    Returns checkouts per second for one in-process EMarketSystem.
+    """
+    system = EMarketSystem()
+    system.add_products_bulk(products)
+    ids = [system.register_customer(IndividualCustomer(f"user{i}", "benchPass", f"user{i}@example.com",
+                                                       "Bench", "Addr", "1234567890")).user_id
+           for i in range(customers)]
+    calls = workload(ids, [p for p, _ in products], checkouts)
+    start = time.perf_counter()
+    for op, args in calls:
+        getattr(system, op)(*args)
+    return checkouts / (time.perf_counter() - start)
+
+def run_sharded(products: list, shards: int, customers: int, checkouts: int, batch: int) -> float:
+    """
+    Returns checkouts per second through a ShardRouter with the given number of shards.
+    """
+    router = ShardRouter(products, shards=shards)
+    try:
+        ids = [router.register_customer("individual", f"user{i}", "benchPass", f"user{i}@example.com",
+                                        "Bench", "Addr", "1234567890") for i in range(customers)]
+        calls = workload(ids, [p for p, _ in products], checkouts)
+        start = time.perf_counter()
+        for offset in range(0, len(calls), batch):
+            for result in router.run_batch(calls[offset:offset + batch]):
+                if isinstance(result, ValueError):
+                    raise result
+        return checkouts / (time.perf_counter() - start)
+    finally:
+        router.close()
+
+def main():
+    """
+    Reports checkout throughput for one process and for a growing number of shards.
+    """
+    parser = argparse.ArgumentParser(description="Sharded deployment throughput benchmark")
+    parser.add_argument("--products", type=int, default=1000, help="number of catalog products")
+    parser.add_argument("--customers", type=int, default=1000, help="number of customers")
+    parser.add_argument("--checkouts", type=int, default=20_000, help="checkouts per run")
+    parser.add_argument("--batch", type=int, default=4000, help="calls sent per router batch")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    User.password_iterations = 1000  # Registration cost is not what is measured here
+
+    products = build_products(args.products)
+    print(f"CPUs available: {os.cpu_count()}")
+    print(f"{'deployment':>12} {'checkouts/s':>12}")
+    print(f"{'in-process':>12} {run_single(products, args.customers, args.checkouts):>12,.0f}")
+    for shards in args.shards:
+        rate = run_sharded(products, shards, args.customers, args.checkouts, args.batch)
+        print(f"{shards:>9} sh {rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from src.EMarketSystem import EMarketSystem
+from src.catalogLoader import product_from_record
+from src.customer import IndividualCustomer
+from src.user import User
+from benchmarks import synthetic
+
+OPERATIONS = ["add_product", "register_customer", "search_products", "search_page", "search_category",
+              "add_to_cart", "checkout_order", "track_delivery", "get_orders"]
+
+def summarize(latencies: list) -> dict:
+    """
+    Returns call count, mean, median, p99 (in microseconds) and throughput for per-call latencies in ns.
+    """
+    if not latencies:
+        return {"calls": 0, "mean_us": 0.0, "p50_us": 0.0, "p99_us": 0.0, "ops_per_sec": 0.0}
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "mean_us": total / len(ordered) / 1000,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)] / 1000,
+        "ops_per_sec": len(ordered) / (total / 1e9) if total else 0.0,
+    }
+
+def timed_calls(func, calls) -> list:
+    """
+    Calls func(*args) for every args tuple and returns each call's latency in nanoseconds.
+    """
+    clock = time.perf_counter_ns
+    latencies = []
+    for args in calls:
+        start = clock()
+        func(*args)
+        latencies.append(clock() - start)
+    return latencies
+
+def run_scale(scale: int, operations: int, seed: int) -> dict:
+    """
+    Builds a system with scale products and scale // 10 customers, timing every call that
+    builds it, then times operations calls of each read and cart operation against it.
+    """
+    rng = random.Random(seed)
+    system = EMarketSystem()
+    results = {}
+
+    records = synthetic.product_records(scale, seed)
+    products = [product_from_record(record) for record in records]
+    results["add_product"] = timed_calls(system.add_product, products)
+
+    customers = [(IndividualCustomer(*args),) for args in synthetic.customer_args(max(scale // 10, 1), seed)]
+    results["register_customer"] = timed_calls(system.register_customer, customers)
+
+    queries = synthetic.search_queries(records, operations, seed)
+    results["search_products"] = timed_calls(system.search_products, [(query,) for query in queries])
+    results["search_page"] = timed_calls(system.search_products_page, [(query, 20) for query in queries])
+    category_names = [cat.category_name for cat in system.categories.values()]
+    results["search_category"] = timed_calls(
+        system.search_category, [(rng.choice(category_names),) for _ in range(operations)])
+
+    customer_ids = [customer.user_id for customer, in customers]
+    product_ids = [product.product_id for product, _ in products]
+    lines = synthetic.cart_lines(customer_ids, product_ids, operations, seed)
+    results["add_to_cart"] = timed_calls(system.add_to_cart, lines)
+
+    buyers = list(dict.fromkeys(customer_id for customer_id, _, _ in lines))
+    results["checkout_order"] = timed_calls(system.checkout_order, [(customer_id,) for customer_id in buyers])
+
+    order_ids = list(system.orders)
+    results["track_delivery"] = timed_calls(
+        system.track_delivery, [(rng.choice(order_ids),) for _ in range(operations)])
+    results["get_orders"] = timed_calls(
+        system.get_orders, [(rng.choice(buyers), "Placed", None, 20) for _ in range(operations)])
+    return {operation: summarize(results[operation]) for operation in OPERATIONS}
+
+def run_suite(scales: list, operations: int, seed: int = 42) -> dict:
+    """
+    Runs every scale and returns the results with details of the machine they ran on.
+    """
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "operations": operations,
+            "seed": seed,
+            "password_iterations": User.password_iterations,
+        },
+        "results": {str(scale): run_scale(scale, operations, seed) for scale in scales},
+    }
+
+def compare(baseline: dict, candidate: dict, metric: str = "p50_us", threshold: float = 0.10) -> list:
+    """
+    Returns (scale, operation, baseline value, candidate value, ratio, regressed) for every
+    measurement present in both runs. A measurement regresses when the candidate is more
+    than threshold slower than the baseline.
+    """
+    rows = []
+    for scale, operations in baseline["results"].items():
+        for operation, stats in operations.items():
+            other = candidate["results"].get(scale, {}).get(operation)
+            if other is None:
+                continue
+            before, after = stats[metric], other[metric]
+            ratio = after / before if before else float("inf") if after else 1.0
+            rows.append((scale, operation, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+def print_results(run: dict) -> None:
+    """
+    Prints a run as a table.
+    """
+    print(f"{'scale':>9} {'operation':>18} {'calls':>9} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'ops/s':>12}")
+    for scale, operations in run["results"].items():
+        for operation, stats in operations.items():
+            print(f"{int(scale):>9,} {operation:>18} {stats['calls']:>9,} {stats['mean_us']:>10.2f} "
+                  f"{stats['p50_us']:>10.2f} {stats['p99_us']:>10.2f} {stats['ops_per_sec']:>12,.0f}")
+
+def main():
+    """
+    Runs the benchmark suite, or compares two saved runs and exits with status 1 on a regression.
+    """
+    parser = argparse.ArgumentParser(description="EMarketSystem benchmark suite")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10_000, 100_000],
+                        help="catalog sizes to run; customers are a tenth of each")
+    parser.add_argument("--operations", type=int, default=2000, help="timed calls per read or cart operation")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the synthetic data")
+    parser.add_argument("--password-iterations", type=int, default=1,
+                        help="PBKDF2 work factor while registering; the default keeps hashing out of the timings")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="compare two saved runs instead of running the suite")
+    parser.add_argument("--metric", default="p50_us", choices=["mean_us", "p50_us", "p99_us"],
+                        help="latency compared between runs")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown ratio above which a measurement counts as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            baseline = json.load(file)
+        with open(args.compare[1]) as file:
+            candidate = json.load(file)
+        rows = compare(baseline, candidate, args.metric, args.threshold)
+        print(f"{'scale':>9} {'operation':>18} {'baseline':>10} {'candidate':>10} {'ratio':>7}")
+        for scale, operation, before, after, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{int(scale):>9,} {operation:>18} {before:>10.2f} {after:>10.2f} {ratio:>7.2f}{flag}")
+        sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+    User.password_iterations = args.password_iterations
+    run = run_suite(args.scales, args.operations, args.seed)
+    print_results(run)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(run, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+import random
+
+ADJECTIVES = ["Classic", "Deluxe", "Compact", "Wireless", "Organic", "Premium", "Portable", "Smart",
+              "Vintage", "Ultra", "Eco", "Rugged", "Slim", "Pro", "Mini", "Heavy Duty"]
+NOUNS = ["Laptop", "Headphones", "Blender", "Jacket", "Sneakers", "Lamp", "Backpack", "Watch",
+         "Kettle", "Chair", "Camera", "Speaker", "Racket", "Perfume", "Mug", "Tent"]
+CATEGORIES = ["Electronics", "Grocery", "Clothing", "Footwear", "Furniture", "Appliances",
+              "Accessories", "Sports", "Beauty", "Home Decor"]
+
+def product_records(count: int, seed: int = 42) -> list:
+    """
+    Returns count products.json style records with searchable names and spread-out categories.
+    """
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        noun = NOUNS[i % len(NOUNS)]
+        price = round(rng.uniform(2.0, 1500.0), 2)
+        records.append({
+            "name": f"{rng.choice(ADJECTIVES)} {noun} {i}",
+            "description": f"Synthetic {noun.lower()} number {i}",
+            "price": price,
+            "cost": round(price * rng.uniform(0.6, 0.95), 2),
+            "stock": rng.randint(100, 1000),  # Enough that random cart lines never run out
+            # A few hundred categories at large scales: each base category gets numbered variants
+            "category": f"{CATEGORIES[i % len(CATEGORIES)]} {i // len(CATEGORIES) % 50}",
+        })
+    return records
+
+def customer_args(count: int, seed: int = 42) -> list:
+    """
+    Returns count (username, password, email, name, address, phone) tuples for IndividualCustomer.
+    """
+    rng = random.Random(seed)
+    return [(f"user{i}", f"pass{i}", f"user{i}@example.com", f"Customer {i}",
+             f"{rng.randint(1, 999)} Synthetic Street", f"{rng.randint(10 ** 9, 10 ** 10 - 1)}")
+            for i in range(count)]
+
+def cart_lines(customer_ids: list, product_ids: list, count: int, seed: int = 42) -> list:
+    """
+    Returns count (customer_id, product_id, quantity) cart lines spread over the customers.
+    """
+    rng = random.Random(seed)
+    return [(customer_ids[i % len(customer_ids)], rng.choice(product_ids), rng.randint(1, 3))
+            for i in range(count)]
+
+def search_queries(records: list, count: int, seed: int = 42) -> list:
+    """
+    Returns count name queries: whole words, word prefixes and exact product names.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name = rng.choice(records)["name"]
+        kind = rng.randrange(3)
+        if kind == 0:
+            queries.append(rng.choice(name.split()[:-1]))
+        elif kind == 1:
+            queries.append(name.split()[-2][:4].lower())
+        else:
+            queries.append(name)
+    return queries
+
+def write_products(filename: str, count: int, seed: int = 42) -> None:
+    """
+    Writes count synthetic products as a products.json style array.
+    """
+    with open(filename, "w") as file:
+        json.dump(product_records(count, seed), file)
@@ -1,45 +1,174 @@
-from src.customer import Customer, RetailCustomer
+import contextlib
+import datetime
+import functools
+import gc
+import os
+import time
+from src.customer import Customer
+from src.customerType import CustomerType
 from src.product import Product
+from src.productStore import ProductStore
 from src.category import Category
 from src.order import Order
+from src.orderIndex import OrderIndex
 from src.delivery import Delivery
+from src.deliveryManager import DeliveryManager
 from src.coupon import Coupon
+from src.couponRegistry import CouponRegistry
 from src.search import Search
+from src.searchIndex import SearchIndex
+from src.facetIndex import FacetIndex
+from src.catalogVersion import CatalogVersion, CatalogVersions
 from src.shoppingCart import ShoppingCart
+from src.idGenerator import new_ids
+from src.reservation import ReservationEngine
+from src.inventory import Inventory
+from src.session import SessionManager
+from src.passwordHasher import PasswordHasher
+from src.binaryCatalog import BinaryCatalog, CatalogProducts
+from src.journal import (Journal, SnapshotGate, customer_to_dict, product_to_dict, coupon_to_dict, order_to_dict,
+                         export_state, import_state, apply_record)
+
+def _mutation(method):
+    """
+    Marks a method that changes the system's state. With a journal attached, the call
+    runs inside the snapshot gate, and a snapshot that has come due is taken after the
+    thread's outermost mutating call returns, when no other call can be half done.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.journal is None:
+            return method(self, *args, **kwargs)
+        with self.journal_gate.mutating():
+            result = method(self, *args, **kwargs)
+        if not self.journal_replaying and not self.journal_gate.depth() and self.journal.needs_snapshot():
+            self.snapshot(only_if_due=True)
+        return result
+    return wrapper
+
+@contextlib.contextmanager
+def _collection_paused():
+    """
+    Suspends cyclic garbage collection for the block, so a bulk call creating many
+    long-lived objects is not interrupted by repeated collections of the whole heap.
+    The objects are collected once, at the first collection after the block.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 class EMarketSystem:
     """
     Represents an e-commerce marketplace system.
     Manages customers, products, orders, shopping carts, coupons, and deliveries.
+
+    With a Journal attached, every mutating call is logged after it succeeds, and
+    EMarketSystem.recover rebuilds the same state from the journal after a restart.
+    Snapshots are only taken between mutating calls, never while one is in flight.
     """
 
-    def __init__(self):
-        """Initializes the e-market system with empty collections for managing users, products, and orders."""
+    def __init__(self, reservation_ttl: float = None, clock=time.monotonic, journal: Journal = None,
+                 stock_ledger: bool = True):
+        """
+        Initializes the e-market system with empty collections for managing users, products, and orders.
+        If reservation_ttl is given, stock held by a cart is returned after that many
+        seconds without checkout. clock measures reservation and session lifetimes.
+        Without a stock_ledger, stock is only the sellable units and warehouses are not tracked.
+        """
         self.customers = {}       # Maps user_id to Customer objects
         self.usernames = {}       # Maps username to user_id
+        self.emails = {}          # Maps lowercased email to user_id
         self.products = {}        # Maps product_id to Product objects
+        self.product_store = ProductStore()  # Columnar prices and stock of all products
         self.categories = {}      # Maps category_id to Category objects
+        self.category_names = {}  # Maps lowercased category name to Category objects
         self.orders = {}          # Maps order_id to Order objects
-        self.deliveries = {}      # Maps order_id to Delivery objects
-        self.coupons = {}         # Maps coupon code to Coupon objects
+        self.order_index = OrderIndex()  # Orders by customer, status and placement time
+        self.deliveries = DeliveryManager()  # Deliveries by order_id, indexed by status
+        self.coupons = CouponRegistry()  # Coupons by code, evicted some time after they expire
         self.shopping_carts = {}  # Maps customer_id to ShoppingCart objects
+        self.search_index = SearchIndex()  # n-gram index over product names
+        self.facets = FacetIndex(self.product_store)  # Sorted prices per category for filtering
+        self.catalog_versions = CatalogVersions(self.product_store)  # Immutable catalog versions for readers
+        self.sessions = SessionManager(clock=clock)  # Maps session tokens to logged-in customers
+        self.password_hasher = PasswordHasher()   # Worker pool for slow password hashing
+        self.reservations = ReservationEngine(ttl=reservation_ttl, clock=clock)  # Atomic stock reservation for all carts
+        # Stock on hand per warehouse, unless the system runs without a stock ledger
+        self.inventory = Inventory(self.product_store, self.reservations) if stock_ledger else None
+        self.journal = journal             # Write-ahead log of mutating calls, if durability is on
+        self.journal_replaying = False     # True while recover re-applies logged calls
+        self.journal_gate = SnapshotGate() # Keeps snapshots from seeing a mutating call half done
+        self.catalog = None                # Memory-mapped catalog snapshot, if one was opened
+        self.catalog_pending = {}          # Maps category_id to its (first, count) catalog records not yet listed
+        self.catalog_unindexed = False     # True until catalog names are added to the search index
 
+    @classmethod
+    def recover(cls, journal: Journal, **kwargs) -> "EMarketSystem":
+        """
+        Rebuilds a system from a journal's latest snapshot and the calls logged after it.
+        The returned system keeps logging to the same journal.
+        """
+        system = cls(journal=journal, **kwargs)
+        state, records = journal.load()
+        system.journal_replaying = True
+        try:
+            if state is not None:
+                import_state(system, state)
+            for record in records:
+                apply_record(system, record["op"], record["data"])
+        finally:
+            system.journal_replaying = False
+        return system
+
+    def snapshot(self, only_if_due: bool = False) -> int:
+        """
+        Writes a full state snapshot to the journal so replay can start from here, once
+        mutating calls in flight have finished and holding off new ones meanwhile.
+        With only_if_due, nothing is written unless the journal needs a snapshot.
+        The stock ledger's movement log is compacted once the snapshot holds its levels.
+        Returns the sequence number the snapshot covers, or None if none was due.
+        """
+        if self.journal is None:
+            raise ValueError("No journal attached to the system.")
+        with self.journal_gate.exclusive():
+            if only_if_due and not self.journal.needs_snapshot():
+                return None  # Another thread took it first
+            sequence = self.journal.write_snapshot(export_state(self))
+            if self.inventory is not None:
+                self.inventory.compact()
+            return sequence
+
+    def _record(self, op: str, data: dict) -> None:
+        """
+        Logs a successful mutating call.
+        """
+        if self.journal is None or self.journal_replaying:
+            return
+        self.journal.append(op, data)
+
+    @_mutation
     def register_customer(self, customer: Customer) -> Customer:
         """
         Registers a new customer in the system.
         """
         if customer.username in self.usernames:
             raise ValueError("Username already exists. Please choose another username.")
-        for cust in self.customers.values():
-            if cust.customer_email.lower() == customer.email.lower():
-                raise ValueError("Email already registered. Please use another email.")
+        if customer.email.lower() in self.emails:
+            raise ValueError("Email already registered. Please use another email.")
 
         # Store customer details
         self.customers[customer.user_id] = customer
         self.usernames[customer.username] = customer.user_id
+        self.emails[customer.customer_email.lower()] = customer.user_id
+        customer.customer_email_index = self.emails  # Keeps profile email changes in sync
 
         # Create a shopping cart for the new customer
-        self.shopping_carts[customer.user_id] = ShoppingCart(customer.user_id)
+        cart = self._reset_cart(customer.user_id)
+        self._record("register_customer", {**customer_to_dict(customer), "cart_id": cart.cart_id})
         return customer
 
     def login_customer(self, username: str, password: str) -> Customer:
@@ -55,39 +184,217 @@ class EMarketSystem:
                 raise ValueError("Incorrect password.")
         raise ValueError("Username not found. Please register first.")
 
+    async def register_customer_async(self, customer_class: type, *args) -> Customer:
+        """
+        Creates a customer on the password pool, where its password is hashed, then registers it.
+        """
+        customer = await self.password_hasher.run(customer_class, *args)
+        return self.register_customer(customer)
+
+    async def login_customer_async(self, username: str, password: str) -> Customer:
+        """
+        Authenticates a customer like login_customer, verifying the password on the password pool.
+        """
+        if username not in self.usernames:
+            raise ValueError("Username not found. Please register first.")
+        customer = self.customers[self.usernames[username]]
+        if await self.password_hasher.run(customer.login, password):
+            return customer
+        raise ValueError("Incorrect password.")
+
+    async def create_session_async(self, username: str, password: str) -> str:
+        """
+        Logs a customer in without blocking the event loop and returns a session token.
+        """
+        return self.sessions.create(await self.login_customer_async(username, password))
+
+    def create_session(self, username: str, password: str) -> str:
+        """
+        Logs a customer in and returns an opaque session token for later requests.
+        """
+        return self.sessions.create(self.login_customer(username, password))
+
+    def get_customer_by_token(self, token: str) -> Customer:
+        """
+        Returns the customer owning a session token, extending the session.
+        """
+        return self.sessions.resolve(token)
+
+    def end_session(self, token: str) -> bool:
+        """
+        Revokes a session token.
+        """
+        return self.sessions.revoke(token)
+
+    @_mutation
     def add_product(self, product: Product, category_name: str) -> Product:
         """
         Adds a product to the system under a specified category.
         """
         self.products[product.product_id] = product
-        cat = None
-
-        # Find or create the category
-        for category in self.categories.values():
-            if category.category_name.lower() == category_name.lower():
-                cat = category
-                break
-        if not cat:
-            cat = Category(category_name)
-            self.categories[cat.category_id] = cat
+        self.product_store.attach(product)
+        if self.inventory is not None:
+            self.inventory.track(product)
+        self.search_index.add_product(product)
 
         # Associate product with category
+        cat = self._find_or_create_category(category_name)
         cat.add_product(product)
+        self.facets.add(product, cat.category_id)
+        self.catalog_versions.publish([(product, cat)])
+        self._record("add_products", {"products": [self._product_record(product, cat)]})
         return product
 
+    @_mutation
+    def add_products_bulk(self, items: list) -> list:
+        """
+        Adds a batch of (Product, category_name) pairs to the system.
+        Each distinct category name is resolved only once per batch.
+        """
+        resolved = {}  # Lowercased category name -> Category for this batch
+        added, listed = [], []
+        for product, category_name in items:
+            key = category_name.lower()
+            cat = resolved.get(key)
+            if cat is None:
+                cat = resolved[key] = self._find_or_create_category(category_name)
+
+            self.products[product.product_id] = product
+            self.product_store.attach(product)
+            self.search_index.add_product(product)
+            cat.add_product(product)
+            self.facets.add(product, cat.category_id)
+            added.append(product)
+            listed.append((product, cat))
+        if self.inventory is not None:
+            self.inventory.track_many(added)
+        self.catalog_versions.publish(listed)
+        self._record("add_products", {"products": [self._product_record(p, self.category_names[c.lower()])
+                                                   for p, c in items]})
+        return added
+
+    def _product_record(self, product: Product, cat: Category) -> dict:
+        """
+        Returns the journal data for a product added under a category.
+        """
+        return {**product_to_dict(product, cat.category_name), "category_id": cat.category_id}
+
+    @_mutation
+    def open_catalog(self, filename: str) -> int:
+        """
+        Serves the products of a binary catalog snapshot without loading them up front.
+        Products are built when first looked up, searched for or listed by category.
+        Returns the number of products in the snapshot.
+        """
+        if self.catalog is not None:
+            raise ValueError("A catalog snapshot is already open.")
+        catalog = BinaryCatalog(filename)
+        for category_id, name, first, count in catalog.categories():
+            cat = self._find_or_create_category(name, category_id)
+            self.catalog_pending[cat.category_id] = (first, count)
+        self.catalog = catalog
+        self.products = CatalogProducts(self.products, catalog, self.product_store)
+        if self.inventory is not None:
+            self.products.catalog_listener = self.inventory.track
+        self.catalog_versions.invalidate()  # Rebuilt with the whole catalog when next read
+        self.search_index.index_resolver = self.products.__getitem__
+        self.catalog_unindexed = True
+        self._record("open_catalog", {"filename": os.path.abspath(filename)})
+        return len(catalog)
+
+    def _list_catalog_category(self, cat: Category) -> None:
+        """
+        Puts a category's catalog products ahead of any added to it since the catalog was opened.
+        """
+        pending = self.catalog_pending.pop(cat.category_id, None)
+        if pending is None:
+            return  # Another thread listed it first
+        first, count = pending
+        cat.category_products[:0] = [self.products[self.catalog.product_id(index)]
+                                     for index in range(first, first + count)]
+
+    def materialize_catalog(self) -> None:
+        """
+        Builds every remaining catalog product and category listing, as needed before exporting state.
+        """
+        for category_id in list(self.catalog_pending):
+            self._list_catalog_category(self.categories[category_id])
+        if self.catalog is not None:
+            self.products.materialize_all()
+
+    def catalog_snapshot(self) -> CatalogVersion:
+        """
+        Returns the latest catalog version. It never changes, so it can be searched, listed
+        and read from any thread without locks while products are added and repriced.
+        """
+        return self.catalog_versions.snapshot(self._catalog_contents)
+
+    def _catalog_contents(self) -> tuple:
+        """
+        Returns (products, categories) with the whole catalog built, to rebuild a catalog version from.
+        """
+        self.materialize_catalog()
+        return self.products.values(), list(self.categories.values())
+
+    def price_products(self, product_ids: list, customer_type: CustomerType) -> list:
+        """
+        Returns the discounted unit price of each product for the given customer type.
+        """
+        rows = []
+        for product_id in product_ids:
+            if product_id not in self.products:
+                raise ValueError("Product not found.")
+            rows.append(self.products[product_id].product_row)
+        return self.product_store.price_rows(rows, customer_type)
+
+    def _find_or_create_category(self, category_name: str, category_id: str = None) -> Category:
+        """
+        Returns the category with the given name, creating it if needed.
+        A category_id is only used when restoring a category from the journal.
+        """
+        cat = self.category_names.get(category_name.lower())
+        if not cat:
+            cat = Category(category_name)
+            if category_id is not None:
+                cat.category_id = category_id
+            self.categories[cat.category_id] = cat
+            self.category_names[category_name.lower()] = cat
+        return cat
+
+    @_mutation
     def add_coupon(self, coupon: Coupon) -> Coupon:
         """
         Adds a discount coupon to the system.
         """
-        self.coupons[coupon.coupon_code] = coupon
+        self.coupons.add(coupon)
+        self._record("add_coupon", coupon_to_dict(coupon))
         return coupon
 
+    @_mutation
+    def add_coupons(self, coupons: list) -> int:
+        """
+        Adds many discount coupons at once and returns how many were added.
+        """
+        count = self.coupons.add_many(coupons)
+        if count:
+            self._record("add_coupons", {"coupons": [coupon_to_dict(coupon) for coupon in coupons]})
+        return count
+
+    def price_with_coupons(self, orders: list) -> list:
+        """
+        Prices many (amount, coupon_code) pairs against the coupons in one pass.
+        Returns an (amount, error) pair for each, as CouponRegistry.apply_many does.
+        """
+        return self.coupons.apply_many(orders)
+
+    @_mutation
     def add_to_cart(self, customer_id: str, product_id: str, quantity: int) -> bool:
         """
         Adds a product to the customer's shopping cart.
         """
         if quantity <= 0:
             raise ValueError("Quantity must be greater than zero.")
+        self.expire_reservations()
         if customer_id not in self.shopping_carts:
             raise ValueError("No shopping cart found for this customer.")
         if product_id not in self.products:
@@ -99,65 +406,340 @@ class EMarketSystem:
 
         # Add product to cart without reducing stock immediately
         self.shopping_carts[customer_id].add_item(product, quantity)
+        self._record("add_to_cart", {"customer_id": customer_id, "product_id": product_id, "quantity": quantity})
         return True
 
+    @_mutation
     def checkout_order(self, customer_id: str, coupon_code: str = None) -> Order:
         """
         Processes the checkout for a customer, creating an order and handling coupons.
         """
+        self.expire_reservations()
         if customer_id not in self.shopping_carts:
             raise ValueError("Shopping cart not found for this customer.")
 
         cart = self.shopping_carts[customer_id]
-        if not cart.items:
-            raise ValueError("Shopping cart is empty.")
 
         # Get customer type for pricing
-        customer = self.customers[customer_id]
-        customer_type = "retail" if isinstance(customer, RetailCustomer) else "individual"
-
-        # Validate stock before finalizing order
-        for product, qty in cart.items:
-            if product.product_stock < -qty:
-                raise ValueError(f"Insufficient stock for {product.product_name}.")
-
-        # Create and place the order
-        order = Order(customer_id, cart.items)
-        if coupon_code:
-            if coupon_code in self.coupons:
-                if not self.coupons[coupon_code].is_valid():
-                    raise ValueError("Coupon has expired.")
-                order.order_coupon = self.coupons[coupon_code]
-            else:
-                raise ValueError("Coupon not found.")
+        customer_type = self.customers[customer_id].customer_type
 
-        order.place_order(customer_type)
-        self.orders[order.order_id] = order
+        # Keep the cart's lines from expiring between reading them and confirming them
+        with self.reservations.holding([cart]):
+            items = cart.items
+            if not items:
+                raise ValueError("Shopping cart is empty.")
+
+            # Validate stock before finalizing order
+            for product, qty in items:
+                if product.product_stock < -qty:
+                    raise ValueError(f"Insufficient stock for {product.product_name}.")
+
+            # Create and place the order
+            order = Order(customer_id, items)
+            if coupon_code:
+                order.order_coupon = self.coupons.validate(coupon_code)
+
+            order.place_order(customer_type)
+
+            # Initiate delivery for the order
+            delivery = Delivery(order.order_id)
+            self._store_order(order, delivery)
 
-        # Initiate delivery for the order
-        delivery = Delivery(order.order_id)
-        self.deliveries[order.order_id] = delivery
+            # Keep the purchased stock, then reset the cart after checkout
+            self.reservations.confirm_held(cart, items)
+            new_cart = self._reset_cart(customer_id)
 
-        # Reset the cart after checkout
-        self.shopping_carts[customer_id] = ShoppingCart(customer_id)
+        # Ship outside the stripe locks, which the ledger takes after its own lock
+        if self.inventory is not None:
+            self.inventory.ship(items)
+        self._record("checkout_order", {**order_to_dict(order, delivery), "cart_id": new_cart.cart_id})
         return order
 
+    @_mutation
+    def checkout_orders_bulk(self, checkouts: list) -> list:
+        """
+        Checks out many carts in one call. Each checkout is a customer_id or a
+        (customer_id, coupon_code) pair.
+
+        Coupons are validated together, stock is read once per distinct product, unit
+        prices are computed in one pass over the product columns for each customer type,
+        and the whole batch is logged as one journal record. Garbage collection is paused
+        while the batch's objects are created. Returns each checkout's Order, or the
+        ValueError that stopped it, in the order of checkouts.
+        """
+        self.expire_reservations()
+        checkouts = [(entry, None) if isinstance(entry, str) else tuple(entry) for entry in checkouts]
+        coupons = iter(self.coupons.validate_many([code for _, code in checkouts if code]))
+
+        # Keep every cart's lines from expiring until the batch is confirmed
+        held = [cart for cart in dict.fromkeys(self.shopping_carts.get(customer_id) for customer_id, _ in checkouts)
+                if cart is not None]
+        with self.reservations.holding(held), _collection_paused():
+            # Find each cart and its customer type, skipping carts that cannot be checked out
+            results = [None] * len(checkouts)
+            accepted = []  # (position, customer_id, cart, lines by product_id, customer_type, coupon)
+            seen = set()
+            for position, (customer_id, coupon_code) in enumerate(checkouts):
+                coupon, coupon_error = next(coupons) if coupon_code else (None, None)
+                cart = self.shopping_carts.get(customer_id)
+                if cart is None:
+                    results[position] = ValueError("Shopping cart not found for this customer.")
+                    continue
+                if not cart.cart_lines or customer_id in seen:
+                    results[position] = ValueError("Shopping cart is empty.")
+                    continue
+                if coupon_error:
+                    results[position] = ValueError(coupon_error)
+                    continue
+                seen.add(customer_id)
+                accepted.append((position, customer_id, cart, cart.cart_lines.copy(),
+                                 self.customers[customer_id].customer_type, coupon))
+
+            # Read stock and price every distinct product once per customer type
+            store = self.product_store
+            wanted = {CustomerType.INDIVIDUAL: {}, CustomerType.RETAIL: {}}
+            for _, _, _, lines, customer_type, _ in accepted:
+                wanted[customer_type].update(lines)
+            for customer_type, by_id in wanted.items():
+                wanted[customer_type] = {product_id: line[0] for product_id, line in by_id.items()}
+            stock = {product_id: product.product_stock
+                     for by_id in wanted.values() for product_id, product in by_id.items()}
+            prices = {}
+            for customer_type, by_id in wanted.items():
+                stored = [p for p in by_id.values() if p.product_store is store]
+                unit_prices = dict(zip([p.product_id for p in stored],
+                                       store.price_rows([p.product_row for p in stored], customer_type)))
+                for product_id, product in by_id.items():
+                    if product_id not in unit_prices:
+                        unit_prices[product_id] = product.get_price(customer_type)
+                prices[customer_type] = unit_prices
+
+            # Create the orders, deliveries and replacement carts, with IDs drawn in one go
+            ids = new_ids(3 * len(accepted))
+            now = datetime.datetime.now()
+            orders, deliveries, carts, new_carts = [], [], [], []
+            for number, (position, customer_id, cart, lines, customer_type, coupon) in enumerate(accepted):
+                unit_prices = prices[customer_type]
+                items, short, subtotal = [], None, 0.0
+                for product_id, line in lines.items():
+                    product, qty = line[0], line[1]
+                    if stock[product_id] < -qty:
+                        short = product
+                        break
+                    items.append((product, qty))
+                    subtotal += unit_prices[product_id] * qty  # Summed here rather than in a pass per order
+                if short is not None:
+                    results[position] = ValueError(f"Insufficient stock for {short.product_name}.")
+                    continue
+                order = Order(customer_id, items, ids[3 * number])
+                order.order_coupon = coupon
+                order.place_at_subtotal(subtotal, now)
+                results[position] = order
+                orders.append(order)
+                deliveries.append(Delivery(order.order_id, ids[3 * number + 1], now))
+                carts.append(cart)
+                new_carts.append(ShoppingCart(customer_id, self.reservations, ids[3 * number + 2]))
+
+            # Store the batch, keep the purchased stock and hand out the new carts
+            self.orders.update((order.order_id, order) for order in orders)
+            self.order_index.add_many(orders)
+            self.deliveries.add_many(deliveries)
+            for cart, order in zip(carts, orders):
+                self.reservations.confirm_held(cart, order.order_items)
+            store.remove_carts(carts)
+            self.shopping_carts.update((cart.customer_id, cart) for cart in new_carts)
+
+        # Ship outside the stripe locks, which the ledger takes after its own lock
+        if self.inventory is not None:
+            self.inventory.ship([line for order in orders for line in order.order_items])
+
+        if orders and self.journal is not None:
+            self._record("checkout_orders", {"orders": [{**order_to_dict(order, delivery), "cart_id": cart.cart_id}
+                                                        for order, delivery, cart in zip(orders, deliveries, new_carts)]})
+        return results
+
+    def _store_order(self, order: Order, delivery: Delivery) -> None:
+        """
+        Stores a placed order and its delivery.
+        """
+        self.orders[order.order_id] = order
+        self.order_index.add(order)
+        self.deliveries.add(delivery)
+
+    def get_orders(self, customer_id: str = None, status: str = None, since=None,
+                   limit: int = 50, cursor: int = None) -> tuple:
+        """
+        Returns (orders, next_cursor): a page of orders in placement order, filtered by customer,
+        status and earliest placement time. Pass next_cursor back to get the next page.
+        """
+        return self.order_index.query(customer_id, status, since, limit, cursor)
+
+    @_mutation
+    def cancel_order(self, order_id: str) -> bool:
+        """
+        Cancels a placed order.
+        """
+        if order_id not in self.orders:
+            raise ValueError("Order not found.")
+        self.orders[order_id].cancel_order()
+        self._record("cancel_order", {"order_id": order_id})
+        return True
+
+    def _reset_cart(self, customer_id: str) -> ShoppingCart:
+        """
+        Gives a customer a new, empty shopping cart and returns it.
+        """
+        old_cart = self.shopping_carts.get(customer_id)
+        if old_cart is not None:
+            old_cart._detach_lines()
+        cart = ShoppingCart(customer_id, self.reservations)
+        self.shopping_carts[customer_id] = cart
+        return cart
+
+    @_mutation
+    def expire_reservations(self) -> int:
+        """
+        Returns stock held by abandoned carts whose reservations have expired.
+        """
+        if self.journal_replaying:
+            return 0  # Replay re-applies the expiries that were logged instead
+        expired = self.reservations.expire_holds()
+        if expired:
+            self._record("expire_reservations", {"holds": [[cart.customer_id, product.product_id, qty]
+                                                           for cart, product, qty in expired]})
+        return len(expired)
+
+    @_mutation
+    def adjust_stock(self, adjustments: list) -> int:
+        """
+        Applies a batch of (product_id, warehouse, change[, reason]) stock adjustments, all or
+        none of them. Returns the number of warehouse movements logged.
+        """
+        self._ledger()
+        for adjustment in adjustments:
+            if adjustment[0] not in self.products:
+                raise ValueError("Product not found.")
+            self.products[adjustment[0]]  # Builds catalog products, adding them to the ledger
+        count = self.inventory.adjust_many(adjustments)
+        self._record("adjust_stock", {"adjustments": [list(adjustment) for adjustment in adjustments]})
+        return count
+
+    @_mutation
+    def transfer_stock(self, product_id: str, source: str, destination: str, quantity: int) -> bool:
+        """
+        Moves stock of a product between warehouses without changing how much can be sold.
+        """
+        self._ledger()
+        if product_id not in self.products:
+            raise ValueError("Product not found.")
+        self.products[product_id]
+        self.inventory.transfer(product_id, source, destination, quantity)
+        self._record("transfer_stock", {"product_id": product_id, "source": source,
+                                        "destination": destination, "quantity": quantity})
+        return True
+
+    def stock_levels(self, product_id: str) -> dict:
+        """
+        Returns {warehouse: units on hand} for a product.
+        """
+        self._ledger()
+        if product_id not in self.products:
+            raise ValueError("Product not found.")
+        self.products[product_id]
+        return self.inventory.levels(product_id)
+
+    def _ledger(self) -> None:
+        """
+        Raises ValueError if this system keeps no stock ledger.
+        """
+        if self.inventory is None:
+            raise ValueError("Stock ledger is disabled.")
+
     def search_products(self, name: str) -> list:
         """
-        Searches for products by name.
+        Searches for products by name, returning every match in the order the products were added.
+        """
+        self._index_catalog()
+        return self.search_index.search(name)
+
+    def search_products_page(self, name: str, limit: int = 50, cursor: int = None) -> tuple:
+        """
+        Returns (products, next_cursor): a page of products matching the name, ranked exact,
+        prefix, word start, then substring. Pass next_cursor back to get the next page.
+        """
+        self._index_catalog()
+        return self.search_index.search_ranked(name, limit, cursor)
+
+    def _index_catalog(self) -> None:
+        """
+        Adds the names of a lazily opened catalog to the search index on first search.
         """
-        search_engine = Search(list(self.products.values()), list(self.categories.values()))
-        return search_engine.search_by_name(name)
+        if self.catalog_unindexed:
+            for product_id, product_name in self.catalog.names():
+                self.search_index.add_name(product_id, product_name)
+            self.catalog_unindexed = False
 
     def search_category(self, category_name: str) -> list:
         """
         Searches for products within a specific category.
         """
-        search_engine = Search(list(self.products.values()), list(self.categories.values()))
+        cat = self.category_names.get(category_name.strip().lower())
+        if cat is not None and cat.category_id in self.catalog_pending:
+            self._list_catalog_category(cat)
+        search_engine = Search([], [], self.category_names)
         return search_engine.search_by_category(category_name)
 
+    def filter_products(self, category_name: str = None, min_price: float = None, max_price: float = None,
+                        customer_type: CustomerType = CustomerType.INDIVIDUAL, min_stock: int = None,
+                        discounted: bool = None,
+                        limit: int = None) -> tuple:
+        """
+        Returns (products, facet_counts) for products matching every given filter: category,
+        unit price range for the customer type, minimum stock and whether a discount is set.
+
+        Products are ordered by unit price, at most limit of them. facet_counts maps each
+        category name to its number of products matching every filter except the category.
+        """
+        for cat in self.categories.values():
+            if cat.category_id in self.catalog_pending:
+                self._list_catalog_category(cat)
+            if not self.facets.is_built(cat.category_id):
+                self.facets.build(cat.category_id, cat.category_products)
+
+        filters = (customer_type, min_price, max_price, min_stock, discounted)
+        if category_name is None:
+            matches, counts = self.facets.query(list(self.categories), *filters, limit=limit)
+        else:
+            counts = self.facets.query(list(self.categories), *filters, limit=1)[1]
+            cat = self.category_names.get(category_name.strip().lower())
+            matches = self.facets.query([cat.category_id], *filters, limit=limit)[0] if cat else []
+        return ([product for product, _ in matches],
+                {self.categories[category_id].category_name: count for category_id, count in counts.items()})
+
     def track_delivery(self, order_id: str) -> Delivery:
         """
         Tracks the delivery status of an order.
         """
         return self.deliveries.get(order_id, None)
+
+    @_mutation
+    def update_delivery_status(self, order_id: str, status: str) -> bool:
+        """
+        Updates the delivery status of an order.
+        """
+        self.deliveries.update_status(order_id, status)
+        self._record("update_delivery_status", {"order_id": order_id, "status": status})
+        return True
+
+    @_mutation
+    def update_delivery_statuses(self, updates: list) -> tuple:
+        """
+        Applies a batch of (order_id, status) delivery updates in one pass.
+        Returns (updated_count, errors) with errors as (order_id, message) for skipped updates.
+        """
+        changes, errors = self.deliveries.update_statuses(updates)
+        if changes:
+            self._record("update_delivery_statuses", {"updates": [[delivery.order_id, new_status]
+                                                                  for delivery, _, new_status in changes]})
+        return len(changes), errors
+
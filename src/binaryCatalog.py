@@ -0,0 +1,302 @@
+import argparse
+import mmap
+import os
+import struct
+from src.product import Product
+from src.productStore import ProductStore
+
+CATALOG_MAGIC = b"EMCT"
+CATALOG_VERSION = 1
+
+# magic, version, flags, product count, category count, products offset, id index offset, heap offset
+HEADER = struct.Struct("<4sHHIIQQQ")
+# id, name (offset and length into the string heap), first product record, product count
+CATEGORY_RECORD = struct.Struct("<IIIIII")
+# id, name, description (offset and length into the string heap), category record,
+# retail price, wholesale price, discount, stock
+PRODUCT_RECORD = struct.Struct("<IIIIIIIdddq")
+INDEX_ENTRY = struct.Struct("<I")
+
+def write_catalog(filename: str, system) -> int:
+    """
+    Writes the categories and products of a system to a binary catalog snapshot.
+
+    Products are stored grouped by category, in the order they were added. A product
+    listed under several categories is stored once, under the first of them.
+    Returns the number of products written.
+    """
+    system.materialize_catalog()
+    heap = bytearray()
+
+    def intern(text: str) -> tuple:
+        encoded = text.encode("utf-8")
+        offset = len(heap)
+        heap.extend(encoded)
+        return offset, len(encoded)
+
+    categories = []
+    products = []
+    seen = set()
+    for cat in system.categories.values():
+        first = len(products)
+        for product in cat.category_products:
+            if product.product_id not in seen:
+                seen.add(product.product_id)
+                products.append((product, len(categories)))
+        categories.append(CATEGORY_RECORD.pack(*intern(cat.category_id), *intern(cat.category_name),
+                                               first, len(products) - first))
+
+    records = []
+    for product, category in products:
+        records.append(PRODUCT_RECORD.pack(
+            *intern(product.product_id), *intern(product.product_name), *intern(product.product_description),
+            category, product.product_retail_price, product.product_wholesale_price,
+            product.product_discount_percent, product.product_stock))
+    order = sorted(range(len(products)), key=lambda i: products[i][0].product_id.encode("utf-8"))
+
+    products_offset = HEADER.size + CATEGORY_RECORD.size * len(categories)
+    index_offset = products_offset + PRODUCT_RECORD.size * len(products)
+    heap_offset = index_offset + INDEX_ENTRY.size * len(products)
+
+    # Write to a temporary file first so a reader never maps a half-written snapshot
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as file:
+        file.write(HEADER.pack(CATALOG_MAGIC, CATALOG_VERSION, 0, len(products), len(categories),
+                               products_offset, index_offset, heap_offset))
+        file.write(b"".join(categories))
+        file.write(b"".join(records))
+        file.write(struct.pack(f"<{len(order)}I", *order))
+        file.write(heap)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_filename, filename)
+    return len(products)
+
+def convert_json_catalog(json_filename: str, catalog_filename: str) -> tuple:
+    """
+    Converts a products.json style file into a binary catalog snapshot.
+    Returns (written_count, errors) with errors as reported by load_products.
+    """
+    from src.EMarketSystem import EMarketSystem
+    from src.catalogLoader import load_products
+
+    system = EMarketSystem()
+    _, errors = load_products(system, json_filename)
+    return write_catalog(catalog_filename, system), errors
+
+class BinaryCatalog:
+    """
+    Represents a read-only, memory-mapped binary catalog snapshot.
+
+    The file holds fixed-width category and product records, an index of product
+    records sorted by product ID, and a heap of UTF-8 strings the records point into.
+    Opening it only maps the file, so startup cost does not grow with the catalog;
+    records are decoded when they are read and IDs are found by binary search.
+
+    Attributes:
+        catalog_filename (str): Path of the snapshot file.
+        catalog_map (mmap): Read-only mapping of the file.
+        catalog_product_count (int): Number of product records.
+        catalog_category_count (int): Number of category records.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Maps a catalog snapshot and validates its header.
+        """
+        self.catalog_filename = filename
+        with open(filename, "rb") as file:
+            self.catalog_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.catalog_map) < HEADER.size:
+            self.close()
+            raise ValueError("Not a catalog snapshot.")
+        (magic, version, _, self.catalog_product_count, self.catalog_category_count,
+         self.catalog_products_offset, self.catalog_index_offset, self.catalog_heap_offset) = \
+            HEADER.unpack_from(self.catalog_map)
+        if magic != CATALOG_MAGIC:
+            self.close()
+            raise ValueError("Not a catalog snapshot.")
+        if version != CATALOG_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported catalog snapshot version {version}.")
+
+    def __len__(self) -> int:
+        return self.catalog_product_count
+
+    def _string(self, offset: int, length: int) -> str:
+        """
+        Decodes a string from the heap.
+        """
+        start = self.catalog_heap_offset + offset
+        return self.catalog_map[start:start + length].decode("utf-8")
+
+    def _record(self, index: int) -> tuple:
+        """
+        Returns the raw fields of a product record.
+        """
+        if not 0 <= index < self.catalog_product_count:
+            raise IndexError("Catalog product index out of range.")
+        return PRODUCT_RECORD.unpack_from(self.catalog_map, self.catalog_products_offset + index * PRODUCT_RECORD.size)
+
+    def categories(self) -> list:
+        """
+        Returns (category_id, name, first_product, product_count) for every category.
+        """
+        result = []
+        for i in range(self.catalog_category_count):
+            id_offset, id_length, name_offset, name_length, first, count = \
+                CATEGORY_RECORD.unpack_from(self.catalog_map, HEADER.size + i * CATEGORY_RECORD.size)
+            result.append((self._string(id_offset, id_length), self._string(name_offset, name_length), first, count))
+        return result
+
+    def product_id(self, index: int) -> str:
+        """
+        Returns the product ID stored in a product record.
+        """
+        record = self._record(index)
+        return self._string(record[0], record[1])
+
+    def find(self, product_id: str) -> int:
+        """
+        Returns the record index of a product ID, or -1 if the catalog does not contain it.
+        """
+        target = product_id.encode("utf-8") if isinstance(product_id, str) else None
+        if target is None:
+            return -1
+        low, high = 0, self.catalog_product_count
+        while low < high:
+            middle = (low + high) // 2
+            index = INDEX_ENTRY.unpack_from(self.catalog_map, self.catalog_index_offset + middle * INDEX_ENTRY.size)[0]
+            record = self._record(index)
+            start = self.catalog_heap_offset + record[0]
+            key = self.catalog_map[start:start + record[1]]
+            if key == target:
+                return index
+            if key < target:
+                low = middle + 1
+            else:
+                high = middle
+        return -1
+
+    def names(self):
+        """
+        Yields (product_id, name) for every product without building Product objects.
+        """
+        for index in range(self.catalog_product_count):
+            record = self._record(index)
+            yield self._string(record[0], record[1]), self._string(record[2], record[3])
+
+    def product(self, index: int, store: ProductStore) -> Product:
+        """
+        Builds the Product for a record, storing its numeric fields in a new row of store.
+        """
+        (id_offset, id_length, name_offset, name_length, description_offset, description_length,
+         _, retail_price, wholesale_price, discount, stock) = self._record(index)
+        product = Product.__new__(Product)
+        product.product_id = self._string(id_offset, id_length)
+        product.product_name = self._string(name_offset, name_length)
+        product.product_description = self._string(description_offset, description_length)
+        product.product_store = store
+        product.product_row = store.add_row(retail_price, wholesale_price, stock, discount)
+        return product
+
+    def close(self) -> None:
+        """
+        Unmaps the snapshot.
+        """
+        self.catalog_map.close()
+
+class CatalogProducts(dict):
+    """
+    Maps product_id to Product like a dict, building catalog products on first access.
+
+    Products added to the system are stored in the dict as usual. A product that is
+    only in the catalog is built from its record, with its numeric fields in the
+    system's ProductStore, the first time it is looked up. Iterating materializes
+    the whole catalog.
+
+    Attributes:
+        catalog (BinaryCatalog): The snapshot backing the mapping.
+        catalog_store (ProductStore): Store receiving materialized products.
+        catalog_materialized (int): Number of catalog records turned into products so far.
+        catalog_listener (callable or None): Called with each product as it is built.
+    """
+
+    def __init__(self, products: dict, catalog: BinaryCatalog, store: ProductStore):
+        """
+        Wraps the already added products and a catalog snapshot.
+        """
+        super().__init__(products)
+        self.catalog = catalog
+        self.catalog_store = store
+        self.catalog_materialized = 0
+        self.catalog_complete = False  # Set once every record has been materialized
+        self.catalog_listener = None
+
+    def __missing__(self, product_id: str) -> Product:
+        index = self.catalog.find(product_id)
+        if index < 0:
+            raise KeyError(product_id)
+        product = self.catalog.product(index, self.catalog_store)
+        dict.__setitem__(self, product_id, product)
+        self.catalog_materialized += 1
+        if self.catalog_listener is not None:
+            self.catalog_listener(product)
+        return product
+
+    def __contains__(self, product_id) -> bool:
+        return dict.__contains__(self, product_id) or (not self.catalog_complete and self.catalog.find(product_id) >= 0)
+
+    def __len__(self) -> int:
+        if self.catalog_complete:
+            return dict.__len__(self)
+        return dict.__len__(self) + len(self.catalog) - self.catalog_materialized
+
+    def get(self, product_id, default=None):
+        try:
+            return self[product_id]
+        except KeyError:
+            return default
+
+    def materialize_all(self) -> None:
+        """
+        Builds every catalog product that has not been looked up yet.
+        """
+        if self.catalog_complete:
+            return
+        for index in range(len(self.catalog)):
+            self[self.catalog.product_id(index)]
+        self.catalog_complete = True
+
+    def __iter__(self):
+        self.materialize_all()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self.materialize_all()
+        return dict.keys(self)
+
+    def values(self):
+        self.materialize_all()
+        return dict.values(self)
+
+    def items(self):
+        self.materialize_all()
+        return dict.items(self)
+
+def main():
+    """
+    Converts a products.json style file into a binary catalog snapshot.
+    """
+    parser = argparse.ArgumentParser(description="Convert a JSON product catalog into a binary snapshot")
+    parser.add_argument("source", help="products.json style JSON array or JSON-lines file")
+    parser.add_argument("target", help="binary catalog snapshot to write")
+    args = parser.parse_args()
+
+    written, errors = convert_json_catalog(args.source, args.target)
+    for _, name, error in errors:
+        print(f"Error adding product {name}: {error}")
+    print(f"Wrote {written} products to {args.target}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import json
+import itertools
+import re
+from src.product import Product
+
+CHUNK_SIZE = 64 * 1024  # Characters read from the file per refill
+WHITESPACE = re.compile(r"\s*")
+STRUCTURE = re.compile(r'[\[\]{}",]')  # Characters that nest, quote or separate JSON values
+STRING_END = re.compile(r'["\\]')
+
+def iter_product_records(filename: str):
+    """
+    Yields (record_number, record, error) tuples from a JSON array or JSON-lines file.
+
+    The file is parsed incrementally, so memory stays bounded by the largest record
+    rather than the whole file. A record that cannot be decoded is yielded with an
+    error message instead of a record, and parsing carries on with the next one; only
+    an unterminated JSON array stops the iteration.
+    """
+    with open(filename, "r") as file:
+        buffer, read = "", 0
+        while True:
+            buffer = buffer.lstrip()
+            if buffer:
+                break
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                return  # Empty file
+            buffer += chunk
+            read += len(chunk)
+
+        if buffer[0] == "[":
+            yield from _iter_array(file, buffer[1:], read - len(buffer) + 1)
+        else:
+            yield from _iter_lines(file, buffer)
+
+def _iter_lines(file, buffer: str):
+    """
+    Yields records from a JSON-lines stream, one JSON object per line.
+    """
+    head = buffer.splitlines(keepends=True)
+    if not head[-1].endswith("\n"):
+        head[-1] += file.readline()  # Complete the line cut off by the first read
+
+    number = 0
+    for line in itertools.chain(head, file):
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e}"
+
+def _iter_array(file, buffer: str, offset: int = 0):
+    """
+    Yields records from the body of a JSON array, decoding one element at a time.
+    offset is the character position of buffer[0] in the file, used in error messages.
+    """
+    decoder = json.JSONDecoder()
+    number = 0
+    pos = 0  # Read position in buffer; consumed text is dropped on each refill
+    expect_value = True  # False while waiting for a ',' or ']' separator
+    pending = None  # (record, error) of the element waiting for its separator
+    while True:
+        match = WHITESPACE.match(buffer, pos)
+        pos = match.end()
+        if pos == len(buffer):
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+            buffer, pos, offset = buffer[pos:] + chunk, 0, offset + pos
+            continue
+
+        if not expect_value:
+            if buffer[pos] not in ",]":
+                # Text after a decoded value: the element is malformed after all
+                pending = None, f"Invalid JSON in element at character {start}: Expected ',' or ']'"
+                buffer, pos = _element_end(file, buffer, pos)
+            number += 1
+            yield (number, *pending)
+            if buffer[pos] == "]":
+                return
+            pos += 1
+            expect_value = True
+            continue
+
+        if buffer[pos] == "]" and number == 0:
+            return  # Empty array
+
+        start = offset + pos
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Either cut off at the end of the buffer or malformed: read on to the element's
+            # end once, so it is decoded at most twice, then skip it if it still fails
+            element = pos
+            buffer, pos = _element_end(file, buffer, pos)
+            try:
+                record, pos = decoder.raw_decode(buffer, element)  # Text after the value fails the separator check
+            except json.JSONDecodeError as e:
+                pending = None, f"Invalid JSON in element at character {start}: {e.msg}"
+                expect_value = False
+                continue
+        pending = record, None
+        expect_value = False
+
+def _element_end(file, buffer: str, pos: int) -> tuple:
+    """
+    Reads on until the ',' or ']' ending the array element at pos and returns (buffer, index).
+    Strings are skipped and brackets matched, so separators inside the element do not count.
+    """
+    depth, in_string = 0, False
+    while True:
+        match = (STRING_END if in_string else STRUCTURE).search(buffer, pos)
+        if match is None or match.group() == "\\" and match.end() == len(buffer):
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, len(buffer))
+            pos = match.start() if match else len(buffer)  # Look at a cut-off escape again
+            buffer += chunk
+            continue
+        char, pos = match.group(), match.end()
+        if char == "\\":
+            pos += 1  # Skip the escaped character
+        elif char == '"':
+            in_string = not in_string
+        elif char in "[{":
+            depth += 1
+        elif depth:
+            if char != ",":
+                depth -= 1
+        elif char != "}":
+            return buffer, match.start()
+
+def product_from_record(record) -> tuple:
+    """
+    Builds a (Product, category_name) pair from a products.json style record.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Record must be a JSON object.")
+    try:
+        product = Product(record["name"], record["description"], record["price"], record["cost"], record["stock"])
+        category_name = record["category"]
+    except KeyError as e:
+        raise ValueError(f"Missing field {e}.")
+    except TypeError as e:
+        raise ValueError(f"Invalid field type: {e}.")
+    if not category_name:
+        raise ValueError("Category name is required.")
+    return product, category_name
+
+def load_products(system, filename: str, batch_size: int = 1000) -> tuple:
+    """
+    Streams products from a JSON array or JSON-lines file into the system in batches.
+
+    Returns a tuple (loaded_count, errors), where errors is a list of
+    (record_number, product_name, message) for every record that was skipped.
+    """
+    if batch_size <= 0:
+        raise ValueError("Batch size must be greater than zero.")
+
+    loaded = 0
+    errors = []
+    batch = []
+    for number, record, error in iter_product_records(filename):
+        name = record.get("name") if isinstance(record, dict) else None
+        if error:
+            errors.append((number, name, error))
+            continue
+        try:
+            batch.append(product_from_record(record))
+        except ValueError as ve:
+            errors.append((number, name, str(ve)))
+            continue
+
+        if len(batch) >= batch_size:
+            loaded += len(system.add_products_bulk(batch))
+            batch = []
+
+    if batch:
+        loaded += len(system.add_products_bulk(batch))
+    return loaded, errors
@@ -0,0 +1,458 @@
+import bisect
+import threading
+from operator import itemgetter
+from src.productStore import ProductStore
+from src.customerType import CustomerType
+from src.searchIndex import EXACT, PREFIX, WORD, SUBSTRING, POSITION_MASK, RANK_SHIFT, WORD_PATTERN, match_rank
+
+CHUNK_SIZE = 256  # Entries per chunk; a write copies one chunk and the tuple of chunks
+GRAM_SIZE = 3     # Longest n-gram and name prefix in the name indexes shared by versions
+
+def _appended(chunks: tuple, items: list) -> tuple:
+    """
+    Returns chunks with items added at the end, sharing every full chunk.
+    """
+    if not items:
+        return chunks
+    head, last = (chunks[:-1], list(chunks[-1])) if chunks and len(chunks[-1]) < CHUNK_SIZE else (chunks, [])
+    fresh = []
+    for item in items:
+        last.append(item)
+        if len(last) == CHUNK_SIZE:
+            fresh.append(tuple(last))
+            last = []
+    if last:
+        fresh.append(tuple(last))
+    return head + tuple(fresh)
+
+def _replaced(chunks: tuple, position: int, item) -> tuple:
+    """
+    Returns chunks with the item at position replaced, sharing every other chunk.
+    """
+    index, offset = divmod(position, CHUNK_SIZE)
+    chunk = chunks[index]
+    return chunks[:index] + (chunk[:offset] + (item,) + chunk[offset + 1:],) + chunks[index + 1:]
+
+class NameIndex:
+    """
+    Represents the name indexes shared by catalog versions.
+
+    Every index maps a key to the sorted positions of the names it covers. Positions
+    are appended as products are published, so a version reads each posting list
+    only up to its own count and ignores products added after it.
+
+    Attributes:
+        index_grams (dict): Maps every 1- to GRAM_SIZE-character substring of a lowercased name
+            to the positions of the names containing it.
+        index_names (dict): Maps a whole lowercased name to the positions with that name.
+        index_name_starts (dict): Maps the first 1 to GRAM_SIZE characters of a name to its positions.
+        index_word_starts (dict): Maps the first 1 to GRAM_SIZE characters of every word to its positions.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty name indexes.
+        """
+        self.index_grams = {}
+        self.index_names = {}
+        self.index_name_starts = {}
+        self.index_word_starts = {}
+
+    def add(self, name: str, position: int) -> None:
+        """
+        Indexes a lowercased name at a position. Positions normally arrive in increasing
+        order; a renamed product's earlier position is inserted in its place.
+        """
+        keys = [(self.index_names, name)]
+        keys += [(self.index_grams, name[start:start + size]) for size in range(1, min(GRAM_SIZE, len(name)) + 1)
+                 for start in range(len(name) - size + 1)]
+        keys += [(self.index_name_starts, name[:size]) for size in range(1, min(GRAM_SIZE, len(name)) + 1)]
+        keys += [(self.index_word_starts, name[word.start():word.start() + size])
+                 for word in WORD_PATTERN.finditer(name) for size in range(1, GRAM_SIZE + 1)]
+        for index, key in keys:
+            posting = index.get(key)
+            if posting is None:
+                index[key] = [position]
+            elif posting[-1] < position:
+                posting.append(position)
+            else:
+                spot = bisect.bisect_left(posting, position)
+                if posting[spot] != position:
+                    posting.insert(spot, position)
+
+    def add_all(self, products: list, first: int) -> None:
+        """
+        Indexes the names of products published at positions first onwards.
+        """
+        for position, product in enumerate(products, first):
+            self.add(product[8], position)
+
+class ProductVersion(tuple):
+    """
+    Represents a product as it was when a catalog version was published.
+
+    It reads like a Product, but it is a tuple and can never change, so a reader
+    can use it without locks while the product itself is being repriced. Stock is
+    the exception: it is read from the product's ProductStore row on each access,
+    since a single stock count cannot be torn and must stay current for selling.
+
+    Attributes:
+        product_id (str): Unique identifier for the product.
+        product_name (str): Name of the product.
+        product_description (str): Description of the product.
+        product_retail_price (float): Retail price per unit.
+        product_wholesale_price (float): Wholesale price per unit.
+        product_discount_percent (float): Percentage discount applied.
+        product_stock (int): Units currently in stock.
+    """
+
+    __slots__ = ()
+
+    product_id = property(itemgetter(0))
+    product_name = property(itemgetter(1))
+    product_description = property(itemgetter(2))
+    product_retail_price = property(itemgetter(3))
+    product_wholesale_price = property(itemgetter(4))
+    product_discount_percent = property(itemgetter(5))
+
+    @classmethod
+    def of(cls, product) -> "ProductVersion":
+        """
+        Returns the current version of a product.
+        """
+        store, row = product.product_store, product.product_row
+        tables = store.store_price_tables
+        return cls((product.product_id, product.product_name, product.product_description,
+                    store.store_retail_prices[row], store.store_wholesale_prices[row], store.store_discounts[row],
+                    store, row, product.product_name.lower(),
+                    tables[CustomerType.INDIVIDUAL][row], tables[CustomerType.RETAIL][row]))
+
+    @property
+    def product_stock(self) -> int:
+        return self[6].store_stock[self[7]]
+
+    def get_price(self, customer_type: CustomerType) -> float:
+        """
+        Returns the price after applying the discount, as Product.get_price did when published.
+        """
+        return self[10] if customer_type == CustomerType.RETAIL else self[9]
+
+    def get_details(self) -> str:
+        """
+        Returns a formatted string containing product details.
+        """
+        return (
+            f"ID: {self.product_id}\n"
+            f"Name: {self.product_name}\n"
+            f"Description: {self.product_description}\n"
+            f"Retail Price: ${self.product_retail_price:.2f}\n"
+            f"Wholesale Price: ${self.product_wholesale_price:.2f}\n"
+            f"Stock: {self.product_stock}\n"
+            f"Discount: {self.product_discount_percent:g}%"
+        )
+
+class CatalogVersion:
+    """
+    Represents one immutable, published state of the catalog.
+
+    Products are kept in insertion order in a tuple of fixed-size chunks, and each
+    category as a tuple of chunks of product positions. Publishing a change copies
+    only the chunks it touches, so consecutive versions share almost all their
+    structure. A reader pins a version by holding on to it: nothing in it changes
+    afterwards, so it needs no lock however many writers publish meanwhile.
+
+    Attributes:
+        version_number (int): Increases by one with every published version.
+        version_products (tuple): Chunks of ProductVersion in insertion order.
+        version_count (int): Number of products in this version.
+        version_positions (dict): Maps product_id to its position; shared, append-only,
+            and may hold products added after this version.
+        version_names (NameIndex): Name indexes; shared like version_positions, so
+            positions past version_count are ignored.
+        version_categories (dict): Maps lowercased category name to (category_id, name, chunks of positions).
+    """
+
+    def __init__(self, number: int, products: tuple, count: int, positions: dict, names: NameIndex,
+                 categories: dict):
+        """
+        Initializes a version from structure shared with the versions before it.
+        """
+        self.version_number = number
+        self.version_products = products
+        self.version_count = count
+        self.version_positions = positions
+        self.version_names = names
+        self.version_categories = categories
+
+    def __len__(self) -> int:
+        return self.version_count
+
+    def _at(self, position: int) -> ProductVersion:
+        """
+        Returns the product at a position.
+        """
+        return self.version_products[position // CHUNK_SIZE][position % CHUNK_SIZE]
+
+    def products(self):
+        """
+        Yields every product in insertion order.
+        """
+        for chunk in self.version_products:
+            yield from chunk
+
+    def get(self, product_id: str) -> ProductVersion:
+        """
+        Returns a product by ID, or None if it is not in this version.
+        """
+        position = self.version_positions.get(product_id)
+        if position is None or position >= self.version_count:
+            return None
+        return self._at(position)
+
+    def get_details(self, product_id: str) -> str:
+        """
+        Returns the formatted details of a product.
+        """
+        product = self.get(product_id)
+        if product is None:
+            raise ValueError("Product not found.")
+        return product.get_details()
+
+    def category_names(self) -> list:
+        """
+        Returns the name of every category.
+        """
+        return [name for _, name, _ in self.version_categories.values()]
+
+    def _candidates(self, query: str) -> list:
+        """
+        Returns the shortest posting list of a non-empty lowercased query's n-grams, or an
+        empty list if a gram is missing. Its positions are unconfirmed and may pass this version's count.
+        """
+        keys = [query] if len(query) <= GRAM_SIZE else {query[i:i + GRAM_SIZE]
+                                                       for i in range(len(query) - GRAM_SIZE + 1)}
+        postings = []
+        for key in keys:
+            posting = self.version_names.index_grams.get(key)
+            if not posting:
+                return []
+            postings.append(posting)
+        return min(postings, key=len)
+
+    def _matches(self, query: str) -> list:
+        """
+        Returns, in order, the positions of products whose name contains a non-empty lowercased query.
+        """
+        posting = self._candidates(query)
+        # Later versions append to the same postings, so stop at this version's products,
+        # and n-gram overlap does not imply a contiguous match, so confirm each candidate
+        candidates = posting[:bisect.bisect_left(posting, self.version_count)]
+        return [position for position in candidates if query in self._at(position)[8]]
+
+    def search_by_name(self, name: str) -> list:
+        """
+        Searches for products whose name contains the given text, in insertion order.
+        """
+        name = name.strip().lower()
+        if not name:
+            return list(self.products())
+        return [self._at(position) for position in self._matches(name)]
+
+    def search_page(self, name: str, limit: int, cursor: int = None) -> tuple:
+        """
+        Returns (products, next_cursor) for the limit best matches of the name after cursor,
+        ranked exact, prefix, word start, then substring as SearchIndex.search_ranked does.
+        Pass next_cursor back to get the following page; it is None once no matches are left.
+        """
+        if limit <= 0:
+            raise ValueError("Limit must be greater than zero.")
+        query = name.strip().lower()
+        if not query:
+            start = 0 if cursor is None else (cursor & POSITION_MASK) + 1
+            positions = range(start, min(start + limit, self.version_count))
+            next_cursor = positions[-1] if start + limit < self.version_count else None
+            return [self._at(position) for position in positions], next_cursor
+
+        candidates = self._candidates(query)
+        if not candidates:
+            return [], None
+        names, key = self.version_names, query[:GRAM_SIZE]
+        # Word starts are only indexed at letters and digits, so other queries check every match
+        tiers = [(EXACT, names.index_names.get(query, ())), (PREFIX, names.index_name_starts.get(key, ())),
+                 (WORD, names.index_word_starts.get(key, ()) if query[0].isalnum() else candidates),
+                 (SUBSTRING, candidates)]
+
+        # Walk each rank's postings in position order, confirming every name, only until the
+        # page and one match past it are found; a pool may hold names of other ranks
+        after = -1 if cursor is None else cursor
+        best = []
+        for rank, pool in tiers:
+            if after >= (rank + 1) << RANK_SHIFT or not pool:
+                continue  # The cursor is past this rank
+            lowest = after & POSITION_MASK if after >> RANK_SHIFT == rank else -1
+            for i in range(bisect.bisect_right(pool, lowest), bisect.bisect_left(pool, self.version_count)):
+                position = pool[i]
+                if match_rank(self._at(position)[8], query) == rank:
+                    best.append(rank << RANK_SHIFT | position)
+                    if len(best) > limit:
+                        break
+            if len(best) > limit:
+                break
+        next_cursor = best[limit - 1] if len(best) > limit else None
+        return [self._at(key & POSITION_MASK) for key in best[:limit]], next_cursor
+
+    def search_by_category(self, category_name: str) -> list:
+        """
+        Returns the products of a category, in the order they were added to it.
+        """
+        category = self.version_categories.get(category_name.strip().lower())
+        if category is None:
+            return []
+        products = self.version_products
+        return [products[position // CHUNK_SIZE][position % CHUNK_SIZE]
+                for chunk in category[2] for position in chunk]
+
+class CatalogVersions:
+    """
+    Publishes copy-on-write catalog versions as products are added and repriced.
+
+    Writers publish under a lock; readers take versions_current, a single reference
+    read, and keep using that version. A stale publisher is rebuilt under the same lock. Price and discount changes arrive from the
+    ProductStore listeners and republish just the product that changed.
+
+    Until a first version is asked for, or after the catalog was loaded behind the
+    publisher's back (opening a catalog snapshot or restoring a journal snapshot),
+    the publisher is stale: writes are not published and the next reader rebuilds
+    the whole version instead.
+
+    Attributes:
+        versions_current (CatalogVersion): The latest published version.
+        versions_stale (bool): True while the next version must be rebuilt from the catalog.
+        versions_rows (dict): Maps a ProductStore row to the published product using it.
+    """
+
+    def __init__(self, store: ProductStore):
+        """
+        Initializes a stale publisher with an empty version and subscribes to the store's price changes.
+        """
+        self.versions_store = store
+        self.versions_current = CatalogVersion(0, (), 0, {}, NameIndex(), {})
+        self.versions_stale = True
+        self.versions_rows = {}
+        self.versions_lock = threading.Lock()  # Serializes writers; readers never take it
+        store.store_listeners.append(self.price_changed)
+
+    def snapshot(self, load) -> CatalogVersion:
+        """
+        Returns the latest version, first rebuilding it if the publisher is stale. load()
+        returns the (products, categories) to rebuild from and is called under the lock,
+        so concurrent readers of a stale publisher rebuild it only once.
+        """
+        if not self.versions_stale:
+            return self.versions_current
+        with self.versions_lock:
+            if self.versions_stale:  # Another reader may have rebuilt it while this one waited
+                self._rebuild(*load())
+            return self.versions_current
+
+    def invalidate(self) -> None:
+        """
+        Marks the publisher stale after the catalog was loaded behind its back.
+        """
+        with self.versions_lock:
+            self.versions_stale = True
+
+    def rebuild(self, products, categories) -> CatalogVersion:
+        """
+        Publishes a version built from scratch out of every Product, in insertion order,
+        and every Category's product list.
+        """
+        with self.versions_lock:
+            return self._rebuild(products, categories)
+
+    def _rebuild(self, products, categories) -> CatalogVersion:
+        """
+        Builds and publishes a version from scratch; the caller holds the lock.
+        """
+        positions, rows, published = {}, {}, []
+        for product in products:
+            if product.product_id not in positions:
+                positions[product.product_id] = len(published)
+                published.append(ProductVersion.of(product))
+                if product.product_store is self.versions_store:
+                    rows[product.product_row] = product
+        listed = {cat.category_name.lower(): (cat.category_id, cat.category_name,
+                                              _appended((), [positions[p.product_id] for p in cat.category_products]))
+                  for cat in categories}
+        names = NameIndex()
+        names.add_all(published, 0)
+        self.versions_rows = rows
+        self.versions_stale = False
+        self.versions_current = CatalogVersion(self.versions_current.version_number + 1,
+                                               _appended((), published), len(published), positions, names, listed)
+        return self.versions_current
+
+    def publish(self, pairs: list) -> None:
+        """
+        Publishes one version adding a batch of (Product, Category) pairs.
+        """
+        if not pairs:
+            return
+        with self.versions_lock:
+            if self.versions_stale:
+                return
+            current = self.versions_current
+            positions, count = current.version_positions, current.version_count
+            added, members = [], {}
+            for product, cat in pairs:
+                key = cat.category_name.lower()
+                position = positions.get(product.product_id)
+                if position is None:
+                    position = count + len(added)
+                    added.append(ProductVersion.of(product))
+                    if product.product_store is self.versions_store:
+                        self.versions_rows[product.product_row] = product
+                    positions[product.product_id] = position  # Older versions ignore positions past their count
+                elif position < count and self._listed(current, key, position, members) >= \
+                        sum(listed is product for listed in cat.category_products):
+                    continue  # A rebuild running while this write was made already listed it
+                members.setdefault(key, (cat, []))[1].append(position)
+
+            categories = dict(current.version_categories)
+            for key, (cat, new_positions) in members.items():
+                listed = categories.get(key)
+                chunks = listed[2] if listed is not None else ()
+                categories[key] = (cat.category_id, cat.category_name, _appended(chunks, new_positions))
+            current.version_names.add_all(added, count)  # Older versions ignore positions past their count
+            self.versions_current = CatalogVersion(current.version_number + 1,
+                                                   _appended(current.version_products, added),
+                                                   count + len(added), positions, current.version_names, categories)
+
+    @staticmethod
+    def _listed(current: CatalogVersion, key: str, position: int, members: dict) -> int:
+        """
+        Returns how many times a position is listed in a category, counting the batch being published.
+        """
+        listed = current.version_categories.get(key)
+        count = sum(chunk.count(position) for chunk in listed[2]) if listed is not None else 0
+        return count + (members[key][1].count(position) if key in members else 0)
+
+    def price_changed(self, row: int) -> None:
+        """
+        Publishes a version with the new prices of the product in a store row.
+        """
+        with self.versions_lock:
+            product = self.versions_rows.get(row)
+            if self.versions_stale or product is None:
+                return
+            current = self.versions_current
+            position = current.version_positions[product.product_id]
+            version = ProductVersion.of(product)
+            if version[8] != current._at(position)[8]:
+                # Renamed since it was published: index the new name too; stale keys are
+                # only extra candidates, which searches confirm against each version's names
+                current.version_names.add(version[8], position)
+            self.versions_current = CatalogVersion(
+                current.version_number + 1, _replaced(current.version_products, position, version),
+                current.version_count, current.version_positions, current.version_names,
+                current.version_categories)
@@ -1,5 +1,5 @@
-import uuid
 from src.product import Product
+from src.idGenerator import new_id
 
 class Category:
     """
@@ -16,7 +16,7 @@ class Category:
         """
         if not name:
             raise ValueError("Category name is required.")
-        self.category_id = uuid.uuid4().hex     # Generate a unique category ID
+        self.category_id = new_id()     # Generate a unique category ID
         self.category_name = name
         self.category_products = []                      # List to hold products in this category
 
@@ -1,5 +1,5 @@
-import uuid
 import datetime
+from src.idGenerator import new_id
 
 class Coupon:
     """
@@ -21,7 +21,7 @@ class Coupon:
         if discount < 0 or discount > 100:
             raise ValueError("Discount must be between 0 and 100.") 
 
-        self.coupon_id = uuid.uuid4().hex  # Generate a unique coupon ID
+        self.coupon_id = new_id()  # Generate a unique coupon ID
         self.coupon_code = code  # Coupon code
         self.coupon_discount = discount  # Discount percentage
         self.coupon_expiry_date = expiry_date  # Expiration date
@@ -33,8 +33,8 @@ class Coupon:
         discount_amount = amount * (self.coupon_discount / 100)
         return amount - discount_amount
 
-    def is_valid(self) -> bool:
+    def is_valid(self, today: datetime.date = None) -> bool:
         """
         Checks if the coupon is still valid based on the expiry date.
         """
-        return datetime.date.today() <= self.coupon_expiry_date
+        return (today or datetime.date.today()) <= self.coupon_expiry_date
@@ -0,0 +1,167 @@
+import datetime
+import heapq
+import time
+from src.coupon import Coupon
+
+TICK_SECONDS = 1.0  # How long the cached date is trusted before the calendar is read again
+RETENTION_DAYS = 30  # Days an expired coupon is kept so checkout can still say it expired
+
+class CouponRegistry:
+    """
+    Represents every discount coupon in the system, by code.
+
+    Validity checks compare against a cached date that is read from the calendar at
+    most once per tick, instead of calling date.today() for every check. Expiry dates
+    are kept in a min-heap, so whenever the date moves on, coupons that expired more
+    than the retention period ago are evicted from the top of the heap without
+    scanning the rest. Until then an expired coupon stays registered, so using it
+    reports that it expired rather than that it does not exist.
+
+    Attributes:
+        registry_coupons (dict): Maps coupon code to Coupon objects.
+        registry_expiry (list): Min-heap of (expiry_date, code) entries.
+        registry_retention (datetime.timedelta): How long expired coupons are kept.
+        registry_today (datetime.date): Cached current date.
+        registry_checked_at (float): Clock reading when the date was last read.
+    """
+
+    def __init__(self, retention_days: int = RETENTION_DAYS, today=datetime.date.today, clock=time.monotonic):
+        """
+        Initializes an empty registry. today reads the calendar and clock measures ticks.
+        """
+        if retention_days < 0:
+            raise ValueError("Retention cannot be negative.")
+        self.registry_coupons = {}
+        self.registry_expiry = []
+        self.registry_retention = datetime.timedelta(days=retention_days)
+        self.registry_calendar = today
+        self.registry_clock = clock
+        self.registry_today = today()
+        self.registry_checked_at = clock()
+
+    def __len__(self) -> int:
+        return len(self.registry_coupons)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.registry_coupons
+
+    def __getitem__(self, code: str) -> Coupon:
+        return self.registry_coupons[code]
+
+    def __iter__(self):
+        return iter(self.registry_coupons)
+
+    def get(self, code: str, default=None) -> Coupon:
+        """
+        Returns the coupon with a code, or default if there is none.
+        """
+        return self.registry_coupons.get(code, default)
+
+    def values(self):
+        """
+        Returns a view of every registered coupon.
+        """
+        return self.registry_coupons.values()
+
+    def today(self) -> datetime.date:
+        """
+        Returns the current date, reading the calendar at most once per tick.
+        Evicts long-expired coupons whenever the date has moved on.
+        """
+        now = self.registry_clock()
+        if now - self.registry_checked_at >= TICK_SECONDS:
+            self.registry_checked_at = now
+            today = self.registry_calendar()
+            if today != self.registry_today:
+                self.registry_today = today
+                self.evict_expired()
+        return self.registry_today
+
+    def add(self, coupon: Coupon) -> Coupon:
+        """
+        Registers a coupon, replacing any coupon with the same code.
+        """
+        self.registry_coupons[coupon.coupon_code] = coupon
+        heapq.heappush(self.registry_expiry, (coupon.coupon_expiry_date, coupon.coupon_code))
+        return coupon
+
+    def add_many(self, coupons: list) -> int:
+        """
+        Registers many coupons at once, rebuilding the expiry heap in a single pass.
+        Returns the number of coupons added.
+        """
+        registered = self.registry_coupons
+        entries = self.registry_expiry
+        for coupon in coupons:
+            registered[coupon.coupon_code] = coupon
+            entries.append((coupon.coupon_expiry_date, coupon.coupon_code))
+        heapq.heapify(entries)
+        return len(coupons)
+
+    def evict_expired(self) -> int:
+        """
+        Removes coupons that expired more than the retention period ago and returns how many.
+        """
+        cutoff = self.registry_today - self.registry_retention
+        entries = self.registry_expiry
+        registered = self.registry_coupons
+        evicted = 0
+        while entries and entries[0][0] < cutoff:
+            expiry_date, code = heapq.heappop(entries)
+            coupon = registered.get(code)
+            # Skip entries left behind by a coupon that was replaced under the same code
+            if coupon is not None and coupon.coupon_expiry_date == expiry_date:
+                del registered[code]
+                evicted += 1
+        return evicted
+
+    def validate(self, code: str) -> Coupon:
+        """
+        Returns the coupon with a code if it can be used today.
+        """
+        coupon = self.registry_coupons.get(code)
+        if coupon is None:
+            raise ValueError("Coupon not found.")
+        if not coupon.is_valid(self.today()):
+            raise ValueError("Coupon has expired.")
+        return coupon
+
+    def validate_many(self, codes: list) -> list:
+        """
+        Validates many codes against one reading of the date. Returns a (coupon, error)
+        pair per code, with coupon None and error the reason when it cannot be used.
+        """
+        today = self.today()
+        registered = self.registry_coupons
+        results = []
+        for code in codes:
+            coupon = registered.get(code)
+            if coupon is None:
+                results.append((None, "Coupon not found."))
+            elif today > coupon.coupon_expiry_date:
+                results.append((None, "Coupon has expired."))
+            else:
+                results.append((coupon, None))
+        return results
+
+    def apply_many(self, orders: list) -> list:
+        """
+        Prices many (amount, code) pairs at once, where code may be None for no coupon.
+        Returns an (amount, error) pair per order: the discounted amount, or the
+        original amount and the reason the coupon could not be used.
+        """
+        today = self.today()
+        registered = self.registry_coupons
+        results = []
+        for amount, code in orders:
+            if not code:
+                results.append((amount, None))
+                continue
+            coupon = registered.get(code)
+            if coupon is None:
+                results.append((amount, "Coupon not found."))
+            elif today > coupon.coupon_expiry_date:
+                results.append((amount, "Coupon has expired."))
+            else:  # Coupon.apply_discount, inlined for large batches
+                results.append((amount - amount * (coupon.coupon_discount / 100), None))
+        return results
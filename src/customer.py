@@ -1,5 +1,6 @@
 from src.user import User
 from src.helperFunctions import is_valid_email
+from src.customerType import CustomerType
 
 class Customer(User):
     """
@@ -12,8 +13,12 @@ class Customer(User):
         customer_phone (str): The contact number of the customer.
         customer_loyalty_points (int): Points earned through purchases.
         customer_coupons (list): A list of available discount coupons.
+        customer_email_index (dict or None): The system's email -> user_id index, once registered.
+        customer_type (CustomerType): The price list the customer buys from.
     """
 
+    customer_type = CustomerType.INDIVIDUAL
+
     def __init__(self, username: str, password: str, email: str,
                  name: str, address: str, phone: str):
         """
@@ -33,6 +38,7 @@ class Customer(User):
         self.customer_phone = phone
         self.customer_loyalty_points = 0  # Default loyalty points
         self.customer_coupons = []  # List of available coupons
+        self.customer_email_index = None  # Shared email index, bound on registration
 
     def register(self) -> bool:
         """
@@ -47,6 +53,13 @@ class Customer(User):
         if email and not is_valid_email(email):
             raise ValueError("Invalid email format.")
 
+        if email and self.customer_email_index is not None:
+            owner = self.customer_email_index.get(email.lower())
+            if owner is not None and owner != self.user_id:
+                raise ValueError("Email already registered. Please use another email.")
+            self.customer_email_index.pop(self.customer_email.lower(), None)
+            self.customer_email_index[email.lower()] = self.user_id
+
         self.customer_name = name if name else self.customer_name
         self.customer_address = address if address else self.customer_address
         self.customer_phone = phone if phone else self.customer_phone
@@ -85,6 +98,8 @@ class RetailCustomer(Customer):
     Inherits from Customer and applies wholesale pricing.
     """
 
+    customer_type = CustomerType.RETAIL
+
     def __init__(self, username: str, password: str, email: str,
                  name: str, address: str, phone: str, business_license: str):
         """
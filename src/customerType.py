@@ -0,0 +1,29 @@
+from enum import Enum
+
+class CustomerType(str, Enum):
+    """
+    Represents the price list a customer buys from.
+
+    Members are strings equal to their values, so the "individual" and "retail"
+    literals still found in stored data and requests keep working wherever a
+    CustomerType is expected.
+
+    Attributes:
+        INDIVIDUAL: Individual customers pay the discounted retail price.
+        RETAIL: Retail (business) customers pay the discounted wholesale price.
+    """
+
+    INDIVIDUAL = "individual"
+    RETAIL = "retail"
+
+    __format__ = str.__format__
+
+    def __str__(self) -> str:
+        return self.value
+
+    @classmethod
+    def parse(cls, value) -> "CustomerType":
+        """
+        Returns the customer type for a value; anything other than retail prices as individual.
+        """
+        return cls.RETAIL if value == cls.RETAIL else cls.INDIVIDUAL
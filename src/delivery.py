@@ -1,5 +1,14 @@
-import uuid
 import datetime
+from src.idGenerator import new_id
+
+# Time left until delivery once a delivery enters each (lowercased) status
+STATUS_ETAS = {
+    "preparing": datetime.timedelta(hours=2),
+    "shipped": datetime.timedelta(hours=1),
+    "out for delivery": datetime.timedelta(minutes=30),
+    "delivered": datetime.timedelta(0),
+}
+DEFAULT_ETA = datetime.timedelta(hours=2)  # For statuses without an entry above
 
 class Delivery:
     """
@@ -9,30 +18,55 @@ class Delivery:
         delivery_id (str): Unique identifier for the delivery.
         order_id (str): Identifier for the associated order.
         delivery_status (str): Current status of the delivery.
+        delivery_eta (datetime): Estimated delivery time, recomputed only when the status changes.
+        delivery_manager (DeliveryManager or None): Manager to notify when the status changes.
     """
 
-    def __init__(self, order_id: str):
+    def __init__(self, order_id: str, delivery_id: str = None, now: datetime.datetime = None):
         """
-        Initializes a new delivery instance.
+        Initializes a new delivery instance. A new unique ID is generated unless delivery_id
+        is given, and the estimate counts from now, which defaults to the current time.
         """
-        self.delivery_id = uuid.uuid4().hex  # Generate a unique delivery ID
+        self.delivery_id = delivery_id or new_id()  # Generate a unique delivery ID
         self.order_id = order_id  # Associated order ID
         self.delivery_status = "Preparing" 
+        self.delivery_eta = self._estimate(now)
+        self.delivery_manager = None
 
-    def update_status(self, status: str) -> bool:
+    def _estimate(self, now: datetime.datetime = None) -> datetime.datetime:
         """
-        Updates the delivery status.
+        Computes the delivery time expected from the current status.
+        """
+        return (now or datetime.datetime.now()) + STATUS_ETAS.get(self.delivery_status.lower(), DEFAULT_ETA)
+
+    def _apply_status(self, status: str, now: datetime.datetime = None) -> str:
+        """
+        Sets a new status, refreshing the estimate on a transition, and returns the old status.
         """
+        if not isinstance(status, str):
+            raise ValueError("Status must be text.")
         if not status:
             raise ValueError("Status cannot be empty.")
-        self.delivery_status = status  # Update the delivery status
+        old_status = self.delivery_status
+        if status != old_status:
+            self.delivery_status = status
+            self.delivery_eta = self._estimate(now)
+        return old_status
+
+    def update_status(self, status: str) -> bool:
+        """
+        Updates the delivery status.
+        """
+        old_status = self._apply_status(status)
+        if self.delivery_manager is not None and old_status != status:
+            self.delivery_manager.status_changed(self, old_status)
         return True
 
     def get_estimated_time(self) -> datetime.datetime:
         """
         Estimates the delivery time.
         """
-        return datetime.datetime.now() + datetime.timedelta(hours=2)
+        return self.delivery_eta
 
     def track_delivery(self) -> str:
         """
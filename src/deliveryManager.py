@@ -0,0 +1,153 @@
+import datetime
+from src.delivery import Delivery
+
+class DeliveryManager:
+    """
+    Represents the deliveries of all orders, indexed by order_id and by status.
+
+    Status changes, whether made through the manager or on a Delivery directly, move
+    the delivery between status buckets in O(1) and are passed to subscribers as a
+    list of (delivery, old_status, new_status) changes. update_statuses applies a whole
+    batch in one pass and notifies subscribers once for it.
+
+    Attributes:
+        manager_deliveries (dict): Maps order_id to Delivery objects.
+        manager_by_status (dict): Maps status to a dict of order_id to Delivery, in arrival order.
+        manager_subscribers (list): Callables receiving each list of status changes.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty manager.
+        """
+        self.manager_deliveries = {}
+        self.manager_by_status = {}
+        self.manager_subscribers = []
+
+    def __len__(self) -> int:
+        return len(self.manager_deliveries)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self.manager_deliveries
+
+    def __getitem__(self, order_id: str) -> Delivery:
+        return self.manager_deliveries[order_id]
+
+    def __iter__(self):
+        return iter(self.manager_deliveries)
+
+    def get(self, order_id: str, default=None) -> Delivery:
+        """
+        Returns the delivery for an order, or default if there is none.
+        """
+        return self.manager_deliveries.get(order_id, default)
+
+    def add(self, delivery: Delivery) -> Delivery:
+        """
+        Starts managing a delivery.
+        """
+        self.manager_deliveries[delivery.order_id] = delivery
+        self.manager_by_status.setdefault(delivery.delivery_status, {})[delivery.order_id] = delivery
+        delivery.delivery_manager = self
+        return delivery
+
+    def add_many(self, deliveries: list) -> None:
+        """
+        Starts managing many deliveries at once.
+        """
+        registered, by_status = self.manager_deliveries, self.manager_by_status
+        for delivery in deliveries:
+            registered[delivery.order_id] = delivery
+            bucket = by_status.get(delivery.delivery_status)
+            if bucket is None:
+                bucket = by_status[delivery.delivery_status] = {}
+            bucket[delivery.order_id] = delivery
+            delivery.delivery_manager = self
+
+    def by_status(self, status: str) -> list:
+        """
+        Returns the deliveries currently in a status.
+        """
+        return list(self.manager_by_status.get(status, {}).values())
+
+    def status_counts(self) -> dict:
+        """
+        Returns the number of deliveries in each status.
+        """
+        return {status: len(bucket) for status, bucket in self.manager_by_status.items() if bucket}
+
+    def subscribe(self, callback) -> None:
+        """
+        Registers callback(changes) to receive lists of (delivery, old_status, new_status).
+        """
+        self.manager_subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> bool:
+        """
+        Stops notifying a callback. Returns False if it was not subscribed.
+        """
+        if callback in self.manager_subscribers:
+            self.manager_subscribers.remove(callback)
+            return True
+        return False
+
+    def _move(self, delivery: Delivery, old_status: str) -> None:
+        """
+        Moves a delivery from its old status bucket to its current one.
+        """
+        bucket = self.manager_by_status.get(old_status)
+        if bucket is not None:
+            bucket.pop(delivery.order_id, None)
+        self.manager_by_status.setdefault(delivery.delivery_status, {})[delivery.order_id] = delivery
+
+    def _notify(self, changes: list) -> None:
+        """
+        Passes a list of status changes to every subscriber.
+        """
+        for callback in list(self.manager_subscribers):
+            callback(changes)
+
+    def status_changed(self, delivery: Delivery, old_status: str) -> None:
+        """
+        Records a status change made on a delivery.
+        """
+        self._move(delivery, old_status)
+        self._notify([(delivery, old_status, delivery.delivery_status)])
+
+    def update_status(self, order_id: str, status: str) -> bool:
+        """
+        Updates the status of one delivery.
+        """
+        if order_id not in self.manager_deliveries:
+            raise ValueError("Order not found.")
+        return self.manager_deliveries[order_id].update_status(status)
+
+    def update_statuses(self, updates) -> tuple:
+        """
+        Applies a batch of (order_id, status) updates in one pass.
+
+        Updates for unknown orders or with an empty or non-text status are skipped. Returns
+        (changes, errors): the (delivery, old_status, new_status) changes made and
+        (order_id, message) for every skipped update. Subscribers receive all the
+        changes of the batch in a single notification.
+        """
+        deliveries = self.manager_deliveries
+        now = datetime.datetime.now()  # One clock read dates every estimate in the batch
+        changes = []
+        errors = []
+        for order_id, status in updates:
+            delivery = deliveries.get(order_id)
+            if delivery is None:
+                errors.append((order_id, "Order not found."))
+                continue
+            try:
+                old_status = delivery._apply_status(status, now)
+            except ValueError as ve:
+                errors.append((order_id, str(ve)))
+                continue
+            if old_status != status:
+                self._move(delivery, old_status)
+                changes.append((delivery, old_status, status))
+        if changes:
+            self._notify(changes)
+        return changes, errors
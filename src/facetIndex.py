@@ -0,0 +1,162 @@
+import bisect
+import heapq
+from array import array
+from src.productStore import ProductStore
+from src.customerType import CustomerType
+
+class FacetIndex:
+    """
+    Represents sorted price indexes over the products of each category, for faceted filtering.
+
+    For every category and customer type, the discounted unit prices of its products
+    are kept in a sorted array beside an array of their ProductStore rows, so a
+    price range is found with two binary searches. Stock and discount are read
+    straight from the store's columns while a range is scanned, so they are always
+    current. Prices are the only indexed values: the store reports every price or
+    discount change, and the product is moved to its new position.
+
+    A category is indexed the first time a query needs it, from its product list.
+
+    Attributes:
+        facet_store (ProductStore): Store holding the prices, stock and discounts of indexed products.
+        facet_prices (dict): Maps (category_id, customer_type) to a sorted array of unit prices.
+        facet_rows (dict): Maps (category_id, customer_type) to the store rows in facet_prices order.
+        facet_entries (dict): Maps an indexed row to {category_id: (individual price, retail price)}
+            for every category it is indexed under.
+        facet_products (dict): Maps an indexed row to its Product.
+    """
+
+    def __init__(self, store: ProductStore):
+        """
+        Initializes empty indexes over store and subscribes to its price changes.
+        """
+        self.facet_store = store
+        self.facet_prices = {}
+        self.facet_rows = {}
+        self.facet_entries = {}
+        self.facet_products = {}
+        self.facet_built = set()  # category_ids indexed so far
+        store.store_listeners.append(self.price_changed)
+
+    def is_built(self, category_id: str) -> bool:
+        """
+        Returns whether a category has been indexed.
+        """
+        return category_id in self.facet_built
+
+    def build(self, category_id: str, products: list) -> None:
+        """
+        Indexes a category's products with one sort per customer type.
+        """
+        store = self.facet_store
+        products = list({product.product_row: product for product in products
+                         if product.product_store is store}.values())  # A product listed twice is indexed once
+        rows = [product.product_row for product in products]
+        prices = {customer_type: store.price_rows(rows, customer_type) for customer_type in CustomerType}
+        individual_prices, retail_prices = prices[CustomerType.INDIVIDUAL], prices[CustomerType.RETAIL]
+        for product, row, individual, retail in zip(products, rows, individual_prices, retail_prices):
+            self.facet_entries.setdefault(row, {})[category_id] = (individual, retail)
+            self.facet_products[row] = product
+        for customer_type in CustomerType:
+            ordered = sorted(zip(prices[customer_type], rows))
+            self.facet_prices[(category_id, customer_type)] = array("d", [price for price, _ in ordered])
+            self.facet_rows[(category_id, customer_type)] = array("q", [row for _, row in ordered])
+        self.facet_built.add(category_id)
+
+    def add(self, product, category_id: str) -> None:
+        """
+        Indexes a product added to a category. Unindexed categories pick it up when they are built.
+        """
+        if category_id not in self.facet_built or product.product_store is not self.facet_store:
+            return
+        row = product.product_row
+        if category_id in self.facet_entries.get(row, ()):
+            self._remove(row, category_id)
+        self._insert(product, row, category_id)
+
+    def _insert(self, product, row: int, category_id: str) -> None:
+        """
+        Inserts a row into a category's arrays at its current prices.
+        """
+        store = self.facet_store
+        individual, retail = store.price_row(row, CustomerType.INDIVIDUAL), store.price_row(row, CustomerType.RETAIL)
+        for customer_type, price in ((CustomerType.INDIVIDUAL, individual), (CustomerType.RETAIL, retail)):
+            prices = self.facet_prices[(category_id, customer_type)]
+            position = bisect.bisect_right(prices, price)
+            prices.insert(position, price)
+            self.facet_rows[(category_id, customer_type)].insert(position, row)
+        self.facet_entries.setdefault(row, {})[category_id] = (individual, retail)
+        self.facet_products[row] = product
+
+    def _remove(self, row: int, category_id: str) -> None:
+        """
+        Removes a row from a category's arrays.
+        """
+        entries = self.facet_entries[row]
+        individual, retail = entries.pop(category_id)
+        if not entries:
+            del self.facet_entries[row]
+        for customer_type, price in ((CustomerType.INDIVIDUAL, individual), (CustomerType.RETAIL, retail)):
+            prices, rows = self.facet_prices[(category_id, customer_type)], self.facet_rows[(category_id, customer_type)]
+            position = rows.index(row, bisect.bisect_left(prices, price), bisect.bisect_right(prices, price))
+            del prices[position]
+            del rows[position]
+
+    def price_changed(self, row: int) -> None:
+        """
+        Moves an indexed row to the positions of its new prices in every category it is in.
+        """
+        entries = self.facet_entries.get(row)
+        if entries is None:
+            return
+        store = self.facet_store
+        current = (store.price_row(row, CustomerType.INDIVIDUAL), store.price_row(row, CustomerType.RETAIL))
+        product = self.facet_products[row]
+        for category_id, prices in list(entries.items()):
+            if prices != current:
+                self._remove(row, category_id)
+                self._insert(product, row, category_id)
+
+    def query(self, category_ids: list, customer_type: CustomerType = CustomerType.INDIVIDUAL, min_price: float = None,
+              max_price: float = None, min_stock: int = None, discounted: bool = None,
+              limit: int = None) -> tuple:
+        """
+        Returns (matches, counts) over the given indexed categories.
+
+        matches is a list of (Product, category_id) pairs, at most limit of them, ordered
+        by unit price for customer_type, with each product once. counts maps each category_id to its number of
+        matching products, or to nothing if none match.
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than zero.")
+        customer_type = CustomerType.parse(customer_type)
+        stock, discounts = self.facet_store.store_stock, self.facet_store.store_discounts
+        counts = {}
+        ranges = []
+        for category_id in category_ids:
+            prices = self.facet_prices[(category_id, customer_type)]
+            rows = self.facet_rows[(category_id, customer_type)]
+            low = 0 if min_price is None else bisect.bisect_left(prices, min_price)
+            high = len(prices) if max_price is None else bisect.bisect_right(prices, max_price)
+            if low >= high:
+                continue
+            if min_stock is None and discounted is None:
+                positions = range(low, high)  # Every row in the price range matches
+            else:
+                positions = [position for position in range(low, high)
+                             if (min_stock is None or stock[rows[position]] >= min_stock)
+                             and (discounted is None or (discounts[rows[position]] > 0) == discounted)]
+            if positions:
+                counts[category_id] = len(positions)
+                ranges.append([(prices[position], rows[position], category_id) for position in
+                               (positions if limit is None else positions[:limit])])
+
+        # Each category's range is already sorted by price, so merging them keeps that order;
+        # a product in several of the categories is returned once, under one of them
+        merged = heapq.merge(*ranges)
+        if len(ranges) > 1:
+            seen = set()
+            merged = (match for match in merged if match[1] not in seen and not seen.add(match[1]))
+        if limit is not None:
+            merged = (match for match, _ in zip(merged, range(limit)))
+        return [(self.facet_products[row], category_id) for _, row, category_id in merged], counts
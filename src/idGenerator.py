@@ -0,0 +1,155 @@
+import base64
+import os
+import struct
+import threading
+import time
+
+EPOCH_MS = 1_704_067_200_000  # 2024-01-01 UTC; IDs count milliseconds from here
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+NODE_MASK = (1 << NODE_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+TIME_SHIFT = NODE_BITS + SEQUENCE_BITS
+ID_LENGTH = 11  # Characters in the string form of a 64-bit ID
+
+# The base64 alphabet remapped onto URL-safe characters in ASCII order, so that
+# fixed-width encodings compare as strings the same way the IDs compare as integers
+_STANDARD = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_SORTABLE = b"-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_TO_SORTABLE = bytes.maketrans(_STANDARD, _SORTABLE)
+_FROM_SORTABLE = bytes.maketrans(_SORTABLE, _STANDARD)
+
+def encode_id(value: int) -> str:
+    """
+    Returns the 11-character string form of a 64-bit ID.
+    """
+    return base64.b64encode(value.to_bytes(8, "big")).translate(_TO_SORTABLE)[:ID_LENGTH].decode()
+
+def encode_ids(values: list) -> list:
+    """
+    Returns the string forms of many 64-bit IDs, encoded in one pass.
+    """
+    # A zero byte after each ID makes it 9 bytes, 12 characters, whose first 11 are its string form
+    text = base64.b64encode(struct.pack(">" + "Qx" * len(values), *values)).translate(_TO_SORTABLE).decode()
+    return [text[start:start + ID_LENGTH] for start in range(0, len(text), ID_LENGTH + 1)]
+
+def decode_id(text: str) -> int:
+    """
+    Returns the 64-bit integer behind the string form of an ID.
+    """
+    if len(text) != ID_LENGTH:
+        raise ValueError("Invalid ID.")
+    try:
+        return int.from_bytes(base64.b64decode(text.encode("ascii").translate(_FROM_SORTABLE) + b"=",
+                                               validate=True), "big")
+    except ValueError:
+        raise ValueError("Invalid ID.") from None
+
+class IdGenerator:
+    """
+    Represents a Snowflake style source of unique, time-ordered 64-bit IDs.
+
+    Each ID packs the milliseconds since EPOCH_MS, the generator's node number and a
+    sequence number within the millisecond, so IDs from one generator always increase
+    and generators on different nodes never collide. If more than 4096 IDs are asked
+    for within a millisecond, or the clock steps back, the generator carries on from
+    the last millisecond it used instead of waiting for the clock.
+
+    IDs are handed out in their 11-character string form, which sorts in the same
+    order as the integers.
+
+    Attributes:
+        generator_node (int): Node number stamped into every ID, below 1024.
+        generator_clock (callable): Returns the current time in nanoseconds.
+        generator_last (int): Millisecond, since EPOCH_MS, of the last ID handed out.
+        generator_sequence (int): Sequence number of the last ID in that millisecond.
+    """
+
+    def __init__(self, node: int = None, clock=time.time_ns):
+        """
+        Initializes a generator for a node; a random node is picked if none is given.
+        """
+        if node is None:
+            node = int.from_bytes(os.urandom(2), "big") & NODE_MASK
+        if not 0 <= node <= NODE_MASK:
+            raise ValueError(f"Node must be between 0 and {NODE_MASK}.")
+        self.generator_node = node
+        self.generator_clock = clock
+        self.generator_last = -1
+        self.generator_sequence = SEQUENCE_MASK
+        self.generator_lock = threading.Lock()
+
+    def next_int(self) -> int:
+        """
+        Returns the next ID as an integer.
+        """
+        now = self.generator_clock() // 1_000_000 - EPOCH_MS
+        with self.generator_lock:
+            if now > self.generator_last:
+                self.generator_last, self.generator_sequence = now, 0
+            elif self.generator_sequence < SEQUENCE_MASK:
+                self.generator_sequence += 1
+            else:  # Sequence used up, or the clock went back: borrow the next millisecond
+                self.generator_last, self.generator_sequence = self.generator_last + 1, 0
+            return self.generator_last << TIME_SHIFT | self.generator_node << SEQUENCE_BITS | self.generator_sequence
+
+    def next_id(self) -> str:
+        """
+        Returns the next ID in its string form.
+        """
+        return encode_id(self.next_int())
+
+    def next_ints(self, count: int) -> list:
+        """
+        Returns count consecutive IDs as integers, reserved under a single lock.
+        """
+        now = self.generator_clock() // 1_000_000 - EPOCH_MS
+        values = []
+        with self.generator_lock:
+            last, sequence = self.generator_last, self.generator_sequence
+            if now > last:
+                last, sequence = now, -1
+            while len(values) < count:
+                if sequence == SEQUENCE_MASK:
+                    last, sequence = last + 1, -1
+                take = min(count - len(values), SEQUENCE_MASK - sequence)
+                base = last << TIME_SHIFT | self.generator_node << SEQUENCE_BITS
+                values.extend(range(base + sequence + 1, base + sequence + 1 + take))
+                sequence += take
+            self.generator_last, self.generator_sequence = last, sequence
+        return values
+
+    def next_ids(self, count: int) -> list:
+        """
+        Returns count consecutive IDs in their string form.
+        """
+        return encode_ids(self.next_ints(count))
+
+_generator = IdGenerator()
+
+def set_generator(generator) -> object:
+    """
+    Makes every new domain object take its ID from generator and returns the previous one.
+    Any object with next_id() and next_ids(count) methods returning strings will do.
+    """
+    global _generator
+    previous, _generator = _generator, generator
+    return previous
+
+def new_id() -> str:
+    """
+    Returns a new ID from the current generator.
+    """
+    return _generator.next_id()
+
+def new_ids(count: int) -> list:
+    """
+    Returns count new IDs from the current generator.
+    """
+    return _generator.next_ids(count)
+
+def id_timestamp(text: str) -> float:
+    """
+    Returns when an ID was generated, in seconds since the Unix epoch.
+    """
+    return ((decode_id(text) >> TIME_SHIFT) + EPOCH_MS) / 1000
@@ -1,34 +1,227 @@
+import threading
 from src.product import Product
+from src.productStore import ProductStore
+
+DEFAULT_WAREHOUSE = "main"  # Where a product's stock is kept until it is moved or received elsewhere
 
 class Inventory:
     """
-    Manages inventory for a specific product in the E-Mart system.
+    Represents the stock ledger of every product across the warehouses it ships from.
+
+    Units on hand are kept per (product_id, warehouse), with a running total per
+    product. A product's sellable units stay in the ProductStore stock column, which
+    Product.product_stock reads, so availability is a single array read: it is the
+    units on hand less those held in shopping carts. Adjustments change a level and
+    the sellable units together, all or nothing per batch, under the reservation
+    engine's stripe locks. Checkout ships the sold units out of the product's
+    warehouses, fullest first, without touching the sellable units a cart already took.
+
+    Every change to a level is appended to a movement log. compact() replaces the
+    log with one balance entry per level.
 
     Attributes:
-        product_id (str): Unique identifier for the associated product.
-        inventory_quantity (int): Current stock quantity of the product.
+        inventory_store (ProductStore): Store whose stock column holds the sellable units.
+        inventory_engine (ReservationEngine): Engine whose stripe locks guard the stock column.
+        inventory_levels (dict): Maps product_id to {warehouse: units on hand}.
+        inventory_on_hand (dict): Maps product_id to its units on hand across all warehouses.
+        inventory_products (dict): Maps product_id to each Product in the ledger.
+        inventory_log (list): Movements as (product_id, warehouse, change, reason) tuples.
+        inventory_compacted (int): Number of movements folded away by compact().
     """
 
-    def __init__(self, product: Product, quantity: int):
+    def __init__(self, store: ProductStore, engine):
+        """
+        Initializes an empty ledger over store; direct stock updates on its products go through it.
+        """
+        self.inventory_store = store
+        self.inventory_engine = engine
+        self.inventory_levels = {}
+        self.inventory_on_hand = {}
+        self.inventory_products = {}
+        self.inventory_log = []
+        self.inventory_compacted = 0
+        self.inventory_lock = threading.Lock()  # Guards the levels and the log
+        store.store_inventory = self
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.inventory_levels
+
+    def track(self, product: Product, levels: dict = None) -> None:
+        """
+        Adds a product to the ledger with the given {warehouse: units} on hand, by default
+        its current stock in the default warehouse. Products already in the ledger are kept.
+        """
+        if levels is None:
+            levels = {DEFAULT_WAREHOUSE: product.product_stock}
+        with self.inventory_lock:
+            if product.product_id in self.inventory_levels:
+                return
+            self.inventory_levels[product.product_id] = dict(levels)
+            self.inventory_on_hand[product.product_id] = sum(levels.values())
+            self.inventory_products[product.product_id] = product
+            self.inventory_log.extend((product.product_id, warehouse, units, "opening")
+                                      for warehouse, units in levels.items())
+
+    def track_many(self, products: list) -> None:
+        """
+        Adds many products to the ledger, each with its current stock in the default warehouse.
+        """
+        with self.inventory_lock:
+            for product in products:
+                product_id = product.product_id
+                if product_id in self.inventory_levels:
+                    continue
+                units = product.product_stock
+                self.inventory_levels[product_id] = {DEFAULT_WAREHOUSE: units}
+                self.inventory_on_hand[product_id] = units
+                self.inventory_products[product_id] = product
+                self.inventory_log.append((product_id, DEFAULT_WAREHOUSE, units, "opening"))
+
+    def available(self, product_id: str) -> int:
+        """
+        Returns the units of a product that can still be sold.
+        """
+        return self.inventory_products[product_id].product_stock
+
+    def on_hand(self, product_id: str) -> int:
+        """
+        Returns the units of a product on hand across every warehouse, including units held in carts.
+        """
+        return self.inventory_on_hand[product_id]
+
+    def levels(self, product_id: str) -> dict:
+        """
+        Returns {warehouse: units on hand} for a product.
+        """
+        return dict(self.inventory_levels[product_id])
+
+    def _allocate(self, product_id: str, qty: int, pending: dict) -> list:
+        """
+        Returns (warehouse, units) pairs taking qty units from a product's fullest warehouses,
+        counting the (product_id, warehouse) changes still pending in the same batch.
+        """
+        levels = [(warehouse, units + pending.get((product_id, warehouse), 0))
+                  for warehouse, units in self.inventory_levels[product_id].items()]
+        taken = []
+        for warehouse, units in sorted(levels, key=lambda level: -level[1]):
+            if qty <= 0 or units <= 0:
+                break
+            take = min(units, qty)
+            taken.append((warehouse, take))
+            qty -= take
+        if qty > 0:
+            raise ValueError(f"Not enough stock on hand for {self.inventory_products[product_id].product_name}.")
+        return taken
+
+    def _movements(self, adjustments: list) -> list:
+        """
+        Resolves (product_id, warehouse, change[, reason]) adjustments into checked movements.
+        A warehouse of None receives into the product's first warehouse or removes from its fullest.
+        """
+        movements, pending = [], {}
+        for adjustment in adjustments:
+            product_id, warehouse, change = adjustment[0], adjustment[1], adjustment[2]
+            reason = adjustment[3] if len(adjustment) > 3 else "adjustment"
+            levels = self.inventory_levels.get(product_id)
+            if levels is None:
+                raise ValueError("Product not found.")
+            if not isinstance(change, int) or isinstance(change, bool):
+                raise ValueError("Stock change must be a whole number.")
+            if warehouse is None and change < 0:
+                taken = [(source, -units) for source, units in self._allocate(product_id, -change, pending)]
+            elif warehouse is None:
+                taken = [(next(iter(levels), DEFAULT_WAREHOUSE), change)]
+            elif not isinstance(warehouse, str) or not warehouse:
+                raise ValueError("Warehouse name is required.")
+            else:
+                taken = [(warehouse, change)]
+            for warehouse, units in taken:
+                key = (product_id, warehouse)
+                pending[key] = pending.get(key, 0) + units
+                if levels.get(warehouse, 0) + pending[key] < 0:
+                    raise ValueError(f"Not enough stock of {self.inventory_products[product_id].product_name} "
+                                     f"in {warehouse}.")
+                movements.append((product_id, warehouse, units, reason))
+        return movements
+
+    def _apply(self, movements: list) -> None:
+        """
+        Records checked movements in the levels, totals and log.
+        """
+        for product_id, warehouse, change, _ in movements:
+            levels = self.inventory_levels[product_id]
+            levels[warehouse] = levels.get(warehouse, 0) + change
+            self.inventory_on_hand[product_id] += change
+        self.inventory_log.extend(movements)
+
+    def adjust_many(self, adjustments: list) -> int:
+        """
+        Applies (product_id, warehouse, change[, reason]) adjustments to stock on hand and
+        to the sellable units, or none of them if any level or product would go negative.
+        Returns the number of movements logged.
+        """
+        with self.inventory_lock:
+            movements = self._movements(adjustments)
+            totals = {}
+            for product_id, _, change, _ in movements:
+                totals[product_id] = totals.get(product_id, 0) + change
+            self.inventory_engine.adjust_many(
+                [(self.inventory_products[product_id], change) for product_id, change in totals.items() if change])
+            self._apply(movements)
+            return len(movements)
+
+    def adjust(self, product_id: str, warehouse: str, change: int, reason: str = "adjustment") -> int:
+        """
+        Applies one stock adjustment; see adjust_many.
+        """
+        return self.adjust_many([(product_id, warehouse, change, reason)])
+
+    def transfer(self, product_id: str, source: str, destination: str, qty: int) -> None:
         """
-        Initializes an Inventory instance.
+        Moves qty units of a product between warehouses; the sellable units do not change.
         """
-        if quantity < 0:
-            raise ValueError("Quantity cannot be negative.")
-        self.product_id = product.product_id  # Associated product's ID
-        self.inventory_quantity = quantity 
+        if qty <= 0:
+            raise ValueError("Quantity must be greater than zero.")
+        if source == destination:
+            raise ValueError("Source and destination warehouses must differ.")
+        with self.inventory_lock:
+            self._apply(self._movements([(product_id, source, -qty, "transfer"),
+                                         (product_id, destination, qty, "transfer")]))
 
-    def check_availability(self) -> int:
+    def ship(self, lines: list) -> None:
         """
-        Checks the available stock quantity.
+        Takes the units of sold (Product, quantity) lines out of their products' fullest
+        warehouses. Their sellable units were already taken when the lines were reserved.
         """
-        return self.inventory_quantity
+        sold = {}
+        for product, qty in lines:
+            sold[product.product_id] = sold.get(product.product_id, 0) + qty
+        with self.inventory_lock:
+            movements = []
+            for product_id, qty in sold.items():
+                levels = self.inventory_levels.get(product_id)
+                if levels is None:
+                    continue
+                if len(levels) == 1:  # Most products sit in a single warehouse
+                    for warehouse, units in levels.items():
+                        if units < qty:
+                            raise ValueError(f"Not enough stock on hand for "
+                                             f"{self.inventory_products[product_id].product_name}.")
+                        movements.append((product_id, warehouse, -qty, "sale"))
+                else:
+                    movements.extend((product_id, warehouse, -units, "sale")
+                                     for warehouse, units in self._allocate(product_id, qty, {}))
+            self._apply(movements)
 
-    def update_quantity(self, qty: int) -> bool:
+    def compact(self) -> int:
         """
-        Updates the inventory quantity.
+        Replaces the movement log with one balance per non-empty level and returns the number of movements removed.
         """
-        if self.inventory_quantity + qty < 0:
-            raise ValueError("Inventory quantity cannot go negative.")
-        self.inventory_quantity += qty 
-        return True
+        with self.inventory_lock:
+            balances = [(product_id, warehouse, units, "balance")
+                        for product_id, levels in self.inventory_levels.items()
+                        for warehouse, units in levels.items() if units]
+            removed = len(self.inventory_log) - len(balances)
+            self.inventory_log = balances
+            self.inventory_compacted += max(removed, 0)
+            return removed
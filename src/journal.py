@@ -0,0 +1,517 @@
+import contextlib
+import datetime
+import json
+import os
+import threading
+from src.customer import Customer, IndividualCustomer, RetailCustomer
+from src.product import Product
+from src.productStore import ProductStore
+from src.inventory import DEFAULT_WAREHOUSE
+from src.order import Order
+from src.delivery import Delivery
+from src.coupon import Coupon
+
+CUSTOMER_TYPES = {"customer": Customer, "individual": IndividualCustomer, "retail": RetailCustomer}
+
+class Journal:
+    """
+    Append-only, write-ahead log of the mutating calls made on an EMarketSystem.
+
+    Each record is one JSON line {"seq": n, "op": name, "data": {...}} in journal.log,
+    and append returns only once its record has been written and fsynced. With group
+    commit, callers appending at the same time share fsync calls: whoever finds no
+    commit in progress leads one, writing every pending record with a single fsync,
+    while the others wait for a commit covering their record and lead the next one if
+    theirs arrived too late for it. Without group commit, each fsync covers one record.
+
+    A snapshot of the full state is written to snapshot.json every snapshot_every
+    records, after which the log is truncated, so replay never has to read more than
+    snapshot_every records.
+
+    Attributes:
+        journal_directory (str): Directory holding journal.log and snapshot.json.
+        journal_group_commit (bool): Whether concurrent appends share fsync calls.
+        journal_snapshot_every (int): Records between automatic snapshots; 0 disables them.
+        journal_sequence (int): Sequence number of the latest record.
+        journal_durable (int): Sequence number of the latest record written and fsynced.
+        journal_commits (int): Number of fsync calls made for records.
+    """
+
+    def __init__(self, directory: str, group_commit: bool = True, snapshot_every: int = 50000):
+        """
+        Opens or creates a journal in directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.journal_directory = directory
+        self.journal_path = os.path.join(directory, "journal.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_group_commit = group_commit
+        self.journal_snapshot_every = snapshot_every
+        self.journal_pending = []  # Encoded records not yet written, in sequence order
+        self.journal_committing = False  # True while a leader writes and fsyncs a batch
+        self.journal_condition = threading.Condition()  # Guards the sequence, pending records and commit state
+        self.journal_io_lock = threading.Lock()  # Serializes writes, fsyncs and truncation
+
+        snapshot_sequence = self._read_snapshot_sequence()
+        records = self._read_records()
+        self.journal_sequence = records[-1]["seq"] if records else snapshot_sequence
+        self.journal_durable = self.journal_sequence
+        self.journal_commits = 0
+        self.journal_since_snapshot = len(records)
+        self.journal_file = open(self.journal_path, "a", encoding="utf-8")
+
+    def _read_snapshot_sequence(self) -> int:
+        """
+        Returns the sequence number covered by the snapshot, or 0 without one.
+        """
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, "r", encoding="utf-8") as file:
+            return json.loads(file.readline())["seq"]
+
+    def _read_records(self) -> list:
+        """
+        Reads every complete record in the log, cutting off a record torn by a crash.
+        """
+        if not os.path.exists(self.journal_path):
+            return []
+        records = []
+        valid_end = 0
+        with open(self.journal_path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                valid_end += len(line)
+        if valid_end < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as file:
+                file.truncate(valid_end)
+        return records
+
+    def append(self, op: str, data: dict) -> int:
+        """
+        Records a mutating call and returns its sequence number once the record is durable.
+        """
+        with self.journal_condition:
+            self.journal_sequence += 1
+            sequence = self.journal_sequence
+            self.journal_pending.append(json.dumps({"seq": sequence, "op": op, "data": data}) + "\n")
+            self.journal_since_snapshot += 1
+        self.flush(sequence)
+        return sequence
+
+    def flush(self, sequence: int = None) -> None:
+        """
+        Returns once every record up to sequence, by default every record appended so far,
+        is written and fsynced, leading commits whenever none is in progress.
+        """
+        condition = self.journal_condition
+        with condition:
+            if sequence is None:
+                sequence = self.journal_sequence
+            while self.journal_durable < sequence:
+                if self.journal_committing:
+                    condition.wait()
+                    continue
+                count = len(self.journal_pending) if self.journal_group_commit else 1
+                batch = self.journal_pending[:count]
+                del self.journal_pending[:count]
+                self.journal_committing = True
+                written = False
+                condition.release()
+                try:
+                    with self.journal_io_lock:
+                        self.journal_file.write("".join(batch))
+                        self.journal_file.flush()
+                        os.fsync(self.journal_file.fileno())
+                    written = True
+                finally:
+                    condition.acquire()
+                    if written:
+                        self.journal_durable += len(batch)
+                        self.journal_commits += 1
+                    else:
+                        self.journal_pending[:0] = batch  # Left for the next leader
+                    self.journal_committing = False
+                    condition.notify_all()
+
+    def needs_snapshot(self) -> bool:
+        """
+        Returns True once snapshot_every records have been logged since the last snapshot.
+        """
+        return 0 < self.journal_snapshot_every <= self.journal_since_snapshot
+
+    def write_snapshot(self, state: dict) -> int:
+        """
+        Durably stores a full state snapshot and truncates the log it supersedes.
+        Returns the sequence number the snapshot covers.
+        """
+        self.flush()
+        with self.journal_io_lock:
+            sequence = self.journal_sequence
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                file.write(json.dumps({"seq": sequence}) + "\n")
+                json.dump(state, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.snapshot_path)
+
+            # Records up to `sequence` are now in the snapshot; replay skips any that survive a crash here
+            self.journal_file.close()
+            self.journal_file = open(self.journal_path, "w", encoding="utf-8")
+            self.journal_since_snapshot = 0
+        return sequence
+
+    def load(self) -> tuple:
+        """
+        Returns (snapshot_state, records) needed to rebuild the state: the latest snapshot
+        (or None) and the logged records that came after it, in order.
+        """
+        self.flush()
+        state, sequence = None, 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                sequence = json.loads(file.readline())["seq"]
+                state = json.loads(file.readline())
+        return state, [record for record in self._read_records() if record["seq"] > sequence]
+
+    def close(self) -> None:
+        """
+        Commits pending records and closes the log.
+        """
+        self.flush()
+        self.journal_file.close()
+
+class SnapshotGate:
+    """
+    Keeps snapshots apart from the mutating calls of a system.
+
+    Any number of mutating calls may run at once, but a snapshot waits until the calls
+    in flight have finished, and new calls wait while it is being taken, so it always
+    sees a state between calls. Calls are counted per thread, so a mutating call may
+    make other mutating calls.
+
+    Attributes:
+        gate_active (int): Number of threads inside a mutating call.
+        gate_snapshotting (bool): True while a snapshot holds the gate.
+    """
+
+    def __init__(self):
+        """
+        Initializes an open gate.
+        """
+        self.gate_active = 0
+        self.gate_snapshotting = False
+        self.gate_condition = threading.Condition()
+        self.gate_depth = threading.local()  # Nesting of mutating calls in the current thread
+
+    def depth(self) -> int:
+        """
+        Returns how many mutating calls the current thread is nested in.
+        """
+        return getattr(self.gate_depth, "value", 0)
+
+    @contextlib.contextmanager
+    def mutating(self):
+        """
+        Runs a mutating call, waiting for any snapshot being taken.
+        """
+        depth = self.depth()
+        if depth == 0:
+            with self.gate_condition:
+                while self.gate_snapshotting:
+                    self.gate_condition.wait()
+                self.gate_active += 1
+        self.gate_depth.value = depth + 1
+        try:
+            yield
+        finally:
+            self.gate_depth.value = depth
+            if depth == 0:
+                with self.gate_condition:
+                    self.gate_active -= 1
+                    if not self.gate_active:
+                        self.gate_condition.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """
+        Runs a snapshot once no mutating call is in flight, keeping new ones waiting.
+        """
+        if self.depth():
+            raise ValueError("A snapshot cannot be taken from inside a mutating call.")
+        with self.gate_condition:
+            while self.gate_snapshotting:
+                self.gate_condition.wait()
+            self.gate_snapshotting = True
+            while self.gate_active:
+                self.gate_condition.wait()
+        try:
+            yield
+        finally:
+            with self.gate_condition:
+                self.gate_snapshotting = False
+                self.gate_condition.notify_all()
+
+def customer_to_dict(customer: Customer) -> dict:
+    """
+    Returns the journal representation of a customer.
+    """
+    kind = "retail" if isinstance(customer, RetailCustomer) else \
+        "individual" if isinstance(customer, IndividualCustomer) else "customer"
+    data = {
+        "type": kind,
+        "user_id": customer.user_id,
+        "username": customer.username,
+        "email": customer.email,
+        "password_hash": customer.password_hash,
+        "name": customer.customer_name,
+        "customer_email": customer.customer_email,
+        "address": customer.customer_address,
+        "phone": customer.customer_phone,
+        "loyalty_points": customer.customer_loyalty_points,
+    }
+    if kind == "retail":
+        data["business_license"] = customer.customer_business_license
+    return data
+
+def customer_from_dict(data: dict) -> Customer:
+    """
+    Rebuilds a customer from its journal representation without rehashing its password.
+    """
+    customer = CUSTOMER_TYPES[data["type"]].__new__(CUSTOMER_TYPES[data["type"]])
+    customer.user_id = data["user_id"]
+    customer.username = data["username"]
+    customer.email = data["email"]
+    customer.password_hash = data["password_hash"]
+    customer.customer_name = data["name"]
+    customer.customer_email = data["customer_email"]
+    customer.customer_address = data["address"]
+    customer.customer_phone = data["phone"]
+    customer.customer_loyalty_points = data["loyalty_points"]
+    customer.customer_coupons = []
+    customer.customer_email_index = None
+    if "business_license" in data:
+        customer.customer_business_license = data["business_license"]
+    return customer
+
+def product_to_dict(product: Product, category_name: str = None) -> dict:
+    """
+    Returns the journal representation of a product.
+    """
+    data = {
+        "product_id": product.product_id,
+        "name": product.product_name,
+        "description": product.product_description,
+        "retail_price": product.product_retail_price,
+        "wholesale_price": product.product_wholesale_price,
+        "stock": product.product_stock,
+        "discount": product.product_discount_percent,
+    }
+    if category_name is not None:
+        data["category"] = category_name
+    return data
+
+def product_from_dict(data: dict) -> Product:
+    """
+    Rebuilds a detached product, keeping its recorded ID.
+    """
+    product = Product.__new__(Product)
+    product.product_id = data["product_id"]
+    product.product_name = data["name"]
+    product.product_description = data["description"]
+    product.product_store = ProductStore()
+    product.product_row = product.product_store.add_row(
+        data["retail_price"], data["wholesale_price"], data["stock"], data["discount"])
+    return product
+
+def coupon_to_dict(coupon: Coupon) -> dict:
+    """
+    Returns the journal representation of a coupon.
+    """
+    return {
+        "coupon_id": coupon.coupon_id,
+        "code": coupon.coupon_code,
+        "discount": coupon.coupon_discount,
+        "expiry_date": coupon.coupon_expiry_date.isoformat(),
+    }
+
+def coupon_from_dict(data: dict) -> Coupon:
+    """
+    Rebuilds a coupon, keeping its recorded ID.
+    """
+    coupon = Coupon(data["code"], data["discount"], datetime.date.fromisoformat(data["expiry_date"]))
+    coupon.coupon_id = data["coupon_id"]
+    return coupon
+
+def order_to_dict(order: Order, delivery: Delivery) -> dict:
+    """
+    Returns the journal representation of an order and its delivery.
+    """
+    return {
+        "order_id": order.order_id,
+        "customer_id": order.customer_id,
+        "items": [[product.product_id, qty] for product, qty in order.order_items],
+        "total_amount": order.order_total_amount,
+        "status": order.order_status,
+        "placed_at": order.order_placed_at.isoformat() if order.order_placed_at else None,
+        "coupon": coupon_to_dict(order.order_coupon) if order.order_coupon else None,
+        "delivery_id": delivery.delivery_id,
+        "delivery_status": delivery.delivery_status,
+    }
+
+def order_from_dict(system, data: dict) -> tuple:
+    """
+    Rebuilds an (Order, Delivery) pair against the system's products.
+    """
+    order = Order.__new__(Order)
+    order.order_id = data["order_id"]
+    order.customer_id = data["customer_id"]
+    order.order_items = [(system.products[product_id], qty) for product_id, qty in data["items"]]
+    order.order_total_amount = data["total_amount"]
+    order.order_status = data["status"]
+    order.order_placed_at = datetime.datetime.fromisoformat(data["placed_at"]) if data.get("placed_at") else None
+    order.order_index = None
+    order.order_coupon = coupon_from_dict(data["coupon"]) if data["coupon"] else None
+
+    delivery = Delivery(order.order_id)
+    delivery.delivery_id = data["delivery_id"]
+    delivery._apply_status(data["delivery_status"])
+    return order, delivery
+
+def export_state(system) -> dict:
+    """
+    Returns the full journaled state of a system as JSON-compatible data.
+    """
+    system.materialize_catalog()
+    return {
+        "customers": [customer_to_dict(c) for c in system.customers.values()],
+        "categories": [
+            {"category_id": cat.category_id, "name": cat.category_name,
+             "products": [product_to_dict(p) for p in cat.category_products]}
+            for cat in system.categories.values()
+        ],
+        "product_order": list(system.products),
+        "coupons": [coupon_to_dict(c) for c in system.coupons.values()],
+        "carts": [
+            {"customer_id": customer_id, "cart_id": cart.cart_id,
+             "items": [[product.product_id, qty] for product, qty in cart.items]}
+            for customer_id, cart in system.shopping_carts.items()
+        ],
+        "orders": [order_to_dict(order, system.deliveries[order_id]) for order_id, order in system.orders.items()],
+        "inventory": [[product_id, warehouse, units] for product_id, levels in system.inventory.inventory_levels.items()
+                      for warehouse, units in levels.items()] if system.inventory is not None else None,
+    }
+
+def import_state(system, state: dict) -> None:
+    """
+    Loads a snapshot produced by export_state into an empty system.
+    """
+    for data in state["customers"]:
+        system.register_customer(customer_from_dict(data))
+
+    # Restore products in their original insertion order, then fill each category's list
+    products = {}
+    for cat_data in state["categories"]:
+        for data in cat_data["products"]:
+            products.setdefault(data["product_id"], data)
+    # Stock on hand per warehouse; older snapshots had it all in one place, including units held in carts
+    levels = {}
+    if state.get("inventory") is not None:
+        for product_id, warehouse, units in state["inventory"]:
+            levels.setdefault(product_id, {})[warehouse] = units
+    else:
+        for product_id, data in products.items():
+            levels[product_id] = {DEFAULT_WAREHOUSE: data["stock"]}
+        for cart_data in state["carts"]:
+            for product_id, qty in cart_data["items"]:
+                levels[product_id][DEFAULT_WAREHOUSE] += qty
+
+    for product_id in state["product_order"]:
+        data = products[product_id]
+        product = product_from_dict(data)
+        system.products[product_id] = product
+        system.product_store.attach(product)
+        if system.inventory is not None:
+            system.inventory.track(product, levels.get(product_id))
+        system.search_index.add_product(product)
+    for cat_data in state["categories"]:
+        category = system._find_or_create_category(cat_data["name"], cat_data["category_id"])
+        for data in cat_data["products"]:
+            category.add_product(system.products[data["product_id"]])
+
+    system.coupons.add_many([coupon_from_dict(data) for data in state["coupons"]])
+
+    for cart_data in state["carts"]:
+        cart = system.shopping_carts[cart_data["customer_id"]]
+        cart.cart_id = cart_data["cart_id"]
+        for product_id, qty in cart_data["items"]:
+            # Snapshot stock already excludes these units, so only the hold is restored
+            product = system.products[product_id]
+            system.reservations.adopt(cart, product, qty)
+            cart._set_line(product, qty)
+
+    for data in state["orders"]:
+        system._store_order(*order_from_dict(system, data))
+    system.catalog_versions.invalidate()  # Products were restored without publishing them
+
+def _replay_checkout(system, data: dict) -> None:
+    """
+    Re-applies one logged checkout: stores the order and gives the customer the logged new cart.
+    """
+    order, delivery = order_from_dict(system, data)
+    cart = system.shopping_carts[order.customer_id]
+    if system.inventory is not None:
+        system.inventory.ship(order.order_items)
+    system.reservations.confirm(cart)
+    system._store_order(order, delivery)
+    system._reset_cart(order.customer_id).cart_id = data["cart_id"]
+
+def apply_record(system, op: str, data: dict) -> None:
+    """
+    Re-applies one journaled call to a system during replay.
+    """
+    if op == "register_customer":
+        system.register_customer(customer_from_dict(data))
+        system.shopping_carts[data["user_id"]].cart_id = data["cart_id"]
+    elif op == "add_products":
+        for product_data in data["products"]:
+            # Create the category first so it keeps its recorded ID
+            system._find_or_create_category(product_data["category"], product_data["category_id"])
+            product = system.products.get(product_data["product_id"]) or product_from_dict(product_data)
+            system.add_product(product, product_data["category"])
+    elif op == "open_catalog":
+        system.open_catalog(data["filename"])
+    elif op == "add_coupon":
+        system.add_coupon(coupon_from_dict(data))
+    elif op == "add_coupons":
+        system.add_coupons([coupon_from_dict(coupon) for coupon in data["coupons"]])
+    elif op == "add_to_cart":
+        system.add_to_cart(data["customer_id"], data["product_id"], data["quantity"])
+    elif op == "checkout_order":
+        _replay_checkout(system, data)
+    elif op == "checkout_orders":
+        for order_data in data["orders"]:
+            _replay_checkout(system, order_data)
+    elif op == "expire_reservations":
+        for customer_id, product_id, qty in data["holds"]:
+            cart = system.shopping_carts[customer_id]
+            product = system.products[product_id]
+            system.reservations.release(product, qty, cart)
+            cart.drop_line(product)
+    elif op == "adjust_stock":
+        system.adjust_stock(data["adjustments"])
+    elif op == "transfer_stock":
+        system.transfer_stock(data["product_id"], data["source"], data["destination"], data["quantity"])
+    elif op == "cancel_order":
+        system.cancel_order(data["order_id"])
+    elif op == "update_delivery_status":
+        system.update_delivery_status(data["order_id"], data["status"])
+    elif op == "update_delivery_statuses":
+        system.update_delivery_statuses(data["updates"])
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
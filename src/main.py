@@ -1,26 +1,26 @@
 import json
 import datetime
+import os
 from src.EMarketSystem import EMarketSystem
 from src.customer import Customer, IndividualCustomer, RetailCustomer
+from src.customerType import CustomerType
 from src.coupon import Coupon
-from src.product import Product
+from src.catalogLoader import load_products
+from src.journal import Journal
 from src.helperFunctions import is_valid_email, input_non_empty, input_int, input_float
 
+CATALOG_SNAPSHOT = "./src/products.emcat"  # Built with: python3 -m src.binaryCatalog src/products.json src/products.emcat
+SEARCH_PAGE_SIZE = 10  # Search results shown before asking to show more
+DATA_DIRECTORY = "./data"  # Journal and snapshots keeping the system's state across restarts
+
 def addBaseProducts(system: EMarketSystem, filename="./src/products.json"):
     """
-    Loads product data from a JSON file and adds them to the system.
+    Streams product data from a JSON array or JSON-lines file into the system.
     """
     try:
-        with open(filename, "r") as file:
-            products = json.load(file)  # Load JSON file
-        
-        for item in products:
-            try:
-                # Create a Product instance
-                product = Product(item["name"], item["description"], item["price"], item["cost"], item["stock"])
-                system.add_product(product, item["category"])
-            except ValueError as ve:
-                print(f"Error adding product {item['name']}: {ve}")
+        _, errors = load_products(system, filename)
+        for _, name, error in errors:
+            print(f"Error adding product {name}: {error}")
 
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print("Error loading product file:", e)
@@ -35,14 +35,27 @@ def addAdminUser(system: EMarketSystem):
     except ValueError as ve:
         print("Error registering admin:", ve)
 
+def openSystem(directory: str = DATA_DIRECTORY) -> EMarketSystem:
+    """
+    Recovers the system from the journal in directory. On the first start the base
+    catalog and the admin user are added, and journaled like any other change.
+    """
+    system = EMarketSystem.recover(Journal(directory))
+    if not system.products:
+        if os.path.exists(CATALOG_SNAPSHOT):
+            system.open_catalog(CATALOG_SNAPSHOT)
+        else:
+            addBaseProducts(system)
+    if "admin" not in system.usernames:
+        addAdminUser(system)
+    return system
+
 def main():
     """
     Entry point for the E-Market System. Handles user registration, login, 
     product searches, cart operations, checkout, order tracking, and admin functions.
     """
-    system = EMarketSystem()
-    addBaseProducts(system)
-    addAdminUser(system)
+    system = openSystem()
     
     current_user = None  # Holds the logged-in user
     
@@ -71,12 +84,12 @@ def main():
                         phone = input_non_empty("Phone: ")
                         cust_type = input_non_empty("Customer Type (individual/retail): ").lower()
 
-                        if cust_type not in ["individual", "retail"]:
+                        if cust_type not in list(CustomerType):
                             print("Invalid customer type. Please enter 'individual' or 'retail'.")
                             continue
 
                         # Create customer instance based on type
-                        if cust_type == "individual":
+                        if cust_type == CustomerType.INDIVIDUAL:
                             customer = IndividualCustomer(username, password, email, name, address, phone)
                         else:
                             business_license = input_non_empty("Business License Number: ")
@@ -103,6 +116,7 @@ def main():
                     print("Login error:", ve)
 
             elif choice == "3":
+                system.journal.close()
                 print("Exiting system. Goodbye!")
                 break
 
@@ -132,12 +146,18 @@ def main():
             if choice == "1":
                 # Product search by name
                 query = input_non_empty("Enter product name to search: ")
-                results = system.search_products(query)
+                results, cursor = system.search_products_page(query, SEARCH_PAGE_SIZE)
                 if results:
                     print("\n--- Search Results ---")
-                    for p in results:
-                        print(p.get_details())
-                        print("-" * 40)
+                    while True:
+                        for p in results:
+                            print(p.get_details())
+                            print("-" * 40)
+                        if cursor is None or input("Show more results? (y/n): ").strip().lower() != "y":
+                            break
+                        results, cursor = system.search_products_page(query, SEARCH_PAGE_SIZE, cursor)
+                        if not results:
+                            break
                 else:
                     print("No products found.")
 
@@ -163,7 +183,7 @@ def main():
             elif choice == "3":
                 # Add product to cart
                 print("\n--- Available Products ---")
-                for p in system.products.values():
+                for p in system.catalog_snapshot().products():
                     print(p.get_details())
                     print("-" * 40)
 
@@ -241,7 +261,7 @@ def main():
                 if order_id in system.deliveries:
                     new_status = input_non_empty("Enter new delivery status: ")
                     try:
-                        system.deliveries[order_id].update_status(new_status)
+                        system.update_delivery_status(order_id, new_status)
                         print("Delivery status updated.")
                     except ValueError as ve:
                         print("Error updating delivery status:", ve)
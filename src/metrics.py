@@ -0,0 +1,250 @@
+import functools
+import inspect
+import threading
+import time
+
+BUCKET_COUNT = 24               # Finite latency buckets; one more counts everything slower
+BUCKET_BASE_NS = 1024           # Upper bound of the first bucket, about 1 microsecond
+MAX_ERROR_MESSAGES = 100        # Distinct error messages kept per method before they are pooled
+OTHER_ERRORS = "other"          # Label of the pooled error messages
+
+class MethodStats:
+    """
+    Represents the call statistics of one instrumented method.
+
+    Latencies go into log-scaled buckets: bucket i counts calls that took less than
+    1024 * 2**i nanoseconds, so the bucket index is a single bit_length() call.
+    Each thread counts into its own cells, so recording a call takes no lock; the
+    cells of all threads are summed when a snapshot is taken.
+
+    Attributes:
+        stats_cells (list): Per-thread [calls, total_ns, bucket counts...] lists.
+        stats_errors (dict): Maps exception message to the number of calls that raised it.
+    """
+
+    __slots__ = ("stats_local", "stats_cells", "stats_errors", "stats_lock")
+
+    def __init__(self):
+        """
+        Initializes empty statistics.
+        """
+        self.stats_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears all counts. Threads start counting into fresh cells on their next call.
+        """
+        with self.stats_lock:
+            self.stats_local = threading.local()
+            self.stats_cells = []
+            self.stats_errors = {}
+
+    def _thread_cells(self) -> list:
+        """
+        Creates and registers the calling thread's cells.
+        """
+        cells = [0] * (BUCKET_COUNT + 3)
+        with self.stats_lock:
+            self.stats_cells.append(cells)
+        self.stats_local.cells = cells
+        return cells
+
+    def record(self, elapsed_ns: int) -> None:
+        """
+        Counts one call that took elapsed_ns nanoseconds.
+        """
+        try:
+            cells = self.stats_local.cells
+        except AttributeError:
+            cells = self._thread_cells()
+        bucket = (elapsed_ns >> 10).bit_length()  # elapsed_ns // BUCKET_BASE_NS
+        cells[0] += 1
+        cells[1] += elapsed_ns
+        cells[2 + (bucket if bucket < BUCKET_COUNT else BUCKET_COUNT)] += 1
+
+    def record_error(self, error: Exception) -> None:
+        """
+        Counts a call that raised error, by its message.
+        """
+        message = str(error) or type(error).__name__
+        with self.stats_lock:
+            if message not in self.stats_errors and len(self.stats_errors) >= MAX_ERROR_MESSAGES:
+                message = OTHER_ERRORS  # Messages naming products or users could grow without bound
+            self.stats_errors[message] = self.stats_errors.get(message, 0) + 1
+
+    def snapshot(self) -> tuple:
+        """
+        Returns (calls, errors, buckets, total_ns) summed over all threads.
+        """
+        with self.stats_lock:
+            totals = [sum(column) for column in zip(*self.stats_cells)] or [0] * (BUCKET_COUNT + 3)
+            return totals[0], dict(self.stats_errors), totals[2:], totals[1]
+
+class MetricsRegistry:
+    """
+    Records call counts, error counts and latency histograms of instrumented methods.
+
+    Instrumenting a class replaces its methods with timing wrappers, so every instance,
+    including ones created internally, is measured; uninstrument restores them.
+
+    Attributes:
+        registry_prefix (str): Prefix of every exported metric name.
+        registry_stats (dict): Maps "Class.method" to its MethodStats.
+        registry_originals (list): (class, name, original attribute) for every wrapped method.
+    """
+
+    def __init__(self, prefix: str = "emarket"):
+        """
+        Initializes an empty registry.
+        """
+        self.registry_prefix = prefix
+        self.registry_stats = {}
+        self.registry_originals = []
+        self.registry_lock = threading.Lock()
+
+    def stats(self, name: str) -> MethodStats:
+        """
+        Returns the statistics recorded under name, creating them if needed.
+        """
+        with self.registry_lock:
+            stats = self.registry_stats.get(name)
+            if stats is None:
+                stats = self.registry_stats[name] = MethodStats()
+            return stats
+
+    def wrap(self, name: str, func):
+        """
+        Returns func wrapped to record its calls under name.
+        """
+        stats = self.stats(name)
+        record, record_error = stats.record, stats.record_error
+        clock = time.perf_counter_ns
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed(*args, **kwargs):
+                start = clock()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    record_error(e)
+                    raise
+                finally:
+                    record(clock() - start)
+        else:
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                start = clock()
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    record_error(e)
+                    raise
+                finally:
+                    # MethodStats.record, inlined to save a call on every instrumented call
+                    elapsed = clock() - start
+                    try:
+                        cells = stats.stats_local.cells
+                    except AttributeError:
+                        cells = stats._thread_cells()
+                    bucket = (elapsed >> 10).bit_length()
+                    cells[0] += 1
+                    cells[1] += elapsed
+                    cells[2 + (bucket if bucket < BUCKET_COUNT else BUCKET_COUNT)] += 1
+        timed.metrics_wrapped = func
+        return timed
+
+    def instrument(self, cls: type, names: list = None) -> list:
+        """
+        Wraps the given methods of cls, or all of its public methods if names is None.
+        Returns the names that were wrapped; methods that are already wrapped are skipped.
+        """
+        if names is None:
+            names = [name for name, value in vars(cls).items()
+                     if not name.startswith("_") and inspect.isfunction(value)]
+        wrapped = []
+        for name in names:
+            func = vars(cls).get(name)
+            if not inspect.isfunction(func):
+                raise ValueError(f"{cls.__name__}.{name} is not a method.")
+            if hasattr(func, "metrics_wrapped"):
+                continue
+            self.registry_originals.append((cls, name, func))
+            setattr(cls, name, self.wrap(f"{cls.__name__}.{name}", func))
+            wrapped.append(name)
+        return wrapped
+
+    def uninstrument(self) -> None:
+        """
+        Restores every method wrapped by this registry.
+        """
+        while self.registry_originals:
+            cls, name, func = self.registry_originals.pop()
+            setattr(cls, name, func)
+
+    def reset(self) -> None:
+        """
+        Clears every recorded count while keeping the instrumentation in place.
+        """
+        with self.registry_lock:
+            stats = list(self.registry_stats.values())
+        for method_stats in stats:
+            method_stats.reset()
+
+    def export(self) -> str:
+        """
+        Returns a snapshot of all metrics in the Prometheus text exposition format.
+        """
+        with self.registry_lock:
+            items = sorted(self.registry_stats.items())
+        snapshots = [(_escape(name), stats.snapshot()) for name, stats in items]
+        prefix = self.registry_prefix
+        bounds = [_format_seconds(BUCKET_BASE_NS * 2 ** i) for i in range(BUCKET_COUNT)] + ["+Inf"]
+
+        lines = [f"# HELP {prefix}_calls_total Calls of each instrumented method.",
+                 f"# TYPE {prefix}_calls_total counter"]
+        for name, (calls, _, _, _) in snapshots:
+            lines.append(f'{prefix}_calls_total{{method="{name}"}} {calls}')
+
+        lines += [f"# HELP {prefix}_errors_total Calls that raised, by exception message.",
+                  f"# TYPE {prefix}_errors_total counter"]
+        for name, (_, errors, _, _) in snapshots:
+            for message, count in sorted(errors.items()):
+                lines.append(f'{prefix}_errors_total{{method="{name}",message="{_escape(message)}"}} {count}')
+
+        lines += [f"# HELP {prefix}_call_duration_seconds Latency of each instrumented method.",
+                  f"# TYPE {prefix}_call_duration_seconds histogram"]
+        for name, (calls, _, buckets, total_ns) in snapshots:
+            cumulative = 0
+            for bound, count in zip(bounds, buckets):
+                cumulative += count
+                lines.append(f'{prefix}_call_duration_seconds_bucket{{method="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{method="{name}"}} {total_ns / 1e9!r}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{method="{name}"}} {calls}')
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    """
+    Escapes a Prometheus label value.
+    """
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_seconds(nanoseconds: int) -> str:
+    """
+    Formats a bucket bound given in nanoseconds as seconds.
+    """
+    return repr(nanoseconds / 1e9)
+
+def instrument_system(registry: MetricsRegistry) -> MetricsRegistry:
+    """
+    Instruments the public EMarketSystem methods, Order.place_order and ShoppingCart.add_item.
+    """
+    from src.EMarketSystem import EMarketSystem
+    from src.order import Order
+    from src.shoppingCart import ShoppingCart
+
+    registry.instrument(EMarketSystem)
+    registry.instrument(Order, ["place_order"])
+    registry.instrument(ShoppingCart, ["add_item"])
+    return registry
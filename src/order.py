@@ -1,4 +1,7 @@
-import uuid
+import datetime
+import operator
+from src.customerType import CustomerType
+from src.idGenerator import new_id
 
 class Order:
     """
@@ -11,50 +14,72 @@ class Order:
         order_total_amount (float): Total price of the order after applying discounts.
         order_status (str): Current status of the order (e.g., Pending, Placed, Cancelled).
         order_coupon (Coupon or None): Applied coupon for the order.
+        order_placed_at (datetime or None): When the order was placed.
+        order_index (OrderIndex or None): Index to notify when the status changes.
     """
 
-    def __init__(self, customer_id: str, items: list):
+    def __init__(self, customer_id: str, items: list, order_id: str = None):
         """
-        Initializes an Order instance.
+        Initializes an Order instance. A new unique ID is generated unless order_id is given.
         """
         if not items:
             raise ValueError("Order must contain at least one item.")
         
-        self.order_id = uuid.uuid4().hex    # Generate a unique order ID
+        self.order_id = order_id or new_id()    # Generate a unique order ID
         self.customer_id = customer_id      # Store the customer's ID
         self.order_items = items            # List of (Product, quantity) tuples
         self.order_total_amount = 0.0       
         self.order_status = "Pending"       
         self.order_coupon = None            
+        self.order_placed_at = None
+        self.order_index = None
 
-    def place_order(self, customer_type: str) -> bool:
+    def place_order(self, customer_type: CustomerType) -> bool:
         """
         Places the order and calculates the total amount.
         """
         if not self.order_items:
             raise ValueError("Order is empty.")
-        
+        return self.place_with_prices([product.get_price(customer_type) for product, _ in self.order_items],
+                                      datetime.datetime.now())
+
+    def place_with_prices(self, unit_prices: list, now: datetime.datetime) -> bool:
+        """
+        Places the order at the given unit prices, one per item, applying the coupon if any.
+        """
         # Calculate total order amount based on product prices and quantities
-        self.order_total_amount = sum(
-            product.get_price(customer_type) * qty
-            for product, qty in self.order_items
-        )
+        return self.place_at_subtotal(sum(map(operator.mul, unit_prices, [qty for _, qty in self.order_items])), now)
+
+    def place_at_subtotal(self, subtotal: float, now: datetime.datetime) -> bool:
+        """
+        Places the order for its items' undiscounted subtotal, applying the coupon if any.
+        """
+        self.order_total_amount = subtotal
 
         # Apply coupon discount if available
         if self.order_coupon:
             discount_amount = self.order_total_amount * (self.order_coupon.coupon_discount / 100)
             self.order_total_amount -= discount_amount
         
-        self.order_status = "Placed" 
+        self.order_placed_at = now
+        self._set_status("Placed")
         return True
 
     def cancel_order(self) -> bool:
         """
         Cancels the order.
         """
-        self.order_status = "Cancelled"
+        self._set_status("Cancelled")
         return True
 
+    def _set_status(self, status: str) -> None:
+        """
+        Changes the status, keeping the order index in sync.
+        """
+        old_status, self.order_status = self.order_status, status
+        if self.order_index is not None:
+            self.order_index.status_changed(self, old_status)
+
     def get_order_status(self) -> str:
         """
         Retrieves the current order status.
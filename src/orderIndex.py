@@ -0,0 +1,141 @@
+import bisect
+import threading
+from array import array
+from src.order import Order
+
+class OrderIndex:
+    """
+    Maintains secondary indexes over placed orders by customer, status and placement time.
+
+    Every stored order gets an ordinal in placement order. Each customer and each status
+    keeps a sorted array of ordinals, and placement times are kept in ordinal order, so
+    a query starts from the shortest matching array, skips straight to its cursor or
+    start time with a binary search and reads only as many orders as it returns.
+    Orders report status changes back to the index, which moves their ordinal between
+    status arrays.
+
+    Attributes:
+        index_orders (list): Orders by ordinal, in placement order.
+        index_times (array): Placement timestamp by ordinal, never decreasing.
+        index_ordinals (dict): Maps order_id to its ordinal.
+        index_by_customer (dict): Maps customer_id to a sorted array of ordinals.
+        index_by_status (dict): Maps status to a sorted array of ordinals.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty indexes.
+        """
+        self.index_orders = []
+        self.index_times = array("d")
+        self.index_ordinals = {}
+        self.index_by_customer = {}
+        self.index_by_status = {}
+        self.index_lock = threading.Lock()  # Serializes writers, such as checkouts from several threads
+
+    def __len__(self) -> int:
+        return len(self.index_orders)
+
+    def add(self, order: Order) -> int:
+        """
+        Indexes a placed order and returns its ordinal. The order reports later status changes.
+        """
+        with self.index_lock:
+            if order.order_id in self.index_ordinals:
+                raise ValueError("Order is already indexed.")
+            ordinal = len(self.index_orders)
+            placed = order.order_placed_at.timestamp() if order.order_placed_at else 0.0
+            if self.index_times and placed < self.index_times[-1]:
+                placed = self.index_times[-1]  # Keep times sorted even if the wall clock stepped back
+            self.index_orders.append(order)
+            self.index_times.append(placed)
+            self.index_ordinals[order.order_id] = ordinal
+            self.index_by_customer.setdefault(order.customer_id, array("q")).append(ordinal)
+            self.index_by_status.setdefault(order.order_status, array("q")).append(ordinal)
+            order.order_index = self
+            return ordinal
+
+    def add_many(self, orders: list) -> None:
+        """
+        Indexes many placed orders at once, converting each distinct placement time only once.
+        """
+        with self.index_lock:
+            ordinals = self.index_ordinals
+            by_customer, by_status = self.index_by_customer, self.index_by_status
+            index_orders, times = self.index_orders, self.index_times
+            last_time = times[-1] if times else 0.0
+            last_placed, placed = None, 0.0
+            for order in orders:
+                if order.order_id in ordinals:
+                    raise ValueError("Order is already indexed.")
+                if order.order_placed_at is not last_placed:
+                    last_placed = order.order_placed_at
+                    placed = last_placed.timestamp() if last_placed else 0.0
+                if placed < last_time:
+                    placed = last_time  # Keep times sorted even if the wall clock stepped back
+                last_time = placed
+                ordinal = len(index_orders)
+                index_orders.append(order)
+                times.append(placed)
+                ordinals[order.order_id] = ordinal
+                customer_ordinals = by_customer.get(order.customer_id)
+                if customer_ordinals is None:
+                    customer_ordinals = by_customer[order.customer_id] = array("q")
+                customer_ordinals.append(ordinal)
+                status_ordinals = by_status.get(order.order_status)
+                if status_ordinals is None:
+                    status_ordinals = by_status[order.order_status] = array("q")
+                status_ordinals.append(ordinal)
+                order.order_index = self
+
+    def status_changed(self, order: Order, old_status: str) -> None:
+        """
+        Moves an indexed order from its old status to its current one.
+        """
+        with self.index_lock:
+            ordinal = self.index_ordinals.get(order.order_id)
+            if ordinal is None or old_status == order.order_status:
+                return
+            ordinals = self.index_by_status[old_status]
+            del ordinals[bisect.bisect_left(ordinals, ordinal)]
+            bisect.insort(self.index_by_status.setdefault(order.order_status, array("q")), ordinal)
+
+    def query(self, customer_id: str = None, status: str = None, since=None,
+              limit: int = 50, cursor: int = None) -> tuple:
+        """
+        Returns (orders, next_cursor) for up to limit orders in placement order that match
+        every given filter: customer_id, status and placement at or after since.
+
+        Pass next_cursor back to get the following page; it is None once no orders are left.
+        """
+        if limit <= 0:
+            raise ValueError("Limit must be greater than zero.")
+        start = 0 if cursor is None else cursor + 1
+        if since is not None:
+            start = max(start, bisect.bisect_left(self.index_times, since.timestamp()))
+
+        candidates = None  # None means every ordinal
+        for key, index in ((customer_id, self.index_by_customer), (status, self.index_by_status)):
+            if key is not None:
+                ordinals = index.get(key, ())
+                if candidates is None or len(ordinals) < len(candidates):
+                    candidates = ordinals
+
+        if candidates is None:
+            positions = range(start, len(self.index_orders))
+        else:
+            positions = (candidates[i] for i in range(bisect.bisect_left(candidates, start), len(candidates)))
+
+        # Look one match past the page so a full last page does not hand out a cursor
+        orders, last = [], None
+        for ordinal in positions:
+            order = self.index_orders[ordinal]
+            if customer_id is not None and order.customer_id != customer_id:
+                continue
+            if status is not None and order.order_status != status:
+                continue
+            if len(orders) == limit:
+                return orders, last
+            orders.append(order)
+            last = ordinal
+        return orders, None
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PasswordHasher:
+    """
+    Runs slow password hashing off the event loop on a bounded pool of threads.
+
+    hashlib's PBKDF2 releases the GIL while it works, so threads hash in parallel.
+    At most max_pending jobs may be queued or running; beyond that, new jobs are
+    refused instead of piling up behind the pool.
+
+    Attributes:
+        hasher_executor (ThreadPoolExecutor): Pool the hashing jobs run on.
+        hasher_max_pending (int): Maximum number of queued or running jobs.
+        hasher_pending (int): Number of jobs currently queued or running.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = 1024):
+        """
+        Initializes the pool; max_workers defaults to the number of CPUs.
+        """
+        if max_pending <= 0:
+            raise ValueError("Maximum pending jobs must be greater than zero.")
+        self.hasher_executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                                                  thread_name_prefix="password-hasher")
+        self.hasher_max_pending = max_pending
+        self.hasher_pending = 0
+        self.hasher_lock = threading.Lock()
+
+    async def run(self, func, *args):
+        """
+        Runs func(*args) on the pool and waits for its result without blocking the event loop.
+        """
+        with self.hasher_lock:
+            if self.hasher_pending >= self.hasher_max_pending:
+                raise ValueError("Too many authentication requests in progress. Please try again.")
+            self.hasher_pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.hasher_executor, func, *args)
+        finally:
+            with self.hasher_lock:
+                self.hasher_pending -= 1
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker threads once queued jobs finish.
+        """
+        self.hasher_executor.shutdown(wait=True)
@@ -1,4 +1,6 @@
-import uuid
+from src.productStore import ProductStore
+from src.customerType import CustomerType
+from src.idGenerator import new_id
 
 class Product:
     """
@@ -12,8 +14,17 @@ class Product:
         product_wholesale_price (float): Wholesale price per unit.
         product_stock (int): Number of units available in stock.
         product_discount_percent (int): Percentage discount applied (0-100%).
+        product_store (ProductStore): Columnar store holding the numeric fields above.
+        product_row (int): Row of this product in product_store.
+
+    The numeric attributes are properties that read and write the product's row, so
+    a system can keep all of them in one shared ProductStore. product_stock is read-only:
+    stock changes through update_stock, which goes through the stock ledger if any. A product created on
+    its own gets a private single-row store until it is attached to a shared one.
     """
 
+    __slots__ = ("product_id", "product_name", "product_description", "product_store", "product_row")
+
     def __init__(self, name: str, description: str, retail_price: float, wholesale_price: float, stock: int):
         """
         Initializes a Product instance.
@@ -27,13 +38,58 @@ class Product:
         if stock < 0:
             raise ValueError("Stock cannot be negative.")
 
-        self.product_id = uuid.uuid4().hex  # Generate a unique product ID
+        self.product_id = new_id()  # Generate a unique product ID
         self.product_name = name
         self.product_description = description
-        self.product_retail_price = retail_price
-        self.product_wholesale_price = wholesale_price
-        self.product_stock = stock
-        self.product_discount_percent = 0  # Default: No discount
+        self.product_store = ProductStore()
+        self.product_row = self.product_store.add_row(retail_price, wholesale_price, stock)  # Default: No discount
+
+    @property
+    def product_retail_price(self) -> float:
+        return self.product_store.store_retail_prices[self.product_row]
+
+    @product_retail_price.setter
+    def product_retail_price(self, value: float) -> None:
+        self.product_store.store_retail_prices[self.product_row] = value
+        self._prices_changed()
+
+    @property
+    def product_wholesale_price(self) -> float:
+        return self.product_store.store_wholesale_prices[self.product_row]
+
+    @product_wholesale_price.setter
+    def product_wholesale_price(self, value: float) -> None:
+        self.product_store.store_wholesale_prices[self.product_row] = value
+        self._prices_changed()
+
+    @property
+    def product_stock(self) -> int:
+        return self.product_store.store_stock[self.product_row]
+
+    def _change_stock(self, change: int) -> None:
+        """
+        Adds a signed change to the stock column. Only update_stock and a ReservationEngine,
+        holding the product's stripe lock, call this; everything else goes through them.
+        """
+        self.product_store.store_stock[self.product_row] += change
+
+    @property
+    def product_discount_percent(self) -> float:
+        return self.product_store.store_discounts[self.product_row]
+
+    @product_discount_percent.setter
+    def product_discount_percent(self, value: float) -> None:
+        self.product_store.store_discounts[self.product_row] = value
+        self._prices_changed()
+
+    def _prices_changed(self) -> None:
+        """
+        Recomputes this product's price tables and tells the store's listeners, such as a
+        price index, that its prices changed.
+        """
+        self.product_store.reprice_row(self.product_row)
+        for listener in self.product_store.store_listeners:
+            listener(self.product_row)
 
     def get_details(self) -> str:
         """
@@ -46,17 +102,22 @@ class Product:
             f"Retail Price: ${self.product_retail_price:.2f}\n"
             f"Wholesale Price: ${self.product_wholesale_price:.2f}\n"
             f"Stock: {self.product_stock}\n"
-            f"Discount: {self.product_discount_percent}%"
+            f"Discount: {self.product_discount_percent:g}%"
         )
 
-    def update_stock(self, qty: int) -> bool:
+    def update_stock(self, qty: int, warehouse: str = None) -> bool:
         """
-        Updates the stock quantity.
+        Updates the stock quantity. A product in a system's stock ledger is adjusted
+        there, in the given warehouse or, by default, its first or fullest ones.
         """
+        inventory = self.product_store.store_inventory
+        if inventory is not None and self.product_id in inventory:
+            inventory.adjust(self.product_id, warehouse, qty)
+            return True
         if self.product_stock + qty < 0:
             raise ValueError("Stock cannot go negative.")
         
-        self.product_stock += qty
+        self._change_stock(qty)
         return True
 
     def set_discount(self, pct: int) -> None:
@@ -68,9 +129,8 @@ class Product:
         
         self.product_discount_percent = pct
 
-    def get_price(self, customer_type: str) -> float:
+    def get_price(self, customer_type: CustomerType) -> float:
         """
-        Returns the price after applying any discount.
+        Returns the price after applying any discount, from the store's price tables.
         """
-        base_price = self.product_wholesale_price if customer_type == "retail" else self.product_retail_price
-        return round(base_price * (1 - self.product_discount_percent / 100), 2)
+        return self.product_store.price_row(self.product_row, customer_type)
@@ -0,0 +1,189 @@
+import threading
+import weakref
+from array import array
+from src.customerType import CustomerType
+
+class ProductStore:
+    """
+    Columnar storage for the numeric fields of many products.
+
+    Each product occupies one row, and its prices, stock and discount live in
+    typed arrays instead of per-object attributes. Product instances act as views
+    onto their row, so the store can price many products in a single pass.
+
+    The discounted unit price each customer type pays is kept in a price table per
+    type, so pricing is an array read. A row's tables are recomputed whenever its
+    prices or discount change through its Product, which calls reprice_row. Shopping
+    carts register the lines they hold per row, and reprice_row moves the running totals
+    of exactly those carts to the new prices.
+
+    Attributes:
+        store_retail_prices (array): Retail price per row.
+        store_wholesale_prices (array): Wholesale price per row.
+        store_stock (array): Units in stock per row.
+        store_discounts (array): Discount percentage per row.
+        store_price_tables (dict): Maps CustomerType to an array of discounted unit prices per row.
+        store_row_carts (dict): Maps a row to {id(cart): (weak reference to the cart, line)} for
+            the carts holding its product. Carts remove their lines when they are cleared or
+            checked out, and entries of carts dropped otherwise are pruned on repricing.
+        store_listeners (list): Callables called with a row whose price or discount was changed
+            through its Product, such as price indexes.
+        store_inventory (Inventory or None): Stock ledger that Product.update_stock goes through
+            for products it tracks.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty product store.
+        """
+        self.store_retail_prices = array("d")
+        self.store_wholesale_prices = array("d")
+        self.store_stock = array("q")
+        self.store_discounts = array("d")
+        self.store_price_tables = {CustomerType.INDIVIDUAL: array("d"), CustomerType.RETAIL: array("d")}
+        self.store_row_carts = {}
+        self.store_carts_lock = threading.Lock()  # Guards store_row_carts
+        self.store_listeners = []
+        self.store_inventory = None
+
+    def __len__(self) -> int:
+        return len(self.store_stock)
+
+    def add_row(self, retail_price: float, wholesale_price: float, stock: int, discount: float = 0) -> int:
+        """
+        Appends a row of values and returns its row number.
+        """
+        self.store_retail_prices.append(retail_price)
+        self.store_wholesale_prices.append(wholesale_price)
+        self.store_stock.append(stock)
+        self.store_discounts.append(discount)
+        self.store_price_tables[CustomerType.INDIVIDUAL].append(round(retail_price * (1 - discount / 100), 2))
+        self.store_price_tables[CustomerType.RETAIL].append(round(wholesale_price * (1 - discount / 100), 2))
+        return len(self.store_stock) - 1
+
+    def reprice_row(self, row: int) -> None:
+        """
+        Recomputes a row's price tables after its prices or discount changed, and reprices
+        the cart lines holding it.
+        """
+        tables = self.store_price_tables
+        individual, retail = tables[CustomerType.INDIVIDUAL], tables[CustomerType.RETAIL]
+        old_prices = (individual[row], retail[row])
+        factor = 1 - self.store_discounts[row] / 100
+        individual[row] = round(self.store_retail_prices[row] * factor, 2)
+        retail[row] = round(self.store_wholesale_prices[row] * factor, 2)
+        with self.store_carts_lock:
+            carts = self.store_row_carts.get(row)
+            if not carts:
+                return
+            holders = []
+            for key, (reference, line) in list(carts.items()):
+                cart = reference()
+                if cart is None:
+                    del carts[key]
+                else:
+                    holders.append((cart, line))
+            if not carts:
+                del self.store_row_carts[row]
+        for cart, line in holders:
+            cart._line_repriced(line, *old_prices)
+
+    def add_cart_line(self, row: int, cart, line: list) -> None:
+        """
+        Registers a cart's [Product, quantity] line for a row, to be repriced with it.
+        """
+        with self.store_carts_lock:
+            self.store_row_carts.setdefault(row, {})[id(cart)] = (weakref.ref(cart), line)
+
+    def remove_cart_line(self, row: int, cart) -> None:
+        """
+        Stops repricing a cart's line for a row.
+        """
+        with self.store_carts_lock:
+            carts = self.store_row_carts.get(row)
+            if carts is not None:
+                carts.pop(id(cart), None)
+                if not carts:
+                    del self.store_row_carts[row]
+
+    def remove_carts(self, carts: list) -> None:
+        """
+        Stops repricing every line of many carts under one acquisition of the lock.
+        Lines of products kept in another store are removed from that store.
+        """
+        row_carts, elsewhere = self.store_row_carts, []
+        with self.store_carts_lock:
+            for cart in carts:
+                key = id(cart)
+                for line in cart.cart_lines.values():
+                    product = line[0]
+                    if product.product_store is not self:
+                        elsewhere.append((product, cart))
+                        continue
+                    holders = row_carts.get(product.product_row)
+                    if holders is not None:
+                        holders.pop(key, None)
+                        if not holders:
+                            del row_carts[product.product_row]
+        for product, cart in elsewhere:
+            product.product_store.remove_cart_line(product.product_row, cart)
+
+    def price_table(self, customer_type: CustomerType):
+        """
+        Returns the array of discounted unit prices per row for a customer type.
+        Anything other than retail is priced as individual.
+        """
+        tables = self.store_price_tables
+        return tables[CustomerType.RETAIL] if customer_type == CustomerType.RETAIL else tables[CustomerType.INDIVIDUAL]
+
+    def attach(self, product) -> int:
+        """
+        Moves a product's values into this store and makes the product a view onto them.
+        A product that is already stored here keeps its row.
+        """
+        if product.product_store is self:
+            return product.product_row
+
+        source, source_row = product.product_store, product.product_row
+        row = self.add_row(
+            source.store_retail_prices[source_row],
+            source.store_wholesale_prices[source_row],
+            source.store_stock[source_row],
+            source.store_discounts[source_row],
+        )
+        with source.store_carts_lock:
+            carts = source.store_row_carts.pop(source_row, None)
+        if carts:
+            with self.store_carts_lock:
+                self.store_row_carts[row] = carts  # Cart lines follow the product to its new row
+        product.product_store, product.product_row = self, row
+        return row
+
+    def share_stock(self, column) -> None:
+        """
+        Replaces the stock column with an externally owned one holding the same values,
+        such as a shared-memory array read and written by several processes.
+        No rows can be added afterwards.
+        """
+        if len(column) != len(self.store_stock):
+            raise ValueError("Shared stock column must have one entry per row.")
+        self.store_stock = column
+
+    def price_row(self, row: int, customer_type: CustomerType) -> float:
+        """
+        Returns the discounted unit price of a single row.
+        """
+        return self.price_table(customer_type)[row]
+
+    def price_rows(self, rows: list, customer_type: CustomerType) -> list:
+        """
+        Returns the discounted unit price for each row, as Product.get_price would.
+        """
+        table = self.price_table(customer_type)
+        return [table[row] for row in rows]
+
+    def price_all(self, customer_type: CustomerType) -> list:
+        """
+        Returns the discounted unit price of every row in row order.
+        """
+        return self.price_table(customer_type).tolist()
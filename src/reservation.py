@@ -0,0 +1,230 @@
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+import zlib
+from src.product import Product
+
+class ReservationEngine:
+    """
+    Makes stock check-and-decrement atomic across concurrent shopping carts.
+
+    Products are mapped onto a fixed set of striped locks by product_id, so carts
+    reserving different products rarely contend, while two carts reserving the same
+    product are serialized and can never both take the last unit. The mapping is
+    the same in every process, so engines in several processes can share one set of
+    multiprocessing locks over shared stock.
+
+    When a ttl is given, stock reserved for a cart is held only for that many seconds
+    after the line was last added to. Holds are kept in an expiry min-heap, so
+    expire_holds reclaims abandoned stock in O(log n) per hold without visiting any
+    cart that still has time left. Checkout confirms a cart's holds instead, inside
+    holding(), which keeps the stripes of the cart's products locked so no hold can
+    expire between reading the cart and confirming it.
+
+    Attributes:
+        reservation_locks (list): The striped locks guarding product stock.
+        reservation_ttl (float or None): Seconds a cart hold lasts, or None for no expiry.
+        reservation_clock (callable): Returns the current time in seconds.
+        reservation_holds (dict): Maps (cart_id, product_id) to [cart, product, quantity, deadline].
+        reservation_heap (list): Min-heap of (deadline, sequence, cart_id, product_id) entries.
+    """
+
+    def __init__(self, stripes: int = 64, ttl: float = None, clock=time.monotonic, locks: list = None):
+        """
+        Initializes the engine with the given number of lock stripes and hold lifetime.
+        Passing locks uses them as the stripes instead, e.g. locks shared between processes.
+        """
+        if locks is not None:
+            stripes = len(locks)
+        if stripes <= 0:
+            raise ValueError("Number of lock stripes must be greater than zero.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Reservation TTL must be greater than zero.")
+        self.reservation_locks = list(locks) if locks is not None else [threading.Lock() for _ in range(stripes)]
+        self.reservation_ttl = ttl
+        self.reservation_clock = clock
+        self.reservation_holds = {}
+        self.reservation_heap = []
+        self.reservation_heap_lock = threading.Lock()  # Never held while taking a stripe lock
+        self.reservation_sequence = itertools.count()  # Orders heap entries with equal deadlines
+
+    def _stripe(self, product: Product) -> int:
+        """
+        Returns the index of the lock guarding a product.
+        """
+        # crc32 rather than hash(), which is salted differently in every process
+        return zlib.crc32(product.product_id.encode()) % len(self.reservation_locks)
+
+    def _hold(self, cart, product: Product, qty: int) -> None:
+        """
+        Records qty more units held for a cart and restarts the hold's lifetime.
+        Must be called under the product's stripe lock.
+        """
+        if cart is None or self.reservation_ttl is None:
+            return
+        key = (cart.cart_id, product.product_id)
+        deadline = self.reservation_clock() + self.reservation_ttl
+        hold = self.reservation_holds.get(key)
+        if hold is None:
+            self.reservation_holds[key] = [cart, product, qty, deadline]
+        else:
+            hold[2] += qty
+            hold[3] = deadline  # The old heap entry becomes stale and is skipped on expiry
+        with self.reservation_heap_lock:
+            heapq.heappush(self.reservation_heap, (deadline, next(self.reservation_sequence), *key))
+
+    def reserve(self, product: Product, qty: int, cart=None) -> bool:
+        """
+        Atomically checks that enough stock is available and takes qty units.
+        If a cart is given, the units are held for it until confirmed, released or expired.
+        """
+        if qty <= 0:
+            raise ValueError("Quantity must be greater than zero.")
+        with self.reservation_locks[self._stripe(product)]:
+            if product.product_stock < qty:
+                raise ValueError(f"Not enough stock available for {product.product_name}.")
+            product._change_stock(-qty)
+            self._hold(cart, product, qty)
+        return True
+
+    def reserve_many(self, lines: list, cart=None) -> bool:
+        """
+        Reserves every (Product, quantity) line, or none of them if any line falls short.
+        """
+        wanted = {}  # product_id -> [Product, total quantity]
+        for product, qty in lines:
+            if qty <= 0:
+                raise ValueError("Quantity must be greater than zero.")
+            wanted.setdefault(product.product_id, [product, 0])[1] += qty
+
+        # Acquire stripes in index order so overlapping batches cannot deadlock
+        stripes = sorted({self._stripe(product) for product, _ in wanted.values()})
+        for index in stripes:
+            self.reservation_locks[index].acquire()
+        try:
+            for product, qty in wanted.values():
+                if product.product_stock < qty:
+                    raise ValueError(f"Not enough stock available for {product.product_name}.")
+            for product, qty in wanted.values():
+                product._change_stock(-qty)
+                self._hold(cart, product, qty)
+        finally:
+            for index in reversed(stripes):
+                self.reservation_locks[index].release()
+        return True
+
+    def adjust_many(self, changes: list) -> bool:
+        """
+        Applies signed stock changes to (Product, change) pairs, or none of them if any
+        product would go negative, as when a stock ledger receives or writes off units.
+        """
+        totals = {}  # product_id -> [Product, total change]
+        for product, change in changes:
+            totals.setdefault(product.product_id, [product, 0])[1] += change
+
+        stripes = sorted({self._stripe(product) for product, _ in totals.values()})
+        for index in stripes:
+            self.reservation_locks[index].acquire()
+        try:
+            for product, change in totals.values():
+                if product.product_stock + change < 0:
+                    raise ValueError(f"Not enough stock available for {product.product_name}.")
+            for product, change in totals.values():
+                product._change_stock(change)
+        finally:
+            for index in reversed(stripes):
+                self.reservation_locks[index].release()
+        return True
+
+    def release(self, product: Product, qty: int, cart=None) -> bool:
+        """
+        Returns qty reserved units to stock, dropping the cart's hold on the product if any.
+        """
+        with self.reservation_locks[self._stripe(product)]:
+            product._change_stock(qty)
+            if cart is not None:
+                self.reservation_holds.pop((cart.cart_id, product.product_id), None)
+        return True
+
+    def adopt(self, cart, product: Product, qty: int) -> bool:
+        """
+        Records units already taken from stock as held by a cart, as when restoring saved carts.
+        """
+        with self.reservation_locks[self._stripe(product)]:
+            self._hold(cart, product, qty)
+        return True
+
+    @contextlib.contextmanager
+    def holding(self, carts: list):
+        """
+        Locks the stripes of every product in the given carts for the duration of the block,
+        so none of their lines can expire or change stock until it ends.
+        """
+        while True:
+            # Hash each distinct product once, however many carts hold it
+            products = {}
+            for cart in carts:
+                products.update(cart.cart_lines)
+            stripes = sorted({self._stripe(line[0]) for line in products.values()})
+            for index in stripes:
+                self.reservation_locks[index].acquire()
+            # A product added meanwhile may sit on a stripe that is not held yet; start over if so
+            if all(cart.cart_lines.keys() <= products.keys() for cart in carts):
+                break
+            for index in reversed(stripes):
+                self.reservation_locks[index].release()
+        try:
+            yield
+        finally:
+            for index in reversed(stripes):
+                self.reservation_locks[index].release()
+
+    def confirm(self, cart) -> bool:
+        """
+        Makes a cart's reserved units permanent, as at checkout, so they never expire.
+        """
+        with self.holding([cart]):
+            return self.confirm_held(cart, cart.items)
+
+    def confirm_held(self, cart, items: list) -> bool:
+        """
+        Confirms the reserved units of a cart's (Product, quantity) items while the caller
+        holds their stripes through holding().
+        """
+        holds, cart_id = self.reservation_holds, cart.cart_id
+        if not holds:
+            return True  # Always the case without a ttl, which records no holds
+        for product, _ in items:
+            holds.pop((cart_id, product.product_id), None)
+        return True
+
+    def expire_holds(self) -> list:
+        """
+        Returns the stock of every hold past its deadline and removes the lines from their carts.
+        Returns the expired holds as (cart, product, quantity) tuples.
+        """
+        now = self.reservation_clock()
+        expired = []
+        while True:
+            with self.reservation_heap_lock:
+                if not self.reservation_heap or self.reservation_heap[0][0] > now:
+                    return expired
+                deadline, _, cart_id, product_id = heapq.heappop(self.reservation_heap)
+
+            hold = self.reservation_holds.get((cart_id, product_id))
+            if hold is None:
+                continue  # Confirmed or released since this entry was pushed
+            cart, product = hold[0], hold[1]
+            with self.reservation_locks[self._stripe(product)]:
+                # Re-check under the lock: the hold may have been refreshed or dropped meanwhile
+                if self.reservation_holds.get((cart_id, product_id)) is not hold or hold[3] != deadline:
+                    continue
+                del self.reservation_holds[(cart_id, product_id)]
+                product._change_stock(hold[2])
+                cart.drop_line(product)
+            expired.append((cart, product, hold[2]))
+
+# Shared by carts created without an explicit engine, so they still coordinate
+DEFAULT_RESERVATIONS = ReservationEngine()
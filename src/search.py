@@ -3,12 +3,14 @@ class Search:
     Handles searching for products by name and category.
     """
 
-    def __init__(self, products: list, categories: list):
+    def __init__(self, products: list, categories: list, category_index: dict = None):
         """
         Initializes the search system.
+        An optional index of lowercased category names avoids scanning the category list.
         """
         self.products = products or []  # Ensure it's always a list
         self.categories = categories or []
+        self.category_index = category_index
 
     def search_by_name(self, name: str) -> list:
         """
@@ -22,6 +24,9 @@ class Search:
         Searches for products in a specific category.
         """
         cat = cat.strip().lower()
+        if self.category_index is not None:
+            category = self.category_index.get(cat)
+            return category.get_products() if category else []
         for category in self.categories:
             if cat == category.category_name.lower():
                 return category.get_products()
@@ -0,0 +1,245 @@
+import bisect
+import re
+from src.product import Product
+
+EXACT, PREFIX, WORD, SUBSTRING = range(4)  # Match ranks, best first
+RANK_SHIFT = 32  # Ranked results are keyed, and paged, by rank << RANK_SHIFT | position
+POSITION_MASK = (1 << RANK_SHIFT) - 1
+WORD_PATTERN = re.compile(r"[^\W_]+")  # Runs of characters for which str.isalnum() is true
+
+def match_rank(name: str, query: str) -> int:
+    """
+    Returns how well a lowercased name matches a lowercased query, EXACT to SUBSTRING,
+    or None if it does not contain the query.
+    """
+    position = name.find(query)
+    if position < 0:
+        return None
+    if name == query:
+        return EXACT
+    if position == 0:
+        return PREFIX
+    while position > 0:
+        if not name[position - 1].isalnum():
+            return WORD
+        position = name.find(query, position + 1)
+    return SUBSTRING
+
+class SearchIndex:
+    """
+    Maintains an n-gram index over product names for fast substring search.
+
+    Every lowercased product name is split into all of its 1- to `gram_size`-character
+    substrings, and each one keeps a posting set of the products containing it.
+    Queries intersect the posting sets of their n-grams instead of scanning the catalog.
+
+    Names can also be indexed before their Product exists; such entries hold the
+    product_id and are turned into products through index_resolver when they match.
+
+    Attributes:
+        gram_size (int): Length of the longest n-gram kept in the index.
+        index_entries (list): (lowercased name, Product or product_id) pairs in insertion order.
+        index_resolver (callable or None): Returns the Product for a product_id.
+        index_ordinals (dict): Maps product_id to its position in index_entries.
+        index_postings (dict): Maps each n-gram to the set of positions containing it.
+        index_names (dict): Maps each lowercased name to the set of positions with that name.
+        index_name_starts (dict): Maps the first 1 to gram_size characters of each name
+            to the set of positions whose name starts that way.
+        index_word_starts (dict): Maps the first 1 to gram_size characters of every word
+            to the set of positions with a word starting that way.
+    """
+
+    def __init__(self, gram_size: int = 3):
+        """
+        Initializes an empty search index.
+        """
+        if gram_size < 1:
+            raise ValueError("Gram size must be at least 1.")
+        self.gram_size = gram_size
+        self.index_entries = []
+        self.index_ordinals = {}
+        self.index_postings = {}
+        self.index_names = {}
+        self.index_name_starts = {}
+        self.index_word_starts = {}
+        self.index_resolver = None
+
+    def _grams(self, text: str) -> set:
+        """
+        Returns every distinct substring of text up to gram_size characters long.
+        """
+        grams = set()
+        for size in range(1, min(self.gram_size, len(text)) + 1):
+            for start in range(len(text) - size + 1):
+                grams.add(text[start:start + size])
+        return grams
+
+    def _word_starts(self, text: str) -> set:
+        """
+        Returns the first 1 to gram_size characters of every word in text.
+        """
+        starts = set()
+        for word in WORD_PATTERN.finditer(text):
+            position = word.start()
+            for size in range(1, self.gram_size + 1):
+                starts.add(text[position:position + size])
+        return starts
+
+    def add_product(self, product: Product) -> bool:
+        """
+        Indexes a product's name, replacing any earlier entry with the same ID.
+        """
+        return self._add_entry(product.product_id, product.product_name, product)
+
+    def add_name(self, product_id: str, name: str) -> bool:
+        """
+        Indexes a name for a product that is only built when a search returns it.
+        """
+        if self.index_resolver is None:
+            raise ValueError("Search index has no product resolver.")
+        return self._add_entry(product_id, name, product_id)
+
+    def _add_entry(self, product_id: str, name: str, target) -> bool:
+        """
+        Indexes name for target, a Product or the product_id standing in for it.
+        """
+        name = name.lower()
+        ordinal = self.index_ordinals.get(product_id)
+        if ordinal is None:
+            ordinal = len(self.index_entries)
+            self.index_ordinals[product_id] = ordinal
+            self.index_entries.append((name, target))
+        else:
+            # Keep the original position, as a dict keeps the original key order
+            old_name = self.index_entries[ordinal][0]
+            for gram in self._grams(old_name):
+                self.index_postings[gram].discard(ordinal)
+            for start in self._word_starts(old_name):
+                self.index_word_starts[start].discard(ordinal)
+            self.index_names[old_name].discard(ordinal)
+            for size in range(1, min(self.gram_size, len(old_name)) + 1):
+                self.index_name_starts[old_name[:size]].discard(ordinal)
+            self.index_entries[ordinal] = (name, target)
+
+        for gram in self._grams(name):
+            self.index_postings.setdefault(gram, set()).add(ordinal)
+        for start in self._word_starts(name):
+            self.index_word_starts.setdefault(start, set()).add(ordinal)
+        self.index_names.setdefault(name, set()).add(ordinal)
+        for size in range(1, min(self.gram_size, len(name)) + 1):
+            self.index_name_starts.setdefault(name[:size], set()).add(ordinal)
+        return True
+
+    def _candidates(self, query: str):
+        """
+        Returns the positions whose names contain every n-gram of a non-empty lowercased query.
+        Short queries get their posting set itself, which must not be modified.
+        """
+        if len(query) <= self.gram_size:
+            return self.index_postings.get(query, ())
+        postings = []
+        for gram in {query[i:i + self.gram_size] for i in range(len(query) - self.gram_size + 1)}:
+            posting = self.index_postings.get(gram)
+            if not posting:
+                return ()
+            postings.append(posting)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def search(self, query: str) -> list:
+        """
+        Returns the products whose name contains the query, ignoring case.
+        Results are in insertion order, matching Search.search_by_name.
+        """
+        query = query.strip().lower()
+        if not query:
+            return [self._product(ordinal) for ordinal in range(len(self.index_entries))]
+
+        # n-gram overlap does not imply a contiguous match, so confirm each candidate
+        results = []
+        for ordinal in sorted(self._candidates(query)):
+            if query in self.index_entries[ordinal][0]:
+                results.append(self._product(ordinal))
+        return results
+
+    def search_ranked(self, query: str, limit: int, cursor: int = None) -> tuple:
+        """
+        Returns (products, next_cursor) for the limit best matches of the query after cursor.
+
+        Exact name matches come first, then names starting with the query, then names
+        with a word starting with it, then any other names containing it, each group in
+        insertion order. Each rank is a set of index positions that is scanned in order
+        only until the page and one match past it are found, so lower ranks of broad
+        queries are never visited.
+        Pass next_cursor back to get the following page; it is None once no matches are left.
+        """
+        if limit <= 0:
+            raise ValueError("Limit must be greater than zero.")
+        query = query.strip().lower()
+        if not query:
+            start = 0 if cursor is None else (cursor & POSITION_MASK) + 1
+            ordinals = range(start, min(start + limit, len(self.index_entries)))
+            next_cursor = ordinals[-1] if start + limit < len(self.index_entries) else None
+            return [self._product(ordinal) for ordinal in ordinals], next_cursor
+
+        candidates = self._candidates(query)
+        if not candidates:
+            return [], None
+        key = query[:self.gram_size]
+        exact = self.index_names.get(query, set())
+        starts = self.index_name_starts.get(key, set())
+        # Word starts are only indexed at letters and digits, so other queries check every match
+        words = self.index_word_starts.get(key, set()) if query[0].isalnum() else candidates
+        if len(query) <= self.gram_size and query[0].isalnum():
+            # Short queries equal their index keys, so each rank is exactly one set
+            tiers = [(EXACT, exact, True), (PREFIX, starts - exact, True),
+                     (WORD, words - starts, True), (SUBSTRING, candidates - words, True)]
+        else:
+            # Longer queries may match only some of the names sharing their key, so check each
+            tiers = [(EXACT, exact, True), (PREFIX, starts & candidates, False),
+                     (WORD, words & candidates, False), (SUBSTRING, candidates, False)]
+
+        # Scan each rank in insertion order only until the page is full, plus one match
+        # to tell whether another page follows
+        after = -1 if cursor is None else cursor
+        best = []
+        limit += 1
+        for rank, pool, exact_tier in tiers:
+            if after >= (rank + 1) << RANK_SHIFT or not pool:
+                continue  # The cursor is past this rank
+            lowest = after & POSITION_MASK if after >> RANK_SHIFT == rank else -1
+            ordinals = sorted(pool)
+            for i in range(bisect.bisect_right(ordinals, lowest), len(ordinals)):
+                ordinal = ordinals[i]
+                if not exact_tier:
+                    ranked = self._rank_key(ordinal, query)
+                    if ranked is None or ranked >> RANK_SHIFT != rank:
+                        continue
+                best.append(rank << RANK_SHIFT | ordinal)
+                if len(best) == limit:
+                    break
+            if len(best) == limit:
+                break
+        if len(best) == limit:
+            best.pop()
+            next_cursor = best[-1]
+        else:
+            next_cursor = None
+        return [self._product(key & POSITION_MASK) for key in best], next_cursor
+
+    def _rank_key(self, ordinal: int, query: str) -> int:
+        """
+        Returns the ranked search key of an entry for a lowercased query, or None if it does not match.
+        """
+        rank = match_rank(self.index_entries[ordinal][0], query)
+        return None if rank is None else rank << RANK_SHIFT | ordinal  # Orders by rank, then insertion order
+
+    def _product(self, ordinal: int) -> Product:
+        """
+        Returns the product of an entry, resolving and caching it if only its ID is indexed.
+        """
+        name, target = self.index_entries[ordinal]
+        if isinstance(target, str):
+            target = self.index_resolver(target)
+            self.index_entries[ordinal] = (name, target)
+        return target
@@ -0,0 +1,467 @@
+import argparse
+import asyncio
+import datetime
+import inspect
+import json
+import math
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, unquote
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer, RetailCustomer
+from src.customerType import CustomerType
+from src.coupon import Coupon
+
+MAX_BODY_SIZE = 1024 * 1024  # Largest request body accepted, in bytes
+MAX_PAGE_SIZE = 1000  # Largest limit a search or listing may ask for
+
+class HTTPError(Exception):
+    """
+    Raised by a handler to answer with a specific HTTP status.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class EMarketServer:
+    """
+    Serves one shared EMarketSystem over HTTP/1.1 with JSON request and response bodies.
+
+    Connections are kept alive and requests on a connection are handled in order, so
+    clients may pipeline them. At most max_connections clients are served at once;
+    further connections are answered with 503 and closed.
+
+    POST /login returns a session token; customer and admin endpoints expect it in an
+    "Authorization: Bearer <token>" header (or a "token" field) instead of a password.
+
+    Attributes:
+        system (EMarketSystem): The system every request operates on.
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free port when the server starts.
+        max_connections (int): Upper bound on concurrently served connections.
+        idle_timeout (float): Seconds an idle keep-alive connection stays open.
+    """
+
+    def __init__(self, system: EMarketSystem, host: str = "127.0.0.1", port: int = 8080,
+                 max_connections: int = 10000, idle_timeout: float = 30.0):
+        """
+        Initializes the server without starting it.
+        """
+        if max_connections <= 0:
+            raise ValueError("Maximum connections must be greater than zero.")
+        self.system = system
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.active_connections = 0
+        self.server = None
+        self.routes = {
+            ("POST", "/register"): self.handle_register,
+            ("POST", "/login"): self.handle_login,
+            ("POST", "/logout"): self.handle_logout,
+            ("GET", "/search"): self.handle_search,
+            ("GET", "/products"): self.handle_filter_products,
+            ("POST", "/cart"): self.handle_add_to_cart,
+            ("POST", "/checkout"): self.handle_checkout,
+            ("GET", "/orders"): self.handle_list_orders,
+            ("GET", "/delivery"): self.handle_track_delivery,
+            ("POST", "/admin/coupons"): self.handle_add_coupon,
+            ("POST", "/admin/delivery"): self.handle_update_delivery,
+            ("POST", "/admin/deliveries"): self.handle_update_deliveries,
+            ("POST", "/admin/stock"): self.handle_adjust_stock,
+        }
+
+    async def start(self) -> None:
+        """
+        Starts listening; the chosen port is stored in self.port.
+        """
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """
+        Starts the server if needed and serves until cancelled.
+        """
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stops accepting connections and waits for the listener to close.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Reads requests from one connection and writes a response to each, in order.
+        """
+        if self.active_connections >= self.max_connections:
+            self._write_response(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server is busy."}, False)
+            await self._close_writer(writer)
+            return
+
+        self.active_connections += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    self._write_response(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                         {"error": "Request headers too large."}, False)
+                    break
+
+                try:
+                    method, target, version, headers = self._parse_head(head)
+                    keep_alive = self._wants_keep_alive(version, headers)
+                    body = await self._read_body(reader, headers)
+                    status, payload = await self.dispatch(method, target, body, headers)
+                except HTTPError as e:
+                    status, payload, keep_alive = e.status, {"error": str(e)}, False
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+        finally:
+            self.active_connections -= 1
+            await self._close_writer(writer)
+
+    def _parse_head(self, head: bytes) -> tuple:
+        """
+        Splits a request head into (method, target, version, headers).
+        """
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, version = lines[0].split(" ")
+            headers = {}
+            for line in lines[1:]:
+                if line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request.")
+        return method.upper(), target, version, headers
+
+    def _wants_keep_alive(self, version: str, headers: dict) -> bool:
+        """
+        Applies the HTTP/1.0 and HTTP/1.1 defaults for connection reuse.
+        """
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: dict) -> bytes:
+        """
+        Reads a request body of the announced Content-Length.
+        """
+        if "transfer-encoding" in headers:
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED, "Chunked request bodies are not supported.")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        if length < 0 or length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+        return await reader.readexactly(length) if length else b""
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keep_alive: bool) -> None:
+        """
+        Writes a JSON response onto the connection.
+        """
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def _close_writer(self, writer: asyncio.StreamWriter) -> None:
+        """
+        Closes a connection, ignoring errors from peers that already went away.
+        """
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def dispatch(self, method: str, target: str, body: bytes, headers: dict = None) -> tuple:
+        """
+        Routes a request to its handler and returns (status, payload).
+        """
+        try:
+            handler, data = self._route(method, target, body, headers or {})
+            if inspect.iscoroutinefunction(handler):
+                return await handler(data)
+            if method == "GET":
+                return handler(data)
+            # Mutating calls block until their journal record is fsynced; off the event loop,
+            # concurrent requests queue their records together and share one commit
+            return await asyncio.get_running_loop().run_in_executor(None, handler, data)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            message = f"Missing field {e}." if isinstance(e, KeyError) else str(e)
+            return HTTPStatus.BAD_REQUEST, {"error": message}
+        except Exception:
+            # Answer instead of dropping the connection; the details stay out of the response
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error."}
+
+    def _route(self, method: str, target: str, body: bytes, headers: dict) -> tuple:
+        """
+        Finds the handler for a request and merges its JSON body and query string into one dict.
+        """
+        url = urlsplit(target)
+        path, resource = url.path.rstrip("/"), ""
+        handler = self.routes.get((method, path))
+        if handler is None:
+            # Routes like /delivery/<order_id> carry their resource in the last segment
+            prefix, _, resource = path.rpartition("/")
+            handler = self.routes.get((method, prefix))
+        if handler is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Not found.")
+
+        try:
+            data = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be valid JSON.")
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+        for name, values in parse_qs(url.query).items():
+            data.setdefault(name, values[-1])
+        if resource:
+            data["resource"] = unquote(resource)
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            data["token"] = token.strip()
+        return handler, data
+
+    def _authenticate(self, data: dict, admin: bool = False):
+        """
+        Resolves the session token carried by the request to its customer.
+        """
+        if not data.get("token"):
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Session token required.")
+        try:
+            customer = self.system.get_customer_by_token(data["token"])
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, str(e))
+        if admin and customer.username != "admin":
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Admin access required.")
+        return customer
+
+    async def handle_register(self, data: dict) -> tuple:
+        cust_type = text_field(data, "customer_type", "individual").lower()
+        details = tuple(text_field(data, name) for name in ("username", "password", "email", "name", "address", "phone"))
+        if details[0] in self.system.usernames:
+            raise ValueError("Username already exists. Please choose another username.")
+        if cust_type == CustomerType.INDIVIDUAL:
+            customer = await self.system.register_customer_async(IndividualCustomer, *details)
+        elif cust_type == CustomerType.RETAIL:
+            customer = await self.system.register_customer_async(RetailCustomer, *details,
+                                                                 text_field(data, "business_license", ""))
+        else:
+            raise ValueError("Invalid customer type. Please enter 'individual' or 'retail'.")
+        return HTTPStatus.CREATED, {"user_id": customer.user_id}
+
+    async def handle_login(self, data: dict) -> tuple:
+        token = await self.system.create_session_async(text_field(data, "username"), text_field(data, "password"))
+        customer = self.system.get_customer_by_token(token)
+        return HTTPStatus.OK, {"token": token, "user_id": customer.user_id, "name": customer.customer_name}
+
+    def handle_logout(self, data: dict) -> tuple:
+        self._authenticate(data)
+        self.system.end_session(data["token"])
+        return HTTPStatus.OK, {"logged_out": True}
+
+    def handle_search(self, data: dict) -> tuple:
+        # Searches stay on the live indexes: pinning a version would load a lazily opened catalog whole
+        if "category" in data:
+            products = self.system.search_category(text_field(data, "category"))
+            return HTTPStatus.OK, {"products": [product_to_dict(p) for p in products]}
+        products, next_cursor = self.system.search_products_page(
+            text_field(data, "q", ""), number_field(data, "limit", int, 50, 1, MAX_PAGE_SIZE),
+            optional_number(data, "cursor", int, 0))
+        return HTTPStatus.OK, {"products": [product_to_dict(p) for p in products], "next_cursor": next_cursor}
+
+    def handle_filter_products(self, data: dict) -> tuple:
+        discounted = {"true": True, "false": False}.get(str(data.get("discounted", "")).lower())
+        products, facets = self.system.filter_products(
+            optional_text(data, "category"), optional_number(data, "min_price", float),
+            optional_number(data, "max_price", float), CustomerType.parse(data.get("customer_type")),
+            optional_number(data, "min_stock", int), discounted, optional_number(data, "limit", int, 1, MAX_PAGE_SIZE))
+        return HTTPStatus.OK, {"products": [product_to_dict(p) for p in products], "facets": facets}
+
+    def handle_add_to_cart(self, data: dict) -> tuple:
+        customer = self._authenticate(data)
+        self.system.add_to_cart(customer.user_id, text_field(data, "product_id"),
+                                number_field(data, "quantity", int, 1))
+        cart = self.system.shopping_carts[customer.user_id]
+        return HTTPStatus.OK, {"items": [{"product_id": p.product_id, "quantity": q} for p, q in cart.items]}
+
+    def handle_checkout(self, data: dict) -> tuple:
+        customer = self._authenticate(data)
+        order = self.system.checkout_order(customer.user_id, optional_text(data, "coupon_code"))
+        return HTTPStatus.CREATED, {"order_id": order.order_id, "total_amount": order.order_total_amount,
+                                    "status": order.order_status}
+
+    def handle_list_orders(self, data: dict) -> tuple:
+        customer = self._authenticate(data)
+        customer_id = customer.user_id
+        if customer.username == "admin":
+            customer_id = optional_text(data, "customer_id")  # Admins may list anyone's orders
+        since = optional_text(data, "since")
+        since = datetime.datetime.fromisoformat(since) if since else None
+        orders, next_cursor = self.system.get_orders(customer_id, optional_text(data, "status"), since,
+                                                     number_field(data, "limit", int, 50, 1, MAX_PAGE_SIZE),
+                                                     optional_number(data, "cursor", int, 0))
+        return HTTPStatus.OK, {"orders": [order_to_dict(order) for order in orders], "next_cursor": next_cursor}
+
+    def handle_track_delivery(self, data: dict) -> tuple:
+        delivery = self.system.track_delivery(text_field(data, "resource", ""))
+        if delivery is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Order not found or no delivery info available.")
+        return HTTPStatus.OK, {"order_id": delivery.order_id, "status": delivery.track_delivery(),
+                               "estimated_time": delivery.get_estimated_time().isoformat()}
+
+    def handle_add_coupon(self, data: dict) -> tuple:
+        self._authenticate(data, admin=True)
+        expiry_date = datetime.datetime.strptime(text_field(data, "expiry_date"), "%Y-%m-%d").date()
+        coupon = Coupon(text_field(data, "code"), number_field(data, "discount", float), expiry_date)
+        self.system.add_coupon(coupon)
+        return HTTPStatus.CREATED, {"code": coupon.coupon_code}
+
+    def handle_update_delivery(self, data: dict) -> tuple:
+        self._authenticate(data, admin=True)
+        delivery = self.system.track_delivery(text_field(data, "order_id"))
+        if delivery is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Order not found.")
+        self.system.update_delivery_status(delivery.order_id, text_field(data, "status"))
+        return HTTPStatus.OK, {"order_id": delivery.order_id, "status": delivery.track_delivery()}
+
+    def handle_update_deliveries(self, data: dict) -> tuple:
+        self._authenticate(data, admin=True)
+        updated, errors = self.system.update_delivery_statuses(
+            [(update["order_id"], update["status"]) for update in data["updates"]])
+        return HTTPStatus.OK, {"updated": updated,
+                               "errors": [{"order_id": order_id, "error": message} for order_id, message in errors]}
+
+    def handle_adjust_stock(self, data: dict) -> tuple:
+        self._authenticate(data, admin=True)
+        adjustments = [(text_field(item, "product_id"), optional_text(item, "warehouse"), int(item["quantity"]),
+                        optional_text(item, "reason") or "adjustment") for item in data["adjustments"]]
+        movements = self.system.adjust_stock(adjustments)
+        product_ids = dict.fromkeys(product_id for product_id, _, _, _ in adjustments)
+        return HTTPStatus.OK, {"movements": movements,
+                               "stock": {product_id: {"available": self.system.products[product_id].product_stock,
+                                                      "warehouses": self.system.stock_levels(product_id)}
+                                         for product_id in product_ids}}
+
+def order_to_dict(order) -> dict:
+    """
+    Returns the JSON representation of an order.
+    """
+    return {
+        "order_id": order.order_id,
+        "customer_id": order.customer_id,
+        "items": [{"product_id": product.product_id, "quantity": qty} for product, qty in order.order_items],
+        "total_amount": order.order_total_amount,
+        "status": order.order_status,
+        "placed_at": order.order_placed_at.isoformat() if order.order_placed_at else None,
+    }
+
+def text_field(data: dict, name: str, default: str = None) -> str:
+    """
+    Returns a string request field, or default if it is missing; a field without a default is required.
+    """
+    value = data[name] if default is None else data.get(name, default)
+    if not isinstance(value, str):
+        raise ValueError(f"Field {name} must be a string.")
+    return value
+
+def optional_text(data: dict, name: str) -> str:
+    """
+    Returns a string request field, or None if it is missing or empty.
+    """
+    return text_field(data, name) if data.get(name) not in (None, "") else None
+
+def number_field(data: dict, name: str, kind: type, default=None, minimum=None, maximum=None):
+    """
+    Returns a request field converted with kind, or default if it is missing; a field without
+    a default is required. Infinite and NaN values, and values outside minimum..maximum, are rejected.
+    """
+    value = data[name] if default is None else data.get(name, default)
+    try:
+        number = kind(value)
+        finite = math.isfinite(number)
+    except (ValueError, OverflowError):  # Not a number, or int() of an infinite or NaN float
+        finite = False
+    if not finite:
+        raise ValueError(f"Field {name} must be a finite number.")
+    if minimum is not None and number < minimum or maximum is not None and number > maximum:
+        bound = f"at least {minimum}" if maximum is None else f"between {minimum} and {maximum}"
+        raise ValueError(f"Field {name} must be {bound}.")
+    return number
+
+def optional_number(data: dict, name: str, kind: type, minimum=None, maximum=None):
+    """
+    Returns a request parameter converted with kind, or None if it is missing or empty.
+    """
+    return number_field(data, name, kind, None, minimum, maximum) if data.get(name) not in (None, "") else None
+
+def product_to_dict(product) -> dict:
+    """
+    Returns the JSON representation of a product.
+    """
+    return {
+        "product_id": product.product_id,
+        "name": product.product_name,
+        "description": product.product_description,
+        "retail_price": product.product_retail_price,
+        "wholesale_price": product.product_wholesale_price,
+        "stock": product.product_stock,
+        "discount": product.product_discount_percent,
+    }
+
+def main():
+    """
+    Runs the JSON service on the state recovered from the data directory's journal,
+    starting from the base catalog with the admin user registered.
+    """
+    from src.main import openSystem, DATA_DIRECTORY
+
+    parser = argparse.ArgumentParser(description="E-Mart JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-connections", type=int, default=10000)
+    parser.add_argument("--data", default=DATA_DIRECTORY, help="directory holding the journal")
+    args = parser.parse_args()
+
+    system = openSystem(args.data)
+    server = EMarketServer(system, args.host, args.port, args.max_connections)
+
+    async def run():
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        system.journal.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+class SessionManager:
+    """
+    Issues opaque session tokens and resolves them to customers.
+
+    Sessions live in an LRU-ordered dict: resolving a token is a single dict lookup,
+    moves the session to the most-recently-used end and slides its expiry forward.
+    When the store is full the least recently used session is evicted.
+
+    Attributes:
+        session_capacity (int): Maximum number of live sessions.
+        session_ttl (float): Seconds a session stays valid after its last use.
+        session_clock (callable): Returns the current time in seconds.
+        session_store (OrderedDict): Maps token to [customer, expiry time], least recently used first.
+    """
+
+    def __init__(self, capacity: int = 100000, ttl: float = 1800.0, clock=time.monotonic):
+        """
+        Initializes an empty session store.
+        """
+        if capacity <= 0:
+            raise ValueError("Session capacity must be greater than zero.")
+        if ttl <= 0:
+            raise ValueError("Session TTL must be greater than zero.")
+        self.session_capacity = capacity
+        self.session_ttl = ttl
+        self.session_clock = clock
+        self.session_store = OrderedDict()
+        self.session_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.session_store)
+
+    def create(self, customer) -> str:
+        """
+        Starts a session for an authenticated customer and returns its token.
+        """
+        token = secrets.token_urlsafe(32)
+        with self.session_lock:
+            self.session_store[token] = [customer, self.session_clock() + self.session_ttl]
+            while len(self.session_store) > self.session_capacity:
+                self.session_store.popitem(last=False)  # Evict the least recently used session
+        return token
+
+    def resolve(self, token: str):
+        """
+        Returns the customer owning a live session and extends the session's lifetime.
+        """
+        now = self.session_clock()
+        with self.session_lock:
+            session = self.session_store.get(token)
+            if session is None:
+                raise ValueError("Invalid session token.")
+            if session[1] <= now:
+                del self.session_store[token]
+                raise ValueError("Session expired. Please log in again.")
+            session[1] = now + self.session_ttl
+            self.session_store.move_to_end(token)
+            return session[0]
+
+    def revoke(self, token: str) -> bool:
+        """
+        Ends a session. Returns False if the token was not live.
+        """
+        with self.session_lock:
+            return self.session_store.pop(token, None) is not None
+
+    def purge_expired(self) -> int:
+        """
+        Removes expired sessions and returns how many were removed.
+        Every use moves a session to the end with a fresh expiry, so the LRU order is also
+        expiry order and only the expired sessions at the front need to be visited.
+        """
+        now = self.session_clock()
+        removed = 0
+        with self.session_lock:
+            while self.session_store:
+                token, (_, expires) = next(iter(self.session_store.items()))
+                if expires > now:
+                    break
+                del self.session_store[token]
+                removed += 1
+        return removed
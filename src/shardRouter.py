@@ -0,0 +1,264 @@
+import multiprocessing
+import os
+import threading
+import zlib
+from src.EMarketSystem import EMarketSystem
+from src.customer import IndividualCustomer, RetailCustomer
+from src.coupon import Coupon
+from src.customerType import CustomerType
+from src.idGenerator import IdGenerator, NODE_MASK, set_generator
+from src.journal import product_to_dict, product_from_dict, coupon_to_dict, coupon_from_dict
+from src.reservation import ReservationEngine
+from src.user import User
+
+CUSTOMER_CLASSES = {CustomerType.INDIVIDUAL: IndividualCustomer, CustomerType.RETAIL: RetailCustomer}
+
+def shard_of(key: str, shards: int) -> int:
+    """
+    Returns the shard owning a key; the same in every process.
+    """
+    return zlib.crc32(key.encode()) % shards
+
+def _order_summary(order) -> dict:
+    """
+    Returns the part of an order sent back to the router.
+    """
+    return {"order_id": order.order_id, "customer_id": order.customer_id,
+            "total_amount": order.order_total_amount, "status": order.order_status}
+
+def _register(system: EMarketSystem, user_id: str, kind: str, *args) -> str:
+    """
+    Builds and registers a customer under the user_id the router chose for it.
+    """
+    customer = CUSTOMER_CLASSES[kind](*args)
+    customer.user_id = user_id
+    return system.register_customer(customer).user_id
+
+def _serve_shard(connection, catalog: list, stock, locks: list, password_iterations: int, node: int) -> None:
+    """
+    Runs one shard: an EMarketSystem owning some customers, carts and orders, whose
+    product stock lives in shared memory guarded by locks shared with the other shards.
+    The shard keeps no stock ledger, since the stock it sells is not its own.
+    IDs the shard creates are stamped with its own node number.
+    """
+    User.password_iterations = password_iterations
+    set_generator(IdGenerator(node))
+    system = EMarketSystem(stock_ledger=False)
+    system.reservations = ReservationEngine(locks=locks)
+    # Every shard adds the catalog in the same order, so row numbers match the shared stock
+    system.add_products_bulk([(product_from_dict(data), data["category"]) for data in catalog])
+    system.product_store.share_stock(stock)
+
+    handlers = {
+        "register_customer": lambda *args: _register(system, *args),
+        "add_to_cart": system.add_to_cart,
+        "checkout_order": lambda *args: _order_summary(system.checkout_order(*args)),
+        "add_coupon": lambda data: system.add_coupon(coupon_from_dict(data)).coupon_code,
+        "add_coupons": lambda coupons: system.add_coupons([coupon_from_dict(data) for data in coupons]),
+    }
+
+    def call(op: str, args: tuple) -> tuple:
+        try:
+            return "ok", handlers[op](*args)
+        except ValueError as ve:
+            return "error", str(ve)
+
+    while True:
+        try:
+            op, args = connection.recv()
+        except EOFError:
+            return
+        if op == "stop":
+            return
+        if op == "batch":
+            connection.send([call(*item) for item in args])
+        else:
+            connection.send(call(op, args))
+
+class ShardRouter:
+    """
+    Represents a sharded deployment of the marketplace across worker processes.
+
+    Customers, carts and orders are hash-partitioned by user_id over the shards, and
+    every call for a customer is sent to the shard that owns it, so shards run in
+    parallel on separate cores. The router picks each new user_id, so the owning
+    shard is always computed from the ID and never looked up.
+
+    All shards serve the same catalog. Its stock is one shared-memory column that
+    every shard's ReservationEngine reserves from under the same striped,
+    cross-process locks, so shards can never oversell a product between them.
+    Shards run without a stock ledger: per-warehouse levels would be kept apart in
+    each shard over the one shared column, so warehouses are not tracked when sharded.
+
+    Usernames and emails are unique across all shards: the router keeps both indexes.
+
+    Attributes:
+        router_shards (int): Number of shard processes.
+        router_connections (list): Pipe to each shard.
+        router_processes (list): The shard processes.
+        router_stock (Array): Shared stock column, one entry per catalog product.
+        router_locks (list): Lock stripes shared by every shard's reservation engine.
+        router_rows (dict): Maps product_id to its row in router_stock.
+        router_ids (IdGenerator): Picks user_ids, as node 0; shard i creates its own IDs as node i + 1.
+    """
+
+    def __init__(self, products: list, shards: int = None, stripes: int = 64, context=None):
+        """
+        Starts the shard processes; products is a list of (Product, category_name) pairs.
+        shards defaults to the number of CPUs.
+        """
+        shards = shards or os.cpu_count() or 1
+        if shards <= 0:
+            raise ValueError("Number of shards must be greater than zero.")
+        if stripes <= 0:
+            raise ValueError("Number of lock stripes must be greater than zero.")
+        context = context or multiprocessing.get_context()
+        catalog = [product_to_dict(product, category_name) for product, category_name in products]
+
+        self.router_shards = shards
+        self.router_rows = {data["product_id"]: row for row, data in enumerate(catalog)}
+        self.router_stock = context.RawArray("q", [data["stock"] for data in catalog])
+        self.router_locks = [context.Lock() for _ in range(stripes)]
+        self.router_usernames = set()
+        self.router_emails = set()
+        self.router_lock = threading.Lock()  # Guards the username and email indexes
+        self.router_ids = IdGenerator(0)
+        self.router_connections = []
+        self.router_connection_locks = []
+        self.router_processes = []
+        for shard in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve_shard, daemon=True,
+                                      args=(child, catalog, self.router_stock, self.router_locks,
+                                            User.password_iterations, shard % NODE_MASK + 1))
+            process.start()
+            child.close()
+            self.router_connections.append(parent)
+            self.router_connection_locks.append(threading.Lock())
+            self.router_processes.append(process)
+
+    def _call(self, shard: int, op: str, *args):
+        """
+        Runs op on a shard and returns its result, raising its ValueError if it failed.
+        """
+        with self.router_connection_locks[shard]:
+            self.router_connections[shard].send((op, args))
+            status, result = self.router_connections[shard].recv()
+        if status == "error":
+            raise ValueError(result)
+        return result
+
+    def _owner(self, customer_id: str) -> int:
+        """
+        Returns the shard owning a customer.
+        """
+        return shard_of(customer_id, self.router_shards)
+
+    def register_customer(self, customer_type: str, username: str, password: str, email: str,
+                          name: str, address: str, phone: str, *extra) -> str:
+        """
+        Registers an "individual" or "retail" customer on its shard and returns the user_id.
+        The customer object is built in the shard, so password hashing runs there too.
+        """
+        if customer_type not in CUSTOMER_CLASSES:
+            raise ValueError("Invalid customer type.")
+        email_key = email.lower()
+        with self.router_lock:
+            if username in self.router_usernames:
+                raise ValueError("Username already exists. Please choose another username.")
+            if email_key in self.router_emails:
+                raise ValueError("Email already registered. Please use another email.")
+            self.router_usernames.add(username)
+            self.router_emails.add(email_key)
+
+        user_id = self.router_ids.next_id()
+        try:
+            return self._call(self._owner(user_id), "register_customer", user_id, customer_type,
+                              username, password, email, name, address, phone, *extra)
+        except Exception:
+            with self.router_lock:
+                self.router_usernames.discard(username)
+                self.router_emails.discard(email_key)
+            raise
+
+    def add_to_cart(self, customer_id: str, product_id: str, quantity: int) -> bool:
+        """
+        Adds a product to a customer's cart on the customer's shard.
+        """
+        return self._call(self._owner(customer_id), "add_to_cart", customer_id, product_id, quantity)
+
+    def checkout_order(self, customer_id: str, coupon_code: str = None) -> dict:
+        """
+        Checks out a customer's cart on the customer's shard and returns a summary of the order.
+        """
+        return self._call(self._owner(customer_id), "checkout_order", customer_id, coupon_code)
+
+    def add_coupon(self, coupon: Coupon) -> Coupon:
+        """
+        Adds a coupon to every shard.
+        """
+        for shard in range(self.router_shards):
+            self._call(shard, "add_coupon", coupon_to_dict(coupon))
+        return coupon
+
+    def add_coupons(self, coupons: list) -> int:
+        """
+        Adds many coupons to every shard, one message per shard, and returns how many were added.
+        """
+        batch = [coupon_to_dict(coupon) for coupon in coupons]
+        for shard in range(self.router_shards):
+            self._call(shard, "add_coupons", batch)
+        return len(batch)
+
+    def run_batch(self, calls: list) -> list:
+        """
+        Runs (op, args) calls for customers, where op is "add_to_cart" or
+        "checkout_order" and args starts with the customer_id.
+
+        Calls are grouped by shard and every shard works through its group at the same
+        time, in the order given. Returns each call's result, or the ValueError it
+        raised, in the order of calls.
+        """
+        groups = [[] for _ in range(self.router_shards)]
+        for position, (op, args) in enumerate(calls):
+            if op not in ("add_to_cart", "checkout_order"):
+                raise ValueError(f"Unsupported batch operation: {op}")
+            groups[self._owner(args[0])].append((position, op, tuple(args)))
+
+        results = [None] * len(calls)
+        busy = [shard for shard in range(self.router_shards) if groups[shard]]
+        for shard in busy:
+            self.router_connection_locks[shard].acquire()
+        try:
+            for shard in busy:
+                self.router_connections[shard].send(("batch", [(op, args) for _, op, args in groups[shard]]))
+            for shard in busy:
+                replies = self.router_connections[shard].recv()
+                for (position, _, _), (status, result) in zip(groups[shard], replies):
+                    results[position] = ValueError(result) if status == "error" else result
+        finally:
+            for shard in busy:
+                self.router_connection_locks[shard].release()
+        return results
+
+    def product_stock(self, product_id: str) -> int:
+        """
+        Returns the shared stock of a catalog product.
+        """
+        if product_id not in self.router_rows:
+            raise ValueError("Product not found.")
+        return self.router_stock[self.router_rows[product_id]]
+
+    def close(self) -> None:
+        """
+        Stops every shard process.
+        """
+        for shard, connection in enumerate(self.router_connections):
+            with self.router_connection_locks[shard]:
+                try:
+                    connection.send(("stop", ()))
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+        for process in self.router_processes:
+            process.join()
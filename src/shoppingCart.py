@@ -1,18 +1,37 @@
-import uuid
 from src.product import Product
+from src.reservation import ReservationEngine, DEFAULT_RESERVATIONS
+from src.idGenerator import new_id
+from src.customerType import CustomerType
 
 class ShoppingCart:
     """
     Represents a shopping cart containing multiple products.
+
+    Lines are kept in an insertion-ordered dict keyed by product_id, so adding and
+    removing a product takes constant time. Running totals for both customer types
+    are updated as lines change. Every line is registered with its product's store
+    row, so repricing a product moves the totals of just the carts holding it.
+
+    Stock is taken through a ReservationEngine, so concurrent carts cannot oversell,
+    and lines whose reservation expires are dropped from the cart by the engine.
     """
 
-    def __init__(self, customer_id: str):
+    def __init__(self, customer_id: str, reservations: ReservationEngine = None, cart_id: str = None):
         """
-        Initializes a new shopping cart.
+        Initializes a new shopping cart. A new unique ID is generated unless cart_id is given.
         """
-        self.cart_id = uuid.uuid4().hex
+        self.cart_id = cart_id or new_id()
         self.customer_id = customer_id
-        self.items = []  # List of tuples (Product, quantity)
+        self.cart_reservations = reservations or DEFAULT_RESERVATIONS
+        self.cart_lines = {}  # Maps product_id to [Product, quantity]
+        self.cart_totals = {CustomerType.INDIVIDUAL: 0.0, CustomerType.RETAIL: 0.0}
+
+    @property
+    def items(self) -> list:
+        """
+        Returns the cart contents as a list of (Product, quantity) tuples.
+        """
+        return [(line[0], line[1]) for line in self.cart_lines.values()]
 
     def add_item(self, product: Product, qty: int) -> bool:
         """
@@ -24,53 +43,118 @@ class ShoppingCart:
         if product.product_stock < qty:
             raise ValueError(f"Not enough stock available for {product.product_name}.")
 
-        for idx, (p, q) in enumerate(self.items):
-            if p.product_id == product.product_id:
-                new_qty = q + qty
-                if product.product_stock < new_qty:
-                    raise ValueError(f"Only {product.product_stock} available for {product.product_name}.")
-                self.items[idx] = (p, new_qty)
-                product.update_stock(-qty)  # Reduce stock
-                return True
-
-        self.items.append((product, qty))
-        product.update_stock(-qty)  # Reduce stock
+        line = self.cart_lines.get(product.product_id)
+        if line is not None:
+            new_qty = line[1] + qty
+            if product.product_stock < new_qty:
+                raise ValueError(f"Only {product.product_stock} available for {product.product_name}.")
+            self.cart_reservations.reserve(product, qty, self)  # Reduce stock
+            self._set_line(product, new_qty)
+            return True
+
+        self.cart_reservations.reserve(product, qty, self)  # Reduce stock
+        self._set_line(product, qty)
+        return True
+
+    def add_items(self, lines: list) -> bool:
+        """
+        Adds several (Product, quantity) lines, reserving stock for all of them or none.
+        """
+        for _, qty in lines:
+            if qty <= 0:
+                raise ValueError("Quantity must be greater than zero.")
+
+        self.cart_reservations.reserve_many(lines, self)
+        for product, qty in lines:
+            line = self.cart_lines.get(product.product_id)
+            self._set_line(product, qty + (line[1] if line else 0))
         return True
 
     def remove_item(self, product: Product) -> bool:
         """
         Removes an item from the cart.
         """
-        for p, q in self.items:
-            if p.product_id == product.product_id:
-                product.update_stock(q)  # Restore stock before removing item
-                break
+        line = self.cart_lines.pop(product.product_id, None)
+        if line is not None:
+            self.cart_reservations.release(product, line[1], self)  # Restore stock before removing item
+            product.product_store.remove_cart_line(product.product_row, self)
+            self._add_to_totals(product, -line[1])
+        return True
 
-        self.items = [(p, q) for (p, q) in self.items if p.product_id != product.product_id]
+    def drop_line(self, product: Product) -> bool:
+        """
+        Removes a line without returning its stock, for reservations that have expired.
+        """
+        line = self.cart_lines.pop(product.product_id, None)
+        if line is not None:
+            product.product_store.remove_cart_line(product.product_row, self)
+            self._add_to_totals(product, -line[1])
         return True
 
-    def calculate_total(self, customer_type: str) -> float:
+    def _set_line(self, product: Product, qty: int) -> None:
         """
-        Calculates the total cost of items in the cart.
+        Stores a line's quantity and updates the running totals.
         """
-        return sum(product.get_price(customer_type) * qty for product, qty in self.items)
+        line = self.cart_lines.get(product.product_id)
+        if line is None:
+            line = self.cart_lines[product.product_id] = [product, qty]
+            product.product_store.add_cart_line(product.product_row, self, line)
+            self._add_to_totals(product, qty)
+        else:
+            old_qty, line[1] = line[1], qty
+            self._add_to_totals(product, qty - old_qty)
+
+    def _add_to_totals(self, product: Product, change: int) -> None:
+        """
+        Adds change units of a product to the running totals at its current prices.
+        """
+        tables, row = product.product_store.store_price_tables, product.product_row
+        self.cart_totals[CustomerType.INDIVIDUAL] += tables[CustomerType.INDIVIDUAL][row] * change
+        self.cart_totals[CustomerType.RETAIL] += tables[CustomerType.RETAIL][row] * change
+
+    def _line_repriced(self, line: list, old_individual: float, old_retail: float) -> None:
+        """
+        Moves the running totals from a line's old unit prices to its product's current ones.
+        """
+        product, qty = line[0], line[1]
+        tables, row = product.product_store.store_price_tables, product.product_row
+        self.cart_totals[CustomerType.INDIVIDUAL] += (tables[CustomerType.INDIVIDUAL][row] - old_individual) * qty
+        self.cart_totals[CustomerType.RETAIL] += (tables[CustomerType.RETAIL][row] - old_retail) * qty
+
+    def calculate_total(self, customer_type: CustomerType) -> float:
+        """
+        Calculates the total cost of items in the cart, rounded to cents.
+        """
+        if not self.cart_lines:
+            return 0.0  # Avoid returning floating-point residue from earlier removals
+        # The running total is a float sum of many line changes, so drop the residue it collects
+        return round(self.cart_totals[CustomerType.parse(customer_type)], 2)
 
     def view_cart(self) -> str:
         """
         Displays the contents of the cart.
         """
-        if not self.items:
+        if not self.cart_lines:
             return "Cart is empty."
-        
+
         cart_details = "\n".join(
-            f"{product.product_name} (x{qty}) - ${product.get_price('individual') * qty:.2f}"
-            for product, qty in self.items
+            f"{product.product_name} (x{qty}) - ${product.get_price(CustomerType.INDIVIDUAL) * qty:.2f}"
+            for product, qty in self.cart_lines.values()
         )
-        return f"Shopping Cart:\n{cart_details}\nTotal: ${self.calculate_total('individual'):.2f}"
+        return f"Shopping Cart:\n{cart_details}\nTotal: ${self.calculate_total(CustomerType.INDIVIDUAL):.2f}"
 
     def clear_cart(self) -> bool:
         """
         Clears the cart of all items.
         """
-        self.items = []
-        return True
\ No newline at end of file
+        self._detach_lines()
+        self.cart_lines = {}
+        self.cart_totals = {CustomerType.INDIVIDUAL: 0.0, CustomerType.RETAIL: 0.0}
+        return True
+
+    def _detach_lines(self) -> None:
+        """
+        Stops the product stores repricing this cart's lines, once it is cleared or checked out.
+        """
+        for product, _ in self.cart_lines.values():
+            product.product_store.remove_cart_line(product.product_row, self)
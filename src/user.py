@@ -1,6 +1,10 @@
-import uuid
+import hmac
 import hashlib
+import secrets
 from src.helperFunctions import is_valid_email
+from src.idGenerator import new_id
+
+PASSWORD_SCHEME = "pbkdf2_sha256"  # Identifies the current hash format in stored hashes
 
 class User:
     """
@@ -10,9 +14,14 @@ class User:
         user_id (str): Unique identifier for the user.
         username (str): Username of the user.
         email (str): Email address of the user.
-        password_hash (str): Hashed password for security.
+        password_hash (str): Salted hash in the form "pbkdf2_sha256$iterations$salt$hash".
+
+    Hashes made by older versions (unsalted SHA-256 hex digests) or with fewer
+    iterations than password_iterations are replaced on the next successful login.
     """
 
+    password_iterations = 600_000  # PBKDF2 work factor for new hashes
+
     def __init__(self, username: str, password: str, email: str):
         """
         Initializes a new user instance.
@@ -25,19 +34,48 @@ class User:
         if not is_valid_email(email):
             raise ValueError("Invalid email format.")
         
-        self.user_id = uuid.uuid4().hex
+        self.user_id = new_id()
         self.username = username
         self.email = email
         self.password_hash = self._hash_password(password)
 
     def _hash_password(self, password: str) -> str:
         """
-        Hashes the password using SHA-256.
+        Hashes the password using PBKDF2-SHA256 with a random salt.
+        """
+        salt = secrets.token_hex(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), self.password_iterations)
+        return f"{PASSWORD_SCHEME}${self.password_iterations}${salt}${digest.hex()}"
+
+    def verify_password(self, password: str) -> bool:
+        """
+        Checks a password against the stored hash, whatever version produced it.
+        """
+        if "$" not in self.password_hash:
+            # Legacy unsalted SHA-256 hex digest
+            digest = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(digest, self.password_hash)
+
+        scheme, iterations, salt, expected = self.password_hash.split("$")
+        if scheme != PASSWORD_SCHEME:
+            return False
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(iterations))
+        return hmac.compare_digest(digest.hex(), expected)
+
+    def needs_rehash(self) -> bool:
+        """
+        Returns True if the stored hash is older or weaker than the current format.
         """
-        return hashlib.sha256(password.encode()).hexdigest()
+        parts = self.password_hash.split("$")
+        return len(parts) != 4 or parts[0] != PASSWORD_SCHEME or int(parts[1]) < self.password_iterations
 
     def login(self, password: str) -> bool:
         """
         Authenticates a user by checking the password.
+        Outdated hashes are upgraded to the current format on success.
         """
-        return self._hash_password(password) == self.password_hash
+        if not self.verify_password(password):
+            return False
+        if self.needs_rehash():
+            self.password_hash = self._hash_password(password)
+        return True
@@ -1,10 +1,43 @@
 import pytest
 import datetime
+import asyncio
+import gc
+import hashlib
+import json
+import os
+import random
+import threading
 from time import sleep
 from src.EMarketSystem import EMarketSystem
-from src.customer import Customer, IndividualCustomer
+from src.user import User
+from src.customer import Customer, IndividualCustomer, RetailCustomer
+from src.customerType import CustomerType
 from src.product import Product
 from src.coupon import Coupon
+from src.couponRegistry import CouponRegistry
+from src.search import Search
+from src.shoppingCart import ShoppingCart
+from src.server import EMarketServer
+from src.session import SessionManager
+from src import main as cli
+from src.main import addAdminUser, openSystem
+from src import catalogLoader
+from src import catalogVersion
+from src.journal import Journal, export_state, import_state, product_from_dict, product_to_dict
+from src.binaryCatalog import convert_json_catalog, write_catalog
+from src.shardRouter import ShardRouter, shard_of
+from benchmarks import suite
+from src.metrics import MetricsRegistry, instrument_system
+from src.order import Order
+from src.delivery import Delivery
+from src.idGenerator import IdGenerator, encode_id, encode_ids, decode_id, id_timestamp, set_generator
+
+@pytest.fixture(autouse=True)
+def fast_password_hashing(monkeypatch):
+    """
+    Keeps PBKDF2 cheap in tests; the production work factor only slows the suite down.
+    """
+    monkeypatch.setattr(User, "password_iterations", 1000)
 
 @pytest.fixture
 def system():
@@ -298,3 +331,1851 @@ def test_search_category_found(system):
     assert any(prod.product_name == "Cheese" for prod in results)
 
 
+
+# 29) --------------------------
+def test_search_index_matches_linear_search(system):
+    names = ["Banana", "Bandana", "Laptop", "Lap Desk", "BANANA bread", "ab", "Cab", "Nan"]
+    for idx, name in enumerate(names):
+        system.add_product(Product(name, "Desc", 5.0, 4.0, 1), f"Cat{idx % 3}")
+
+    linear = Search(list(system.products.values()), list(system.categories.values()))
+    for query in ["", "a", "AN", "ban", "anana", "nan", " lap ", "p d", "bread", "zzz", "bandanas"]:
+        assert system.search_products(query) == linear.search_by_name(query)
+
+# 30) --------------------------
+def test_search_index_replaces_readded_product(system):
+    prod = Product("Kettle", "Desc", 20.0, 15.0, 3)
+    system.add_product(prod, "Kitchen")
+    prod.product_name = "Toaster"
+    system.add_product(prod, "Kitchen")
+    assert system.search_products("kettle") == []
+    assert system.search_products("toast") == [prod]
+
+# 31) --------------------------
+def test_register_customer_email_case_insensitive(system):
+    system.register_customer(Customer("u1", "passA", "Case@Example.com", "One", "A1", "1234567890"))
+    with pytest.raises(ValueError) as exc:
+        system.register_customer(Customer("u2", "passB", "case@EXAMPLE.com", "Two", "A2", "4567890123"))
+    assert "Email already registered" in str(exc.value)
+
+# 32) --------------------------
+def test_update_profile_email_uniqueness(system):
+    cust1 = Customer("u1", "passA", "first@example.com", "One", "A1", "1234567890")
+    cust2 = Customer("u2", "passB", "second@example.com", "Two", "A2", "4567890123")
+    system.register_customer(cust1)
+    system.register_customer(cust2)
+
+    with pytest.raises(ValueError) as exc:
+        cust2.update_profile("", "", "", "FIRST@example.com")
+    assert "Email already registered" in str(exc.value)
+    assert cust2.customer_email == "second@example.com"
+
+    # Changing email frees the old address and claims the new one
+    cust1.update_profile("", "", "", "renamed@example.com")
+    system.register_customer(Customer("u3", "passC", "first@example.com", "Three", "A3", "7894561230"))
+    with pytest.raises(ValueError):
+        system.register_customer(Customer("u4", "passD", "renamed@example.com", "Four", "A4", "3216549870"))
+
+# 33) --------------------------
+def test_category_lookup_case_insensitive(system):
+    p1 = Product("Milk", "Dairy", 2.0, 1.8, 20)
+    p2 = Product("Butter", "Dairy", 4.0, 3.5, 20)
+    system.add_product(p1, "Dairy")
+    system.add_product(p2, "DAIRY")
+    assert len(system.categories) == 1
+    assert system.search_category("  dairy ") == [p1, p2]
+    assert system.search_category("Bakery") == []
+
+# 34) --------------------------
+def test_load_products_json_array_streaming(system, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogLoader, "CHUNK_SIZE", 7)  # Force records to span many reads
+    records = [
+        {"name": "Laptop", "description": "Fast", "price": 1200.0, "cost": 1100.0, "stock": 10, "category": "Electronics"},
+        {"name": "Bad Price", "description": "Broken", "price": -1.0, "cost": 1.0, "stock": 1, "category": "Misc"},
+        {"name": "Bananas", "description": "Fresh", "price": 1.5, "cost": 1.0, "stock": 100, "category": "grocery"},
+        {"name": "Apples", "description": "Crisp", "price": 2.0, "cost": 1.5, "stock": 50, "category": "Grocery"},
+    ]
+    path = tmp_path / "products.json"
+    path.write_text(json.dumps(records, indent=2))
+
+    loaded, errors = catalogLoader.load_products(system, str(path), batch_size=2)
+    assert loaded == 3
+    assert errors == [(2, "Bad Price", "Prices cannot be negative.")]
+    assert len(system.categories) == 2
+    assert [p.product_name for p in system.search_category("Grocery")] == ["Bananas", "Apples"]
+
+# 35) --------------------------
+def test_load_products_json_lines_reports_bad_records(system, tmp_path):
+    path = tmp_path / "products.jsonl"
+    path.write_text(
+        '{"name": "Desk", "description": "Oak", "price": 300, "cost": 250, "stock": 4, "category": "Furniture"}\n'
+        '{"name": "Chair", "description": \n'
+        '\n'
+        '{"name": "Lamp", "description": "LED", "price": 40, "cost": 30, "stock": 8}\n'
+        '{"name": "Stool", "description": "Pine", "price": 60, "cost": 45, "stock": 6, "category": "Furniture"}\n'
+    )
+    loaded, errors = catalogLoader.load_products(system, str(path))
+    assert loaded == 2
+    assert [(number, name) for number, name, _ in errors] == [(2, None), (3, "Lamp")]
+    assert "Missing field" in errors[1][2]
+    assert len(system.search_category("furniture")) == 2
+
+# 36) --------------------------
+def test_product_store_backs_product_fields(system):
+    prod = Product("Monitor", "27 inch", 300.0, 250.0, 4)
+    prod.set_discount(10)
+    system.add_product(prod, "Electronics")
+
+    row = prod.product_row
+    assert prod.product_store is system.product_store
+    assert system.product_store.store_stock[row] == 4
+    assert system.product_store.store_discounts[row] == 10
+
+    prod.update_stock(-3)
+    assert system.product_store.store_stock[row] == 1
+    assert prod.product_stock == 1
+    assert "Discount: 10%" in prod.get_details()
+
+# 37) --------------------------
+def test_price_products_matches_get_price(system):
+    products = [Product(f"Item{i}", "Desc", 10.0 + i * 1.37, 8.0 + i * 0.91, 5) for i in range(20)]
+    for i, prod in enumerate(products):
+        prod.set_discount(i * 5)
+        system.add_product(prod, "Bulk")
+
+    ids = [p.product_id for p in reversed(products)]
+    for customer_type in ("individual", "retail"):
+        expected = [system.products[pid].get_price(customer_type) for pid in ids]
+        assert system.price_products(ids, customer_type) == expected
+
+    with pytest.raises(ValueError) as exc:
+        system.price_products(["missing"], "retail")
+    assert "Product not found" in str(exc.value)
+
+# 38) --------------------------
+def test_cart_running_totals(system):
+    cust = IndividualCustomer("totals", "pass", "totals@example.com", "Totals", "Addr", "9999999999")
+    p1 = Product("Pen", "Desc", 2.5, 2.0, 100)
+    p2 = Product("Notebook", "Desc", 4.0, 3.0, 100)
+    p2.set_discount(25)
+    system.register_customer(cust)
+    system.add_product(p1, "Stationery")
+    system.add_product(p2, "Stationery")
+
+    cart = system.shopping_carts[cust.user_id]
+    cart.add_item(p1, 4)
+    cart.add_item(p2, 2)
+    cart.add_item(p1, 1)
+    assert cart.items == [(p1, 5), (p2, 2)]
+    assert cart.calculate_total("individual") == pytest.approx(5 * 2.5 + 2 * 3.0)
+    assert cart.calculate_total("retail") == pytest.approx(5 * 2.0 + 2 * 2.25)
+
+    cart.remove_item(p1)
+    assert cart.items == [(p2, 2)]
+    assert p1.product_stock == 100
+    assert cart.calculate_total("retail") == pytest.approx(4.5)
+    assert "Total: $6.00" in cart.view_cart()
+
+    cart.remove_item(p2)
+    assert cart.calculate_total("individual") == 0.0
+    assert cart.view_cart() == "Cart is empty."
+
+# 39) --------------------------
+def test_concurrent_reservations_never_oversell(system):
+    prod = Product("Console", "Desc", 500.0, 450.0, 100)
+    system.add_product(prod, "Electronics")
+    carts = [ShoppingCart(f"cust{i}", system.reservations) for i in range(16)]
+    barrier = threading.Barrier(len(carts))
+    reserved = []
+
+    def shop(cart):
+        barrier.wait()
+        for _ in range(20):
+            try:
+                cart.add_item(prod, 1)
+                reserved.append(1)
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=shop, args=(cart,)) for cart in carts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(reserved) == 100
+    assert prod.product_stock == 0
+    assert sum(qty for cart in carts for _, qty in cart.items) == 100
+
+# 40) --------------------------
+def test_add_items_all_or_nothing(system):
+    p1 = Product("Tent", "Desc", 120.0, 100.0, 5)
+    p2 = Product("Stove", "Desc", 60.0, 50.0, 1)
+    system.add_product(p1, "Outdoor")
+    system.add_product(p2, "Outdoor")
+    cart = ShoppingCart("camper", system.reservations)
+
+    with pytest.raises(ValueError) as exc:
+        cart.add_items([(p1, 2), (p2, 1), (p2, 1)])  # Two stoves wanted, one in stock
+    assert "Not enough stock available for Stove" in str(exc.value)
+    assert (p1.product_stock, p2.product_stock) == (5, 1)
+    assert cart.items == []
+
+    cart.add_items([(p1, 2), (p2, 1)])
+    assert (p1.product_stock, p2.product_stock) == (3, 0)
+    assert cart.items == [(p1, 2), (p2, 1)]
+
+# 41) --------------------------
+def test_abandoned_cart_reservation_expires():
+    now = [0.0]
+    system = EMarketSystem(reservation_ttl=600, clock=lambda: now[0])
+    shopper = IndividualCustomer("idle", "pass", "idle@example.com", "Idle", "Addr", "9999999999")
+    buyer = IndividualCustomer("buyer", "pass", "buyer@example.com", "Buyer", "Addr", "8888888888")
+    prod = Product("Drone", "Desc", 300.0, 250.0, 3)
+    system.register_customer(shopper)
+    system.register_customer(buyer)
+    system.add_product(prod, "Electronics")
+
+    system.add_to_cart(shopper.user_id, prod.product_id, 3)
+    assert prod.product_stock == 0
+
+    now[0] = 599.0
+    assert system.expire_reservations() == 0
+    with pytest.raises(ValueError):
+        system.add_to_cart(buyer.user_id, prod.product_id, 1)
+
+    # Once the hold lapses the stock comes back and the line leaves the idle cart
+    now[0] = 600.0
+    system.add_to_cart(buyer.user_id, prod.product_id, 1)
+    assert prod.product_stock == 2
+    assert system.shopping_carts[shopper.user_id].items == []
+    with pytest.raises(ValueError) as exc:
+        system.checkout_order(shopper.user_id)
+    assert "Shopping cart is empty" in str(exc.value)
+
+# 42) --------------------------
+def test_checkout_confirms_reservation():
+    now = [0.0]
+    system = EMarketSystem(reservation_ttl=60, clock=lambda: now[0])
+    cust = IndividualCustomer("fast", "pass", "fast@example.com", "Fast", "Addr", "9999999999")
+    prod = Product("Camera", "Desc", 400.0, 350.0, 5)
+    system.register_customer(cust)
+    system.add_product(prod, "Electronics")
+
+    system.add_to_cart(cust.user_id, prod.product_id, 2)
+    now[0] = 50.0
+    system.add_to_cart(cust.user_id, prod.product_id, 1)  # Refreshes the hold
+    now[0] = 100.0
+    assert system.expire_reservations() == 0
+    system.checkout_order(cust.user_id)
+
+    now[0] = 1000.0
+    assert system.expire_reservations() == 0
+    assert prod.product_stock == 2
+
+def _http_request(method: str, path: str, payload: dict = None, token: str = None) -> bytes:
+    body = json.dumps(payload).encode() if payload is not None else b""
+    auth = f"Authorization: Bearer {token}\r\n" if token else ""
+    return (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n{auth}Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+async def _read_http_response(reader) -> tuple:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    return status, json.loads(await reader.readexactly(length))
+
+# 43) --------------------------
+def test_server_pipelined_keep_alive_requests(system):
+    system.add_product(Product("Teapot", "Ceramic", 25.0, 20.0, 5), "Kitchen")
+    addAdminUser(system)
+    server = EMarketServer(system, port=0)
+    register = {"username": "web", "password": "pw", "email": "web@example.com", "name": "Web User",
+                "address": "Addr", "phone": "9999999999", "customer_type": "individual"}
+
+    async def scenario():
+        await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        # Send everything up front; responses must come back in request order
+        writer.write(
+            _http_request("POST", "/register", register)
+            + _http_request("POST", "/login", {"username": "web", "password": "pw"})
+            + _http_request("POST", "/login", {"username": "admin", "password": "admin"})
+            + _http_request("GET", "/search?q=tea")
+        )
+        await writer.drain()
+        responses = [await _read_http_response(reader) for _ in range(4)]
+
+        token, admin_token = responses[1][1]["token"], responses[2][1]["token"]
+        product_id = responses[3][1]["products"][0]["product_id"]
+        writer.write(
+            _http_request("POST", "/cart", {"product_id": product_id, "quantity": 2}, token)
+            + _http_request("POST", "/checkout", {}, token)
+            + _http_request("POST", "/cart", {"product_id": product_id, "quantity": 0}, token)
+            + _http_request("POST", "/cart", {"product_id": product_id, "quantity": 1})
+            + _http_request("GET", "/nowhere")
+        )
+        await writer.drain()
+        responses += [await _read_http_response(reader) for _ in range(5)]
+
+        order_id = responses[5][1]["order_id"]
+        writer.write(
+            _http_request("POST", "/admin/delivery", {"order_id": order_id, "status": "Shipped"}, token)
+            + _http_request("POST", "/admin/delivery", {"order_id": order_id, "status": "Shipped"}, admin_token)
+            + _http_request("GET", f"/delivery/{order_id}")
+            + _http_request("POST", "/logout", {}, token)
+            + _http_request("POST", "/checkout", {}, token)
+        )
+        await writer.drain()
+        responses += [await _read_http_response(reader) for _ in range(5)]
+        writer.close()
+        await server.close()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert [status for status, _ in responses] == [201, 200, 200, 200, 200, 201, 400, 401, 404, 403, 200, 200, 200, 401]
+    assert responses[5][1]["total_amount"] == pytest.approx(50.0)
+    assert "Quantity must be greater than zero" in responses[6][1]["error"]
+    assert responses[11][1]["status"] == "Shipped"
+
+# 44) --------------------------
+def test_server_rejects_connections_over_limit(system):
+    server = EMarketServer(system, port=0, max_connections=1)
+
+    async def scenario():
+        await server.start()
+        first_reader, first_writer = await asyncio.open_connection("127.0.0.1", server.port)
+        first_writer.write(_http_request("GET", "/search?q=x"))
+        await _read_http_response(first_reader)  # First connection is now being served
+
+        second_reader, second_writer = await asyncio.open_connection("127.0.0.1", server.port)
+        second_writer.write(_http_request("GET", "/search?q=x"))
+        rejected = await _read_http_response(second_reader)
+        first_writer.close()
+        second_writer.close()
+        await server.close()
+        return rejected
+
+    assert asyncio.run(scenario())[0] == 503
+
+# 45) --------------------------
+def test_session_tokens_resolve_and_revoke():
+    now = [0.0]
+    system = EMarketSystem(clock=lambda: now[0])
+    system.sessions = SessionManager(capacity=2, ttl=100, clock=lambda: now[0])
+    cust = Customer("sess", "passA", "sess@example.com", "Session", "A1", "1234567890")
+    system.register_customer(cust)
+
+    with pytest.raises(ValueError) as exc:
+        system.create_session("sess", "wrong")
+    assert "Incorrect password" in str(exc.value)
+
+    token = system.create_session("sess", "passA")
+    assert system.get_customer_by_token(token) is cust
+
+    # Each use slides the expiry forward
+    now[0] = 90.0
+    assert system.get_customer_by_token(token) is cust
+    now[0] = 180.0
+    assert system.get_customer_by_token(token) is cust
+    now[0] = 281.0
+    with pytest.raises(ValueError) as exc:
+        system.get_customer_by_token(token)
+    assert "Session expired" in str(exc.value)
+
+    token = system.create_session("sess", "passA")
+    assert system.end_session(token)
+    with pytest.raises(ValueError) as exc:
+        system.get_customer_by_token(token)
+    assert "Invalid session token" in str(exc.value)
+
+# 46) --------------------------
+def test_session_store_evicts_least_recently_used():
+    now = [0.0]
+    sessions = SessionManager(capacity=2, ttl=10, clock=lambda: now[0])
+    first, second = sessions.create("first"), sessions.create("second")
+    sessions.resolve(first)  # second is now the least recently used
+    third = sessions.create("third")
+    assert len(sessions) == 2
+    assert sessions.resolve(first) == "first" and sessions.resolve(third) == "third"
+    with pytest.raises(ValueError):
+        sessions.resolve(second)
+
+    now[0] = 5.0
+    sessions.resolve(third)
+    now[0] = 12.0
+    assert sessions.purge_expired() == 1
+    assert sessions.resolve(third) == "third"
+
+# 47) --------------------------
+def test_password_hash_is_salted_and_versioned(system):
+    cust1 = Customer("salt1", "samePass", "salt1@example.com", "One", "A1", "1234567890")
+    cust2 = Customer("salt2", "samePass", "salt2@example.com", "Two", "A2", "4567890123")
+    assert cust1.password_hash.startswith("pbkdf2_sha256$1000$")
+    assert cust1.password_hash != cust2.password_hash
+    assert cust1.login("samePass") and not cust1.login("otherPass")
+
+# 48) --------------------------
+def test_legacy_password_hash_upgraded_on_login(system, monkeypatch):
+    cust = Customer("legacy", "oldPass", "legacy@example.com", "Legacy", "A1", "1234567890")
+    cust.password_hash = hashlib.sha256(b"oldPass").hexdigest()
+    system.register_customer(cust)
+
+    with pytest.raises(ValueError):
+        system.login_customer("legacy", "wrongPass")
+    assert "$" not in cust.password_hash  # A failed login never rewrites the hash
+
+    assert system.login_customer("legacy", "oldPass") is cust
+    assert cust.password_hash.startswith("pbkdf2_sha256$1000$")
+
+    # Raising the work factor upgrades existing hashes too
+    monkeypatch.setattr(User, "password_iterations", 2000)
+    assert asyncio.run(system.login_customer_async("legacy", "oldPass")) is cust
+    assert cust.password_hash.startswith("pbkdf2_sha256$2000$")
+
+# 49) --------------------------
+def test_async_register_and_login(system):
+    async def scenario():
+        cust = await system.register_customer_async(
+            IndividualCustomer, "async", "asyncPass", "async@example.com", "Async", "Addr", "9999999999")
+        results = await asyncio.gather(
+            system.login_customer_async("async", "asyncPass"),
+            system.login_customer_async("async", "badPass"),
+            return_exceptions=True,
+        )
+        return cust, results
+
+    cust, (ok, failed) = asyncio.run(scenario())
+    assert ok is cust
+    assert isinstance(failed, ValueError) and "Incorrect password" in str(failed)
+
+# 50) --------------------------
+def _journaled_session(system):
+    cust = IndividualCustomer("durable", "durPass", "durable@example.com", "Dur", "Addr", "1234567890")
+    system.register_customer(cust)
+    p1 = system.add_product(Product("Kettle", "Steel kettle", 40.0, 30.0, 10), "Kitchen")
+    p2, p3 = system.add_products_bulk([
+        (Product("Toaster", "Two slots", 25.0, 20.0, 5), "Kitchen"),
+        (Product("Lamp", "Desk lamp", 15.0, 10.0, 8), "Home"),
+    ])
+    system.add_coupon(Coupon("DUR10", 10, datetime.date.today() + datetime.timedelta(days=3)))
+    system.add_to_cart(cust.user_id, p1.product_id, 2)
+    system.add_to_cart(cust.user_id, p2.product_id, 1)
+    order = system.checkout_order(cust.user_id, "DUR10")
+    system.update_delivery_status(order.order_id, "Shipped")
+    system.add_to_cart(cust.user_id, p3.product_id, 3)  # Left in the cart
+    return cust, order
+
+@pytest.mark.parametrize("snapshot_every", [0, 4])
+def test_journal_recovers_state(tmp_path, snapshot_every):
+    journal = Journal(str(tmp_path), snapshot_every=snapshot_every)
+    system = EMarketSystem(journal=journal)
+    cust, order = _journaled_session(system)
+    expected = export_state(system)
+    journal.close()
+
+    recovered = EMarketSystem.recover(Journal(str(tmp_path), snapshot_every=snapshot_every))
+    assert export_state(recovered) == expected
+    assert recovered.login_customer("durable", "durPass").user_id == cust.user_id
+    assert recovered.track_delivery(order.order_id).track_delivery() == "Shipped"
+    lamp = recovered.search_products("lamp")[0]
+    assert lamp.product_stock == 5
+    assert recovered.shopping_carts[cust.user_id].calculate_total("individual") == 45.0
+    recovered.journal.close()
+
+# 51) --------------------------
+def test_journal_replays_expiry_and_drops_torn_tail(tmp_path):
+    now = [0.0]
+    journal = Journal(str(tmp_path), group_commit=False)
+    system = EMarketSystem(reservation_ttl=10, clock=lambda: now[0], journal=journal)
+    cust = IndividualCustomer("tail", "tailPass", "tail@example.com", "Tail", "Addr", "1234567890")
+    system.register_customer(cust)
+    product = system.add_product(Product("Mug", "Tea mug", 5.0, 4.0, 6), "Kitchen")
+    system.add_to_cart(cust.user_id, product.product_id, 4)
+    now[0] = 11.0
+    assert system.expire_reservations() == 1
+    journal.close()
+
+    # A crash in the middle of a write leaves a partial last line behind
+    with open(tmp_path / "journal.log", "a", encoding="utf-8") as file:
+        file.write('{"seq": 99, "op": "add_to')
+
+    recovered = EMarketSystem.recover(Journal(str(tmp_path), group_commit=False))
+    assert recovered.products[product.product_id].product_stock == 6
+    assert recovered.shopping_carts[cust.user_id].items == []
+    recovered.add_to_cart(cust.user_id, product.product_id, 1)
+    recovered.journal.close()
+    assert EMarketSystem.recover(Journal(str(tmp_path))).products[product.product_id].product_stock == 5
+
+# 52) --------------------------
+def test_binary_catalog_materializes_lazily(system, tmp_path):
+    records = [
+        {"name": "Laptop", "description": "Fast", "price": 1200.0, "cost": 1100.0, "stock": 10, "category": "Electronics"},
+        {"name": "Bad Stock", "description": "Broken", "price": 5.0, "cost": 4.0, "stock": -1, "category": "Misc"},
+        {"name": "Bananas", "description": "Fresh \u00e9t\u00e9", "price": 1.5, "cost": 1.0, "stock": 100, "category": "Grocery"},
+        {"name": "Tablet", "description": "Light", "price": 500.0, "cost": 450.0, "stock": 3, "category": "Electronics"},
+    ]
+    source = tmp_path / "products.json"
+    source.write_text(json.dumps(records))
+    written, errors = convert_json_catalog(str(source), str(tmp_path / "products.emcat"))
+    assert written == 3
+    assert [(number, name) for number, name, _ in errors] == [(2, "Bad Stock")]
+
+    # Snapshot a system with known IDs, then serve it from the snapshot
+    catalogLoader.load_products(system, str(source))
+    system.products[system.search_products("Tablet")[0].product_id].set_discount(10)
+    write_catalog(str(tmp_path / "system.emcat"), system)
+    fresh = EMarketSystem()
+    assert fresh.open_catalog(str(tmp_path / "system.emcat")) == 3
+    assert len(fresh.products) == 3 and dict.__len__(fresh.products) == 0
+    assert set(fresh.categories) == set(system.categories)
+
+    tablet = system.search_products("Tablet")[0]
+    loaded = fresh.products[tablet.product_id]
+    assert dict.__len__(fresh.products) == 1
+    assert (loaded.product_name, loaded.product_stock, loaded.get_price("individual")) == ("Tablet", 3, 450.0)
+    assert fresh.products[tablet.product_id] is loaded
+    assert "missing" not in fresh.products and fresh.products.get("missing") is None
+
+    assert fresh.search_products("tab") == [loaded]
+    assert fresh.search_products("bananas")[0].product_description == "Fresh \u00e9t\u00e9"
+    assert [p.product_name for p in fresh.search_category("electronics")] == ["Laptop", "Tablet"]
+
+    cust = IndividualCustomer("snap", "snapPass", "snap@example.com", "Snap", "Addr", "1234567890")
+    fresh.register_customer(cust)
+    fresh.add_to_cart(cust.user_id, tablet.product_id, 2)
+    fresh.checkout_order(cust.user_id)
+    assert loaded.product_stock == 1
+
+# 53) --------------------------
+def test_binary_catalog_rejects_other_files(system, tmp_path):
+    path = tmp_path / "products.emcat"
+    path.write_bytes(b"[" + b" " * 64 + b"]")
+    with pytest.raises(ValueError, match="Not a catalog snapshot"):
+        system.open_catalog(str(path))
+
+    write_catalog(str(path), system)
+    data = bytearray(path.read_bytes())
+    data[4] = 99  # Version field
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="Unsupported catalog snapshot version 99"):
+        system.open_catalog(str(path))
+
+# 54) --------------------------
+@pytest.fixture
+def sharded():
+    products = [(Product("Console", "Limited run", 400.0, 350.0, 5), "Gaming"),
+                (Product("Cable", "HDMI", 10.0, 8.0, 1000), "Gaming")]
+    router = ShardRouter(products, shards=3)
+    yield router, [product for product, _ in products]
+    router.close()
+
+def test_shard_router_routes_by_user_id(sharded):
+    router, (console, cable) = sharded
+    ids = [router.register_customer("individual", f"shard{i}", "pass", f"shard{i}@example.com",
+                                    "Shard", "Addr", "1234567890") for i in range(6)]
+    ids.append(router.register_customer("retail", "shardshop", "pass", "shop@example.com",
+                                        "Shop", "Addr", "1234567890", "LIC-1"))
+    with pytest.raises(ValueError, match="Username already exists"):
+        router.register_customer("individual", "shard0", "pass", "new@example.com", "N", "A", "1234567890")
+    with pytest.raises(ValueError, match="Email already registered"):
+        router.register_customer("individual", "other", "pass", "SHARD1@example.com", "N", "A", "1234567890")
+    with pytest.raises(ValueError, match="No shopping cart found"):
+        router.add_to_cart("unknown", cable.product_id, 1)
+
+    assert router.add_to_cart(ids[0], cable.product_id, 2)
+    order = router.checkout_order(ids[0])
+    assert (order["customer_id"], order["total_amount"]) == (ids[0], 20.0)
+    assert router.add_to_cart(ids[-1], cable.product_id, 1)
+    assert router.checkout_order(ids[-1])["total_amount"] == 8.0  # Retail pricing on its shard
+    assert router.product_stock(cable.product_id) == 997
+
+# 55) --------------------------
+def test_shard_router_never_oversells_shared_stock(sharded):
+    router, (console, cable) = sharded
+    ids = [router.register_customer("individual", f"buyer{i}", "pass", f"buyer{i}@example.com",
+                                    "Buyer", "Addr", "1234567890") for i in range(12)]
+    assert len({shard_of(user_id, 3) for user_id in ids}) > 1
+
+    results = router.run_batch([("add_to_cart", (user_id, console.product_id, 1)) for user_id in ids])
+    assert sum(result is True for result in results) == 5
+    assert all(isinstance(result, ValueError) for result in results if result is not True)
+    assert router.product_stock(console.product_id) == 0
+
+    orders = router.run_batch([("checkout_order", (user_id,)) for user_id in ids])
+    assert sum(isinstance(order, dict) for order in orders) == 5
+    assert router.product_stock(console.product_id) == 0
+
+# 56) --------------------------
+def test_benchmark_suite_reports_and_compares():
+    run = suite.run_suite([200], operations=50)
+    results = run["results"]["200"]
+    assert list(results) == suite.OPERATIONS
+    assert results["add_product"]["calls"] == 200 and results["register_customer"]["calls"] == 20
+    assert all(stats["calls"] > 0 and stats["p50_us"] <= stats["p99_us"] for stats in results.values())
+    json.dumps(run)  # Results must be serializable as they are
+
+    slower = json.loads(json.dumps(run))
+    slower["results"]["200"]["search_products"]["p50_us"] *= 1.5
+    rows = {row[1]: row for row in suite.compare(run, slower, threshold=0.2)}
+    assert rows["search_products"][-1] and rows["search_products"][4] == pytest.approx(1.5)
+    assert not any(row[-1] for name, row in rows.items() if name != "search_products")
+
+# 57) --------------------------
+@pytest.fixture
+def metrics():
+    registry = instrument_system(MetricsRegistry())
+    yield registry
+    registry.uninstrument()
+
+def test_metrics_count_calls_errors_and_latency(system, metrics):
+    cust = IndividualCustomer("metered", "pass", "metered@example.com", "Meter", "Addr", "1234567890")
+    system.register_customer(cust)
+    product = system.add_product(Product("Gauge", "Analog", 20.0, 15.0, 5), "Tools")
+    system.add_to_cart(cust.user_id, product.product_id, 2)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            system.add_to_cart(cust.user_id, product.product_id, 10)
+    system.checkout_order(cust.user_id)
+
+    text = metrics.export()
+    assert 'emarket_calls_total{method="EMarketSystem.add_to_cart"} 3' in text
+    assert 'emarket_errors_total{method="EMarketSystem.add_to_cart",message="Insufficient stock."} 2' in text
+    assert 'emarket_calls_total{method="Order.place_order"} 1' in text
+    assert 'emarket_calls_total{method="ShoppingCart.add_item"} 1' in text
+    assert 'emarket_call_duration_seconds_bucket{method="EMarketSystem.add_to_cart",le="+Inf"} 3' in text
+    assert 'emarket_call_duration_seconds_count{method="EMarketSystem.checkout_order"} 1' in text
+
+    # Histogram buckets are cumulative and end at the call count
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith('emarket_call_duration_seconds_bucket{method="EMarketSystem.add_to_cart"')]
+    assert buckets == sorted(buckets) and buckets[-1] == 3
+
+    metrics.reset()
+    assert 'emarket_calls_total{method="EMarketSystem.add_to_cart"} 0' in metrics.export()
+    assert "emarket_errors_total{" not in metrics.export()
+
+    metrics.uninstrument()
+    assert not hasattr(EMarketSystem.add_to_cart, "metrics_wrapped")
+    assert not hasattr(Order.place_order, "metrics_wrapped")
+
+# 58) --------------------------
+def test_metrics_counters_are_thread_safe(metrics):
+    stats = metrics.stats("EMarketSystem.track_delivery")
+    system = EMarketSystem()
+    threads = [threading.Thread(target=lambda: [system.track_delivery("none") for _ in range(2000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    calls, errors, buckets, total_ns = stats.snapshot()
+    assert calls == sum(buckets) == 16000 and errors == {} and total_ns > 0
+
+# 59) --------------------------
+def test_order_indexes_paginate_and_follow_cancellation(tmp_path):
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    product = system.add_product(Product("Pencil", "HB", 1.0, 0.5, 1000), "Stationery")
+    buyers = []
+    for i in range(3):
+        cust = IndividualCustomer(f"buyer{i}", "pass", f"buyer{i}@example.com", "Buyer", "Addr", "1234567890")
+        buyers.append(system.register_customer(cust).user_id)
+    placed = []
+    for i in range(9):
+        system.add_to_cart(buyers[i % 3], product.product_id, 1)
+        placed.append(system.checkout_order(buyers[i % 3]))
+
+    # Page through one customer's orders two at a time
+    pages, cursor = [], None
+    while True:
+        orders, cursor = system.get_orders(customer_id=buyers[0], limit=2, cursor=cursor)
+        pages.append(orders)
+        if cursor is None:
+            break
+    assert [o.order_id for page in pages for o in page] == [o.order_id for o in placed[0::3]]
+
+    system.cancel_order(placed[3].order_id)
+    placed[6].cancel_order()  # Cancelling through the order itself keeps the index in sync too
+    cancelled, cursor = system.get_orders(status="Cancelled")
+    assert cancelled == [placed[3], placed[6]] and cursor is None
+    assert system.get_orders(customer_id=buyers[0], status="Placed")[0] == [placed[0]]
+    assert len(system.get_orders(status="Placed", limit=100)[0]) == 7
+
+    later = system.get_orders(since=placed[5].order_placed_at, limit=100)[0]
+    assert later[0] is placed[5] and later[-1] is placed[8]
+    assert system.get_orders(customer_id="nobody") == ([], None)
+    with pytest.raises(ValueError, match="Order not found"):
+        system.cancel_order("missing")
+
+    # Logged cancellations survive recovery and rebuild the indexes
+    system.journal.close()
+    recovered = EMarketSystem.recover(Journal(str(tmp_path)))
+    assert [o.order_id for o in recovered.get_orders(status="Cancelled")[0]] == [placed[3].order_id]
+    recovered.journal.close()
+
+# 60) --------------------------
+def test_server_lists_own_orders(system):
+    addAdminUser(system)
+    server = EMarketServer(system, port=0)
+    cust = IndividualCustomer("lister", "pass", "lister@example.com", "Lister", "Addr", "1234567890")
+    system.register_customer(cust)
+    product = system.add_product(Product("Eraser", "Soft", 2.0, 1.0, 100), "Stationery")
+    for _ in range(3):
+        system.add_to_cart(cust.user_id, product.product_id, 1)
+        system.checkout_order(cust.user_id)
+    token = system.create_session("lister", "pass")
+    admin_token = system.create_session("admin", "admin")
+
+    status, payload = asyncio.run(server.dispatch("GET", "/orders?limit=2", b"", {"authorization": f"Bearer {token}"}))
+    assert status == 200 and len(payload["orders"]) == 2 and payload["next_cursor"] is not None
+    status, payload = asyncio.run(server.dispatch(
+        "GET", f"/orders?limit=2&cursor={payload['next_cursor']}", b"", {"authorization": f"Bearer {token}"}))
+    assert len(payload["orders"]) == 1 and payload["next_cursor"] is None
+    assert payload["orders"][0]["items"] == [{"product_id": product.product_id, "quantity": 1}]
+
+    status, payload = asyncio.run(server.dispatch("GET", "/orders", b"", {"authorization": f"Bearer {admin_token}"}))
+    assert len(payload["orders"]) == 3
+    status, payload = asyncio.run(server.dispatch("GET", "/orders", b""))
+    assert status == 401
+
+# 61) --------------------------
+def test_delivery_manager_bulk_updates_and_notifies(tmp_path):
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    product = system.add_product(Product("Stapler", "Metal", 5.0, 3.0, 100), "Stationery")
+    cust = IndividualCustomer("shipper", "pass", "shipper@example.com", "Shipper", "Addr", "1234567890")
+    system.register_customer(cust)
+    orders = []
+    for _ in range(4):
+        system.add_to_cart(cust.user_id, product.product_id, 1)
+        orders.append(system.checkout_order(cust.user_id))
+    batches = []
+    system.deliveries.subscribe(batches.append)
+
+    updated, errors = system.update_delivery_statuses([(orders[0].order_id, "Shipped"),
+                                                       (orders[1].order_id, "Shipped"),
+                                                       ("missing", "Shipped"),
+                                                       (orders[2].order_id, "")])
+    assert updated == 2
+    assert errors == [("missing", "Order not found."), (orders[2].order_id, "Status cannot be empty.")]
+    assert len(batches) == 1 and [(d.order_id, old, new) for d, old, new in batches[0]] == [
+        (orders[0].order_id, "Preparing", "Shipped"), (orders[1].order_id, "Preparing", "Shipped")]
+    assert system.deliveries.status_counts() == {"Preparing": 2, "Shipped": 2}
+
+    system.journal.close()
+    recovered = EMarketSystem.recover(Journal(str(tmp_path)))
+    assert recovered.deliveries.status_counts() == {"Preparing": 2, "Shipped": 2}
+    recovered.journal.close()
+
+    # Updating a Delivery directly keeps the index in sync and notifies subscribers too
+    system.track_delivery(orders[3].order_id).update_status("Delivered")
+    assert [d.order_id for d in system.deliveries.by_status("Delivered")] == [orders[3].order_id]
+    assert len(batches) == 2 and batches[1][0][1:] == ("Preparing", "Delivered")
+    assert system.deliveries.unsubscribe(batches.append)
+
+# 62) --------------------------
+def test_delivery_eta_is_cached_until_status_changes():
+    delivery = Delivery("order-1")
+    eta = delivery.get_estimated_time()
+    assert delivery.get_estimated_time() is eta
+    delivery.update_status("Preparing")  # No transition, so the estimate is kept
+    assert delivery.get_estimated_time() is eta
+    delivery.update_status("Out for Delivery")
+    assert delivery.get_estimated_time() < eta
+    with pytest.raises(ValueError, match="Status cannot be empty"):
+        delivery.update_status("")
+
+# 63) --------------------------
+def test_coupon_registry_caches_date_and_evicts_by_expiry():
+    day = [datetime.date(2025, 1, 10)]
+    now = [0.0]
+    registry = CouponRegistry(retention_days=2, today=lambda: day[0], clock=lambda: now[0])
+    registry.add_many([Coupon(f"CODE{i}", 10, datetime.date(2025, 1, 10 + i)) for i in range(5)])
+    registry.add(Coupon("SWAP", 10, datetime.date(2025, 1, 9)))
+    registry.add(Coupon("SWAP", 20, datetime.date(2025, 2, 1)))  # Replaces the older SWAP coupon
+
+    assert registry.validate("CODE0").coupon_code == "CODE0"
+    day[0] = datetime.date(2025, 1, 11)
+    assert registry.validate("CODE0")  # The cached date is used until the tick is over
+    now[0] = 1.0
+    with pytest.raises(ValueError, match="Coupon has expired."):
+        registry.validate("CODE0")  # Expired, but kept for the retention period
+    assert len(registry) == 6
+
+    day[0], now[0] = datetime.date(2025, 1, 13), 2.0
+    registry.today()
+    assert "CODE0" not in registry and "CODE1" in registry and registry["SWAP"].coupon_discount == 20
+    with pytest.raises(ValueError, match="Coupon not found."):
+        registry.validate("CODE0")
+    assert [error for _, error in registry.validate_many(["CODE1", "CODE4", "NONE"])] == [
+        "Coupon has expired.", None, "Coupon not found."]
+
+# 64) --------------------------
+def test_bulk_coupons_price_orders_and_survive_recovery(tmp_path):
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    today = datetime.date.today()
+    added = system.add_coupons([Coupon(f"PROMO{i}", 10, today + datetime.timedelta(days=1)) for i in range(1000)]
+                               + [Coupon("GONE", 50, today - datetime.timedelta(days=1))])
+    assert added == 1001
+    assert system.price_with_coupons([(100.0, "PROMO7"), (100.0, None), (100.0, "GONE"), (100.0, "NOPE")]) == [
+        (90.0, None), (100.0, None), (100.0, "Coupon has expired."), (100.0, "Coupon not found.")]
+
+    cust = IndividualCustomer("promo", "pass", "promo@example.com", "Promo", "Addr", "1234567890")
+    system.register_customer(cust)
+    product = system.add_product(Product("Kite", "Red", 100.0, 50.0, 10), "Toys")
+    system.add_to_cart(cust.user_id, product.product_id, 1)
+    assert system.checkout_order(cust.user_id, coupon_code="PROMO999").order_coupon.coupon_code == "PROMO999"
+
+    system.journal.close()
+    recovered = EMarketSystem.recover(Journal(str(tmp_path)))
+    assert len(recovered.coupons) == 1001 and recovered.coupons.validate("PROMO0").coupon_discount == 10
+    recovered.journal.close()
+
+# 65) --------------------------
+def test_bulk_checkout_matches_single_checkouts():
+    system = EMarketSystem()
+    products = [system.add_product(Product(f"Widget {i}", "Desc", 10.0 + i, 5.0 + i, 100), "Widgets")
+                for i in range(3)]
+    products[1].set_discount(20)
+    system.add_coupon(Coupon("BULK10", 10, datetime.date.today() + datetime.timedelta(days=1)))
+    system.add_coupon(Coupon("STALE", 10, datetime.date.today() - datetime.timedelta(days=1)))
+    buyers = []
+    for i in range(4):
+        args = (f"bulk{i}", "pass", f"bulk{i}@example.com", "Bulk", "Addr", "1234567890")
+        cust = RetailCustomer(*args, "Store") if i == 1 else IndividualCustomer(*args)
+        buyers.append(system.register_customer(cust).user_id)
+        for product in products[:i + 1]:
+            system.add_to_cart(buyers[-1], product.product_id, i + 1)
+    expected = [sum(p.get_price("retail" if i == 1 else "individual") * (i + 1) for p in products[:i + 1])
+                for i in range(4)]
+
+    results = system.checkout_orders_bulk([buyers[0], (buyers[1], "BULK10"), (buyers[2], "STALE"),
+                                           buyers[3], buyers[0], "stranger"])
+    assert results[0].order_total_amount == pytest.approx(expected[0])
+    assert results[1].order_total_amount == pytest.approx(expected[1] * 0.9)
+    assert results[1].order_coupon.coupon_code == "BULK10"
+    assert str(results[2]) == "Coupon has expired." and system.shopping_carts[buyers[2]].cart_lines
+    assert results[3].order_total_amount == pytest.approx(expected[3])
+    assert str(results[4]) == "Shopping cart is empty."  # Already checked out earlier in the batch
+    assert str(results[5]) == "Shopping cart not found for this customer."
+
+    for order in (results[0], results[1], results[3]):
+        assert system.orders[order.order_id] is order and order.order_status == "Placed"
+        assert system.track_delivery(order.order_id).track_delivery() == "Preparing"
+        assert not system.shopping_carts[order.customer_id].cart_lines
+    assert system.get_orders(customer_id=buyers[3])[0] == [results[3]]
+    assert not system.reservations.reservation_holds.keys() - {
+        (system.shopping_carts[buyers[2]].cart_id, p.product_id) for p in products}
+    assert products[0].product_stock == 100 - 1 - 2 - 3 - 4
+
+# 66) --------------------------
+def test_bulk_checkout_is_journaled(tmp_path):
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    product = system.add_product(Product("Crate", "Wood", 4.0, 3.0, 50), "Storage")
+    buyers = []
+    for i in range(3):
+        cust = IndividualCustomer(f"crate{i}", "pass", f"crate{i}@example.com", "Crate", "Addr", "1234567890")
+        buyers.append(system.register_customer(cust).user_id)
+        system.add_to_cart(buyers[-1], product.product_id, 2)
+    assert all(isinstance(result, Order) for result in system.checkout_orders_bulk(buyers))
+    expected = export_state(system)
+
+    system.journal.close()
+    recovered = EMarketSystem.recover(Journal(str(tmp_path)))
+    assert export_state(recovered) == expected
+    assert len(recovered.get_orders(status="Placed")[0]) == 3
+    recovered.journal.close()
+
+# 67) --------------------------
+def test_ranked_search_orders_by_relevance_and_paginates(system):
+    names = ["Tea Cup", "Green Tea", "Tea", "Steam Iron", "Teapot", "Black tea leaves", "Instead", "TEA"]
+    products = [system.add_product(Product(name, "Desc", 5.0, 4.0, 1), "Kitchen") for name in names]
+    by_name = dict(zip(names, products))
+
+    ranked, cursor = system.search_products_page("tea", limit=10)
+    assert [p.product_name for p in ranked] == ["Tea", "TEA", "Tea Cup", "Teapot", "Green Tea",
+                                                "Black tea leaves", "Steam Iron", "Instead"]
+    assert cursor is None
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = system.search_products_page("tea", limit=3, cursor=cursor)
+        pages.extend(page)
+        if cursor is None:
+            break
+    assert pages == ranked
+
+    assert system.search_products_page("teap", limit=5) == ([by_name["Teapot"]], None)
+    assert system.search_products_page("zzz", limit=5) == ([], None)
+    everything, cursor = system.search_products_page("", limit=5)
+    assert everything == products[:5] and system.search_products_page("", limit=5, cursor=cursor)[0] == products[5:]
+    assert system.search_products("tea") == [p for p in products if "tea" in p.product_name.lower()]
+    with pytest.raises(ValueError, match="Limit must be greater than zero"):
+        system.search_products_page("tea", limit=0)
+
+    # Random names, symbols and renamed products agree with ranking every match by hand
+    rng = random.Random(7)
+    words = ["ab", "abc", "b-ab", "(ab)", "xab", "abab", "c ab", "ba"]
+    extra = [system.add_product(Product(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))),
+                                        "Desc", 1.0, 1.0, 1), "Misc") for _ in range(60)]
+    for product in extra[:10]:
+        product.product_name = rng.choice(words)
+        system.search_index.add_product(product)
+    indexed = [entry[1] for entry in system.search_index.index_entries]
+
+    def reference(query):
+        ranked = []
+        for position, product in enumerate(indexed):
+            name = product.product_name.lower()
+            if query not in name:
+                continue
+            starts = [i for i in range(len(name)) if name.startswith(query, i)]
+            rank = (0 if name == query else 1 if starts[0] == 0 else
+                    2 if any(not name[i - 1].isalnum() for i in starts) else 3)
+            ranked.append((rank, position, product))
+        return [product for _, _, product in sorted(ranked, key=lambda item: item[:2])]
+
+    for query in ["ab", "a", "b-", "(ab", "ab)", "abab", "c ab", "bab", "xab abc", "-ab"]:
+        pages, cursor = [], None
+        while True:
+            page, cursor = system.search_products_page(query, limit=4, cursor=cursor)
+            pages.extend(page)
+            if cursor is None:
+                break
+        assert pages == reference(query), query
+
+# 68) --------------------------
+def test_server_search_pages_ranked_results(system):
+    server = EMarketServer(system, port=0)
+    for name in ["Salt", "Sea Salt", "Salted Nuts", "Basalt Tile"]:
+        system.add_product(Product(name, "Desc", 3.0, 2.0, 5), "Pantry")
+    status, payload = asyncio.run(server.dispatch("GET", "/search?q=salt&limit=2", b""))
+    assert status == 200 and [p["name"] for p in payload["products"]] == ["Salt", "Salted Nuts"]
+    status, payload = asyncio.run(server.dispatch(
+        "GET", f"/search?q=salt&limit=2&cursor={payload['next_cursor']}", b""))
+    assert [p["name"] for p in payload["products"]] == ["Sea Salt", "Basalt Tile"]
+
+# 69) --------------------------
+def test_filter_products_matches_a_scan_and_tracks_changes(system):
+    rng = random.Random(3)
+    for i in range(120):
+        product = system.add_product(Product(f"Item {i}", "Desc", rng.randint(5, 400), rng.randint(2, 300),
+                                             rng.randint(0, 5)), rng.choice(["Electronics", "Books", "Garden"]))
+        if i % 4 == 0:
+            product.set_discount(rng.choice([10, 25, 50]))
+
+    def scan(category, low, high, customer_type, min_stock, discounted):
+        matches = []
+        for cat in system.categories.values():
+            for p in cat.category_products:
+                price = p.get_price(customer_type)
+                if ((low is None or price >= low) and (high is None or price <= high)
+                        and (min_stock is None or p.product_stock >= min_stock)
+                        and (discounted is None or (p.product_discount_percent > 0) == discounted)):
+                    matches.append((cat.category_name, price, p))
+        counts = {}
+        for name, _, _ in matches:
+            counts[name] = counts.get(name, 0) + 1
+        chosen = sorted((price, p.product_id) for name, price, p in matches if category in (None, name))
+        return chosen, counts
+
+    def check(*filters):
+        products, counts = system.filter_products(*filters)
+        chosen, expected_counts = scan(*filters)
+        assert [p.get_price(filters[3]) for p in products] == [price for price, _ in chosen]
+        assert sorted(p.product_id for p in products) == sorted(product_id for _, product_id in chosen)
+        assert counts == expected_counts
+
+    check("Electronics", None, 200, "individual", 1, None)
+    check(None, 50, 150, "retail", None, True)
+    check("Books", None, None, "individual", None, False)
+
+    # Prices, discounts and stock changes are reflected, as are products added later
+    books = system.category_names["books"].category_products
+    books[0].set_discount(90)
+    books[1].product_retail_price = 1.0
+    books[2].update_stock(-books[2].product_stock)
+    system.add_product(Product("Late", "Desc", 99.0, 80.0, 3), "Books")
+    check("Books", None, 200, "individual", 1, None)
+    check(None, None, None, "retail", 1, True)
+
+    cheapest, counts = system.filter_products(max_price=1.0, limit=1)
+    assert cheapest == [books[1]] and counts["Books"] >= 1
+    assert system.filter_products("Nowhere")[0] == []
+
+# 70) --------------------------
+def test_filter_products_over_catalog_and_server(tmp_path):
+    system = EMarketSystem()
+    system.add_products_bulk([(Product("Phone", "Desc", 150.0, 120.0, 2), "Electronics"),
+                              (Product("Tablet", "Desc", 350.0, 300.0, 0), "Electronics"),
+                              (Product("Novel", "Desc", 12.0, 9.0, 8), "Books")])
+    write_catalog(str(tmp_path / "facets.emcat"), system)
+    fresh = EMarketSystem()
+    fresh.open_catalog(str(tmp_path / "facets.emcat"))
+    server = EMarketServer(fresh, port=0)
+
+    status, payload = asyncio.run(server.dispatch(
+        "GET", "/products?category=Electronics&max_price=200&min_stock=1", b""))
+    assert status == 200 and [p["name"] for p in payload["products"]] == ["Phone"]
+    assert payload["facets"] == {"Electronics": 1, "Books": 1}
+    status, payload = asyncio.run(server.dispatch("GET", "/products?min_price=abc", b""))
+    assert status == 400
+
+# 71) --------------------------
+def test_id_generator_orders_and_packs_ids():
+    now = [1_800_000_000_000 * 1_000_000]
+    generator = IdGenerator(node=5, clock=lambda: now[0])
+    first = [generator.next_id() for _ in range(5000)]  # More than one millisecond's sequence
+    now[0] -= 10_000_000  # The clock steps back
+    later = generator.next_ids(5000) + [generator.next_id()]
+    ids = first + later
+    assert len(set(ids)) == len(ids) and ids == sorted(ids)
+    assert [decode_id(text) for text in ids] == sorted(decode_id(text) for text in ids)
+    assert all(len(text) == 11 and (decode_id(text) >> 12) & 1023 == 5 for text in ids)
+    assert id_timestamp(first[0]) == 1_800_000_000
+    assert decode_id(encode_id(2 ** 64 - 1)) == 2 ** 64 - 1 and encode_id(0) < encode_id(1) < encode_id(2 ** 63)
+
+    other = IdGenerator(node=6, clock=lambda: now[0])
+    assert not set(other.next_ids(100)) & set(ids)
+    with pytest.raises(ValueError, match="Node must be between 0 and 1023."):
+        IdGenerator(node=1024)
+    with pytest.raises(ValueError, match="Invalid ID."):
+        decode_id("not an id!!")
+
+# 72) --------------------------
+def test_domain_objects_take_ids_from_the_generator(system):
+    previous = set_generator(IdGenerator(node=9))
+    try:
+        customer = system.register_customer(IndividualCustomer("ids", "pass", "ids@x.com", "Ids", "Addr", "1234567890"))
+        product = system.add_product(Product("Widget", "Desc", 10.0, 8.0, 50), "Gadgets")
+        system.add_coupon(Coupon("IDS10", 10, datetime.date.today() + datetime.timedelta(days=1)))
+        system.add_to_cart(customer.user_id, product.product_id, 2)
+        order = system.checkout_order(customer.user_id)
+        for key in (customer.user_id, product.product_id, order.order_id, system.track_delivery(order.order_id).delivery_id,
+                    system.shopping_carts[customer.user_id].cart_id, system.coupons["IDS10"].coupon_id,
+                    next(iter(system.categories))):
+            assert len(key) == 11 and (decode_id(key) >> 12) & 1023 == 9
+
+        buyers = [system.register_customer(RetailCustomer(f"bulk{i}", "pass", f"bulk{i}@x.com", "B", "Addr",
+                                                          "1234567890", "Shop")) for i in range(20)]
+        for buyer in buyers:
+            system.add_to_cart(buyer.user_id, product.product_id, 1)
+        results = system.checkout_orders_bulk([buyer.user_id for buyer in buyers])
+        order_ids = [result.order_id for result in results]
+        assert len(set(order_ids)) == 20 and order_ids == sorted(order_ids) and order_ids[0] > order.order_id
+    finally:
+        set_generator(previous)
+
+# 73) --------------------------
+def test_inventory_ledger_tracks_warehouses(system):
+    cust = system.register_customer(IndividualCustomer("stocker", "pass", "stocker@x.com", "S", "Addr", "1234567890"))
+    lamp = system.add_product(Product("Lamp", "Desc", 20.0, 15.0, 10), "Home")
+    mug = system.add_product(Product("Mug", "Desc", 5.0, 4.0, 0), "Home")
+    inventory = system.inventory
+    assert system.stock_levels(lamp.product_id) == {"main": 10}
+
+    # A batch lands in several warehouses at once, and is all-or-nothing
+    assert system.adjust_stock([(lamp.product_id, "east", 6, "receive"), (mug.product_id, "east", 4, "receive"),
+                                (lamp.product_id, "main", -2, "damaged")]) == 3
+    with pytest.raises(ValueError, match="Not enough stock of Mug in main."):
+        system.adjust_stock([(lamp.product_id, "east", 5), (mug.product_id, "main", -1)])
+    assert lamp.product_stock == 14 and mug.product_stock == 4
+    assert system.stock_levels(lamp.product_id) == {"main": 8, "east": 6}
+
+    # Cart holds reduce what can be sold but not what is on hand, and block writing off held units
+    system.add_to_cart(cust.user_id, lamp.product_id, 12)
+    assert (inventory.available(lamp.product_id), inventory.on_hand(lamp.product_id)) == (2, 14)
+    with pytest.raises(ValueError, match="Not enough stock available for Lamp."):
+        system.adjust_stock([(lamp.product_id, "east", -3)])
+    system.transfer_stock(lamp.product_id, "main", "west", 3)
+    with pytest.raises(ValueError, match="Not enough stock of Lamp in west."):
+        system.transfer_stock(lamp.product_id, "west", "east", 4)
+
+    # Checkout ships from the fullest warehouses first
+    system.checkout_order(cust.user_id)
+    assert system.stock_levels(lamp.product_id) == {"main": 0, "east": 0, "west": 2}
+    assert (lamp.product_stock, inventory.on_hand(lamp.product_id)) == (2, 2)
+
+    # Direct stock updates go through the ledger too
+    mug.update_stock(3, "west")
+    mug.update_stock(-5)
+    assert system.stock_levels(mug.product_id) == {"main": 0, "east": 0, "west": 2} and mug.product_stock == 2
+    with pytest.raises(ValueError, match="Not enough stock on hand for Mug."):
+        mug.update_stock(-3)
+
+    # Compaction keeps one balance per non-empty level
+    lines = len(inventory.inventory_log)
+    assert inventory.compact() == lines - 2
+    assert sorted(inventory.inventory_log) == sorted([(lamp.product_id, "west", 2, "balance"),
+                                                      (mug.product_id, "west", 2, "balance")])
+
+    unlisted = Product("Loose", "Desc", 1.0, 1.0, 3)
+    unlisted.update_stock(-3)
+    assert unlisted.product_stock == 0
+
+# 74) --------------------------
+def test_inventory_ledger_recovers_and_serves(tmp_path):
+    system = EMarketSystem(journal=Journal(str(tmp_path), snapshot_every=4))
+    addAdminUser(system)
+    cust = system.register_customer(IndividualCustomer("buyer", "pass", "buyer@x.com", "B", "Addr", "1234567890"))
+    chair = system.add_product(Product("Chair", "Desc", 50.0, 40.0, 5), "Furniture")
+    system.adjust_stock([(chair.product_id, "north", 7, "receive")])
+    system.transfer_stock(chair.product_id, "main", "north", 2)
+    system.add_to_cart(cust.user_id, chair.product_id, 4)
+    system.checkout_order(cust.user_id)
+    system.add_to_cart(cust.user_id, chair.product_id, 1)
+
+    recovered = EMarketSystem.recover(Journal(str(tmp_path)))
+    assert export_state(recovered) == export_state(system)
+    assert recovered.stock_levels(chair.product_id) == {"main": 3, "north": 5}
+    assert recovered.inventory.on_hand(chair.product_id) == 8 and recovered.products[chair.product_id].product_stock == 7
+
+    # Snapshots from before the ledger keep held units on hand in the default warehouse
+    state = export_state(system)
+    del state["inventory"]
+    legacy = EMarketSystem()
+    import_state(legacy, state)
+    assert legacy.stock_levels(chair.product_id) == {"main": 8}
+
+    # Catalog products join the ledger when they are first built
+    write_catalog(str(tmp_path / "stock.emcat"), system)
+    opened = EMarketSystem()
+    addAdminUser(opened)
+    opened.open_catalog(str(tmp_path / "stock.emcat"))
+    server = EMarketServer(opened, port=0)
+    token = opened.create_session("admin", "admin")
+    body = json.dumps({"adjustments": [{"product_id": chair.product_id, "warehouse": "south", "quantity": 2}]})
+    status, payload = asyncio.run(server.dispatch("POST", "/admin/stock", body.encode(),
+                                                  {"authorization": f"Bearer {token}"}))
+    assert status == 200 and payload["movements"] == 1
+    assert payload["stock"][chair.product_id] == {"available": 9, "warehouses": {"main": 7, "south": 2}}
+
+# 75) --------------------------
+def test_catalog_snapshots_are_immutable_and_share_structure(system):
+    rng = random.Random(5)
+    for i in range(600):
+        system.add_product(Product(f"Gizmo {i}", "Desc", rng.randint(5, 90), rng.randint(2, 80), rng.randint(0, 9)),
+                           rng.choice(["Tools", "Toys", "Garden"]))
+    pinned = system.catalog_snapshot()
+    live = list(system.products.values())
+    assert [p.get_details() for p in pinned.products()] == [p.get_details() for p in live]
+    assert [p.product_id for p in pinned.search_by_name("izmo 1")] == \
+        [p.product_id for p in Search(live, []).search_by_name("izmo 1")]
+    assert [p.product_id for p in pinned.search_by_category(" toys ")] == \
+        [p.product_id for p in system.search_category("Toys")]
+
+    # Writers publish new versions; the pinned one keeps its prices and products
+    first, last = live[0], live[-1]
+    old_details = pinned.get_details(first.product_id)
+    first.set_discount(40)
+    system.add_product(Product("Late Gizmo", "Desc", 10.0, 8.0, 1), "Toys")
+    current = system.catalog_snapshot()
+    assert current.version_number > pinned.version_number and len(current) == len(pinned) + 1
+    assert current.get(first.product_id).get_details() == first.get_details()
+    assert current.get(first.product_id).get_price("retail") == first.get_price("retail")
+    assert pinned.get_details(first.product_id) == old_details
+    assert pinned.get(first.product_id).product_discount_percent == 0
+    assert pinned.get(system.search_products("Late Gizmo")[0].product_id) is None
+    assert len(current.search_by_category("Toys")) == len(pinned.search_by_category("Toys")) + 1
+
+    # Only the chunks holding the changes were copied, and stock is read live
+    shared = [a is b for a, b in zip(pinned.version_products, current.version_products)]
+    assert shared[0] is False and all(shared[1:-1])
+    last.update_stock(5)
+    assert pinned.get(last.product_id).product_stock == last.product_stock
+    with pytest.raises(AttributeError):
+        pinned.get(last.product_id).product_name = "Renamed"
+    with pytest.raises(ValueError, match="Product not found."):
+        pinned.get_details("missing")
+
+# 76) --------------------------
+def test_catalog_snapshots_serve_readers_during_writes(tmp_path):
+    system = EMarketSystem()
+    system.add_products_bulk([(Product(f"Bolt {i}", "Desc", 10.0 + i, 5.0 + i, 3), f"Bin {i % 4}")
+                              for i in range(800)])
+    write_catalog(str(tmp_path / "bolts.emcat"), system)
+    system = EMarketSystem()
+    system.open_catalog(str(tmp_path / "bolts.emcat"))
+    assert len(system.catalog_snapshot().search_by_category("Bin 1")) == 200
+
+    stop, failures = threading.Event(), []
+
+    def read():
+        while not stop.is_set():
+            version = system.catalog_snapshot()
+            listing = [p.get_details() for p in version.search_by_category("Bin 2")]
+            if [p.get_details() for p in version.search_by_category("Bin 2")] != listing:
+                failures.append(version.version_number)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    products = list(system.products.values())
+    for i in range(300):
+        products[i].set_discount(i % 50)
+        system.add_product(Product(f"Nut {i}", "Desc", 2.0, 1.0, 1), "Bin 2")
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert failures == []
+
+    final = system.catalog_snapshot()
+    assert len(final.search_by_category("Bin 2")) == 500
+    assert [p.product_discount_percent for p in final.products()][:300] == [i % 50 for i in range(300)]
+
+# 77) --------------------------
+def test_price_tables_follow_price_and_discount_changes(system):
+    def expected(product, customer_type):
+        base = product.product_wholesale_price if customer_type == CustomerType.RETAIL else product.product_retail_price
+        return round(base * (1 - product.product_discount_percent / 100), 2)
+
+    rng = random.Random(11)
+    products = [system.add_product(Product(f"Part {i}", "Desc", rng.uniform(1, 500), rng.uniform(1, 400), 5), "Parts")
+                for i in range(50)]
+    for product in products[::3]:
+        product.set_discount(rng.randint(0, 100))
+    for product in products[1::4]:
+        product.product_retail_price = rng.uniform(1, 500)
+        product.product_wholesale_price = rng.uniform(1, 400)
+    with pytest.raises(ValueError):
+        products[2].set_discount(101)
+    for product in products:
+        for customer_type in CustomerType:
+            assert product.get_price(customer_type) == expected(product, customer_type)
+        assert product.get_price("retail") == product.get_price(CustomerType.RETAIL)
+        assert product.get_price("anything") == product.get_price(CustomerType.INDIVIDUAL)
+    assert system.price_products([p.product_id for p in products], CustomerType.RETAIL) == \
+        [expected(p, CustomerType.RETAIL) for p in products]
+
+    # Tables move with the product between stores and survive journal records
+    loose = Product("Loose", "Desc", 80.0, 60.0, 1)
+    loose.set_discount(25)
+    system.add_product(loose, "Parts")
+    assert (loose.get_price(CustomerType.INDIVIDUAL), loose.get_price(CustomerType.RETAIL)) == (60.0, 45.0)
+    assert product_from_dict(product_to_dict(loose)).get_price(CustomerType.RETAIL) == 45.0
+    assert system.catalog_snapshot().get(loose.product_id).get_price(CustomerType.RETAIL) == 45.0
+
+    assert CustomerType.parse("retail") is CustomerType.RETAIL and CustomerType.parse(None) is CustomerType.INDIVIDUAL
+    assert IndividualCustomer.customer_type is CustomerType.INDIVIDUAL and RetailCustomer.customer_type == "retail"
+    assert f"{CustomerType.RETAIL}" == "retail" and json.dumps(CustomerType.RETAIL) == '"retail"'
+
+# 78) --------------------------
+def test_large_cart_totals_use_customer_type_prices(system):
+    products = [system.add_product(Product(f"Screw {i}", "Desc", 1.0 + i % 97, 0.5 + i % 89, 10), "Hardware")
+                for i in range(2000)]
+    for product in products[::7]:
+        product.set_discount(15)
+    shop = system.register_customer(RetailCustomer("shop", "pass", "shop@x.com", "Shop", "Addr", "1234567890", "LIC"))
+    person = system.register_customer(IndividualCustomer("person", "pass", "person@x.com", "P", "Addr", "1234567890"))
+    lines = [(product, 1 + i % 3) for i, product in enumerate(products)]
+    for customer in (shop, person):
+        system.shopping_carts[customer.user_id].add_items(lines)
+
+    cart = system.shopping_carts[shop.user_id]
+    for customer_type in CustomerType:
+        total = sum(product.get_price(customer_type) * qty for product, qty in lines)
+        assert cart.calculate_total(customer_type) == pytest.approx(total)
+        assert cart.calculate_total(customer_type.value) == cart.calculate_total(customer_type)
+    assert cart.view_cart().endswith(f"Total: ${cart.calculate_total(CustomerType.INDIVIDUAL):.2f}")
+
+    retail_total, individual_total = cart.calculate_total(CustomerType.RETAIL), cart.calculate_total("individual")
+    assert system.checkout_order(shop.user_id).order_total_amount == pytest.approx(retail_total)
+    assert system.checkout_orders_bulk([person.user_id])[0].order_total_amount == pytest.approx(individual_total)
+
+# 79) --------------------------
+def test_cart_totals_follow_repricing(system):
+    cust = system.register_customer(IndividualCustomer("reprice", "pass", "reprice@x.com", "R", "Addr", "1234567890"))
+    lamp = system.add_product(Product("Lamp", "Desc", 100.0, 80.0, 10), "Home")
+    rug = system.add_product(Product("Rug", "Desc", 40.0, 30.0, 10), "Home")
+    cart = system.shopping_carts[cust.user_id]
+    cart.add_item(lamp, 1)
+    cart.add_item(rug, 2)
+    assert cart.calculate_total(CustomerType.INDIVIDUAL) == pytest.approx(180.0)
+
+    lamp.set_discount(50)
+    assert cart.calculate_total(CustomerType.INDIVIDUAL) == pytest.approx(130.0)
+    assert cart.calculate_total(CustomerType.RETAIL) == pytest.approx(100.0)
+    assert "Lamp (x1) - $50.00" in cart.view_cart() and cart.view_cart().endswith("Total: $130.00")
+
+    # Lines changed after a repricing are totaled at the new prices too
+    rug.product_retail_price = 20.0
+    cart.add_item(rug, 1)
+    cart.remove_item(lamp)
+    assert cart.calculate_total(CustomerType.INDIVIDUAL) == pytest.approx(60.0)
+    assert system.checkout_order(cust.user_id).order_total_amount == pytest.approx(60.0)
+
+# 80) --------------------------
+def test_checkout_holds_lines_against_concurrent_expiry(monkeypatch):
+    now = [0.0]
+    system = EMarketSystem(reservation_ttl=60, clock=lambda: now[0])
+    cust = system.register_customer(IndividualCustomer("racer", "pass", "racer@x.com", "R", "Addr", "1234567890"))
+    prod = system.add_product(Product("Kayak", "Desc", 500.0, 400.0, 5), "Outdoor")
+    system.add_to_cart(cust.user_id, prod.product_id, 2)
+    system.add_coupon(Coupon("RACE", 10, datetime.date.today() + datetime.timedelta(days=1)))
+
+    # The hold lapses while checkout is under way; expiry must wait for checkout to confirm it
+    expired = []
+    expiry = threading.Thread(target=lambda: expired.extend(system.reservations.expire_holds()))
+    validate = system.coupons.validate
+
+    def validate_during_expiry(code):
+        now[0] = 120.0
+        expiry.start()
+        expiry.join(0.2)
+        assert expiry.is_alive()
+        return validate(code)
+
+    monkeypatch.setattr(system.coupons, "validate", validate_during_expiry)
+    order = system.checkout_order(cust.user_id, "RACE")
+    expiry.join()
+    assert expired == [] and order.order_items == [(prod, 2)]
+    assert prod.product_stock == 3 and system.inventory.on_hand(prod.product_id) == 3
+    assert not system.reservations.reservation_holds
+
+# 81) --------------------------
+def test_server_rejects_fields_of_the_wrong_type(system):
+    server = EMarketServer(system)
+    addAdminUser(system)
+
+    def call(method, path, payload):
+        return asyncio.run(server.dispatch(method, path, json.dumps(payload).encode()))
+
+    details = {"username": 123, "password": "pw", "email": "n@x.com", "name": "N", "address": "A", "phone": "1234567890"}
+    assert call("POST", "/register", details) == (400, {"error": "Field username must be a string."})
+    assert call("POST", "/register", {**details, "username": "num", "customer_type": 1})[0] == 400
+    assert call("GET", "/products", {"category": 7}) == (400, {"error": "Field category must be a string."})
+    token = call("POST", "/login", {"username": "admin", "password": "admin"})[1]["token"]
+    assert call("POST", "/admin/coupons", {"token": token, "code": ["X"], "discount": 5,
+                                           "expiry_date": "2999-01-01"})[0] == 400
+    assert call("POST", "/register", {**details, "username": "num"})[0] == 201
+
+# 82) --------------------------
+def test_group_commit_is_durable_before_append_returns(tmp_path, monkeypatch):
+    journal = Journal(str(tmp_path))
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        sleep(0.005)  # Lets appenders pile up behind a commit in progress
+        real_fsync(fd)
+
+    monkeypatch.setattr("src.journal.os.fsync", slow_fsync)
+    missing = []
+
+    def append_many(worker: int):
+        for i in range(10):
+            sequence = journal.append("note", {"worker": worker, "i": i})
+            with open(tmp_path / "journal.log", encoding="utf-8") as file:
+                if not any(json.loads(line)["seq"] == sequence for line in file):
+                    missing.append(sequence)
+
+    workers = [threading.Thread(target=append_many, args=(w,)) for w in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert missing == []
+    assert journal.journal_durable == journal.journal_sequence == 80
+    assert journal.journal_commits < 80  # Concurrent appends shared fsync calls
+    journal.close()
+    assert sorted(record["seq"] for record in Journal(str(tmp_path)).load()[1]) == list(range(1, 81))
+
+# 83) --------------------------
+@pytest.mark.parametrize("from_catalog", [False, True])
+def test_entry_points_recover_their_state(tmp_path, monkeypatch, from_catalog):
+    catalog = tmp_path / "products.emcat"
+    if from_catalog:
+        convert_json_catalog("./src/products.json", str(catalog))
+    monkeypatch.setattr(cli, "CATALOG_SNAPSHOT", str(catalog))
+    data = str(tmp_path / "data")
+
+    system = openSystem(data)
+    count = len(system.products)
+    cust = system.register_customer(IndividualCustomer("kept", "pass", "kept@x.com", "K", "Addr", "1234567890"))
+    laptop = system.search_products("Laptop")[0]
+    system.add_to_cart(cust.user_id, laptop.product_id, 2)
+    order = system.checkout_order(cust.user_id)
+    system.journal.close()
+
+    # A restart recovers the order instead of loading the base catalog again
+    restarted = openSystem(data)
+    assert len(restarted.products) == count and len(restarted.usernames) == 2
+    assert restarted.orders[order.order_id].order_total_amount == order.order_total_amount
+    assert restarted.products[laptop.product_id].product_stock == laptop.product_stock == 8
+    restarted.journal.close()
+
+# 84) --------------------------
+def test_snapshots_wait_for_mutating_calls(tmp_path, monkeypatch):
+    system = EMarketSystem(journal=Journal(str(tmp_path), snapshot_every=0))
+    cust = system.register_customer(IndividualCustomer("gate", "pass", "gate@x.com", "G", "Addr", "1234567890"))
+    prod = system.add_product(Product("Tent", "Desc", 90.0, 70.0, 5), "Outdoor")
+    system.add_coupon(Coupon("GATE", 5, datetime.date.today() + datetime.timedelta(days=1)))
+    system.add_to_cart(cust.user_id, prod.product_id, 2)
+
+    # Hold a checkout half done and ask for a snapshot meanwhile
+    inside, release = threading.Event(), threading.Event()
+    validate = system.coupons.validate
+
+    def slow_validate(code):
+        inside.set()
+        release.wait()
+        return validate(code)
+
+    monkeypatch.setattr(system.coupons, "validate", slow_validate)
+    checkout = threading.Thread(target=system.checkout_order, args=(cust.user_id, "GATE"))
+    checkout.start()
+    inside.wait()
+    snapshot = threading.Thread(target=system.snapshot)
+    snapshot.start()
+    snapshot.join(0.2)
+    assert snapshot.is_alive()
+    release.set()
+    checkout.join()
+    snapshot.join()
+
+    state, records = system.journal.load()
+    assert records == [] and len(state["orders"]) == 1  # The snapshot came after the checkout, not during it
+    assert state == export_state(system)
+
+    # Snapshots that come due under concurrent calls still recover to the same state
+    busy = EMarketSystem(journal=Journal(str(tmp_path / "busy"), snapshot_every=5))
+    goods = busy.add_products_bulk([(Product(f"Item {i}", "Desc", 5.0, 4.0, 100), "Bulk") for i in range(4)])
+    shoppers = [busy.register_customer(IndividualCustomer(f"s{i}", "pass", f"s{i}@x.com", "S", "Addr", "1234567890"))
+                for i in range(4)]
+
+    def shop(customer):
+        for product in goods * 3:
+            busy.add_to_cart(customer.user_id, product.product_id, 1)
+        busy.checkout_order(customer.user_id)
+
+    workers = [threading.Thread(target=shop, args=(customer,)) for customer in shoppers]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    expected = export_state(busy)
+    busy.journal.close()
+    assert export_state(EMarketSystem.recover(Journal(str(tmp_path / "busy")))) == expected
+
+# 85) --------------------------
+def test_delivery_updates_reject_non_text_status(system):
+    server = EMarketServer(system)
+    addAdminUser(system)
+    product = system.add_product(Product("Tape", "Clear", 2.0, 1.0, 10), "Stationery")
+    cust = IndividualCustomer("taper", "pass", "taper@example.com", "Taper", "Addr", "1234567890")
+    system.register_customer(cust)
+    system.add_to_cart(cust.user_id, product.product_id, 1)
+    order = system.checkout_order(cust.user_id)
+    delivery = system.track_delivery(order.order_id)
+    eta = delivery.get_estimated_time()
+
+    with pytest.raises(ValueError, match="Status must be text"):
+        delivery.update_status(5)
+    assert system.update_delivery_statuses([(order.order_id, 5), (order.order_id, ["Shipped"])]) == (
+        0, [(order.order_id, "Status must be text."), (order.order_id, "Status must be text.")])
+    assert delivery.track_delivery() == "Preparing" and delivery.get_estimated_time() is eta
+    assert system.deliveries.status_counts() == {"Preparing": 1}
+
+    def call(method, path, payload):
+        return asyncio.run(server.dispatch(method, path, json.dumps(payload).encode()))
+
+    token = call("POST", "/login", {"username": "admin", "password": "admin"})[1]["token"]
+    assert call("POST", "/admin/deliveries", {"token": token, "updates": [{"order_id": order.order_id, "status": 5}]}) == (
+        200, {"updated": 0, "errors": [{"order_id": order.order_id, "error": "Status must be text."}]})
+    assert delivery.track_delivery() == "Preparing"
+
+# 86) --------------------------
+def test_single_and_bulk_checkout_place_orders_the_same_way(system, monkeypatch):
+    product = system.add_product(Product("Jar", "Glass", 6.0, 4.0, 20), "Storage")
+    system.add_coupon(Coupon("JAR10", 10, datetime.date(2999, 1, 1)))
+    buyers = []
+    for i in range(2):
+        cust = IndividualCustomer(f"jar{i}", "pass", f"jar{i}@example.com", "Jar", "Addr", "1234567890")
+        buyers.append(system.register_customer(cust).user_id)
+        system.add_to_cart(buyers[-1], product.product_id, 3)
+
+    placed = []
+    place_at_subtotal = Order.place_at_subtotal
+    def tracking(order, subtotal, now):
+        placed.append(order.customer_id)
+        return place_at_subtotal(order, subtotal, now)
+
+    monkeypatch.setattr(Order, "place_at_subtotal", tracking)
+    single = system.checkout_order(buyers[0], "JAR10")
+    [bulk] = system.checkout_orders_bulk([(buyers[1], "JAR10")])
+    assert placed == buyers
+    assert single.order_total_amount == bulk.order_total_amount == pytest.approx(6.0 * 3 * 0.9)
+    assert single.order_status == bulk.order_status == "Placed" and bulk.order_placed_at is not None
+    assert {order.order_id for order in system.get_orders(status="Placed")[0]} == {single.order_id, bulk.order_id}
+
+# 87) --------------------------
+def test_exactly_full_last_pages_end_without_a_cursor(system):
+    products = [system.add_product(Product(name, "Desc", 5.0, 4.0, 10), "Kitchen")
+                for name in ["Tea", "Tea Cup", "Green Tea", "Steam", "Mug", "Bowl"]]
+    assert isinstance(system.search_products("tea"), list)
+    assert system.search_products_page("tea", limit=4) == (products[:4], None)
+    first, cursor = system.search_products_page("tea", limit=2)
+    assert first == products[:2] and system.search_products_page("tea", limit=2, cursor=cursor) == (products[2:4], None)
+    assert system.search_products_page("", limit=6) == (products, None)
+    first, cursor = system.search_products_page("", limit=3)
+    assert system.search_products_page("", limit=3, cursor=cursor) == (products[3:], None)
+
+    cust = IndividualCustomer("pager", "pass", "pager@example.com", "Pager", "Addr", "1234567890")
+    system.register_customer(cust)
+    orders = []
+    for product in products[:4]:
+        system.add_to_cart(cust.user_id, product.product_id, 1)
+        orders.append(system.checkout_order(cust.user_id))
+    assert system.get_orders(customer_id=cust.user_id, limit=4) == (orders, None)
+    page, cursor = system.get_orders(status="Placed", limit=2)
+    assert page == orders[:2] and system.get_orders(status="Placed", limit=2, cursor=cursor) == (orders[2:], None)
+
+# 88) --------------------------
+def test_stock_ledger_can_be_disabled_and_compacts_on_snapshot(tmp_path):
+    shard = EMarketSystem(stock_ledger=False)
+    product = shard.add_product(Product("Dial", "Brass", 9.0, 7.0, 5), "Hardware")
+    cust = IndividualCustomer("dialer", "pass", "dialer@example.com", "Dialer", "Addr", "1234567890")
+    shard.register_customer(cust)
+    shard.add_to_cart(cust.user_id, product.product_id, 2)
+    shard.checkout_order(cust.user_id)
+    assert shard.inventory is None and product.product_stock == 3
+    assert product.update_stock(4) and product.product_stock == 7
+    with pytest.raises(ValueError, match="Stock ledger is disabled"):
+        shard.adjust_stock([(product.product_id, "main", 1)])
+    with pytest.raises(ValueError, match="Stock ledger is disabled"):
+        shard.stock_levels(product.product_id)
+    with pytest.raises(AttributeError):
+        product.product_stock = 100  # Stock only changes through update_stock or the reservation engine
+
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    item = system.add_product(Product("Knob", "Brass", 3.0, 2.0, 10), "Hardware")
+    system.adjust_stock([(item.product_id, "north", 5), (item.product_id, "main", -2), (item.product_id, "north", -1)])
+    assert len(system.inventory.inventory_log) == 4
+    system.snapshot()
+    assert sorted(system.inventory.inventory_log) == [(item.product_id, "main", 8, "balance"),
+                                                      (item.product_id, "north", 4, "balance")]
+    system.journal.close()
+    recovered = EMarketSystem.recover(Journal(str(tmp_path)))
+    assert recovered.stock_levels(item.product_id) == {"main": 8, "north": 4}
+    recovered.journal.close()
+
+# 89) --------------------------
+def test_stale_catalog_versions_rebuild_once_under_the_lock(system, monkeypatch):
+    for i in range(20):
+        system.add_product(Product(f"Widget {i}", "Desc", 5.0, 4.0, 3), "Parts")
+    loading, release = threading.Event(), threading.Event()
+    loads = []
+    materialize = system.materialize_catalog
+
+    def slow_materialize():
+        loads.append(threading.current_thread().name)
+        loading.set()
+        release.wait()
+        materialize()
+
+    monkeypatch.setattr(system, "materialize_catalog", slow_materialize)
+    versions = []
+    readers = [threading.Thread(target=lambda: versions.append(system.catalog_snapshot())) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    loading.wait()
+    # A write made while the rebuild is loading is listed once, whichever side picks it up
+    writer = threading.Thread(target=system.add_product, args=(Product("Late Widget", "Desc", 5.0, 4.0, 3), "Parts"))
+    writer.start()
+    writer.join(0.1)
+    release.set()
+    writer.join()
+    for reader in readers:
+        reader.join()
+
+    assert len(loads) == 1 and len({id(version) for version in versions}) == 1
+    current = system.catalog_snapshot()
+    assert [p.product_id for p in current.products()] == list(system.products)
+    assert [p.product_id for p in current.search_by_category("Parts")] == \
+        [p.product_id for p in system.search_category("Parts")]
+
+# 90) --------------------------
+def test_catalog_version_name_index_matches_scans_and_ranked_pages(system):
+    rng = random.Random(11)
+    words = ["ab", "abc", "b-ab", "(ab)", "xab", "abab", "c ab", "ba", "Tea", "teapot"]
+    for _ in range(300):
+        system.add_product(Product(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))),
+                                   "Desc", 5.0, 4.0, 1), rng.choice(["Misc", "Kitchen"]))
+    pinned = system.catalog_snapshot()
+    queries = ["ab", "a", "b-", "(ab", "ab)", "abab", "c ab", "bab", "xab abc", "-ab", "tea", "zzz", " TEAPOT ", ""]
+    for query in queries:
+        scanned = [p for p in pinned.products() if query.strip().lower() in p[8]]
+        assert pinned.search_by_name(query) == scanned, query
+        pages, cursor = [], None
+        while True:
+            page, cursor = pinned.search_page(query, 7, cursor)
+            pages.extend(page)
+            if cursor is None:
+                break
+        assert [p.product_id for p in pages] == [p.product_id for p in system.search_products_page(query, 400)[0]], query
+
+    # Later products and renames share the index without leaking into the pinned version
+    late = system.add_product(Product("abab late", "Desc", 5.0, 4.0, 1), "Misc")
+    renamed = next(iter(system.products.values()))
+    renamed.product_name = "Renamed Widget"
+    renamed.set_discount(5)
+    current = system.catalog_snapshot()
+    assert current.search_by_name("late") == [current.get(late.product_id)]
+    assert pinned.search_by_name("late") == [] and pinned.search_by_name("widget") == []
+    assert [p.product_id for p in current.search_by_name("widget")] == [renamed.product_id]
+    assert current.search_page("abab late", 5) == ([current.get(late.product_id)], None)
+    with pytest.raises(ValueError, match="Limit must be greater than zero"):
+        current.search_page("ab", 0)
+
+# 91) --------------------------
+def test_server_and_cli_searches_do_not_build_a_catalog_version(tmp_path, monkeypatch, capsys):
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    addAdminUser(system)
+    kettle = system.add_product(Product("Kettle", "Steel", 30.0, 25.0, 4), "Kitchen")
+    system.add_product(Product("Kettle Descaler", "Liquid", 5.0, 4.0, 9), "Kitchen")
+
+    def pinned_read(*args):
+        raise AssertionError("Searches must not load the whole catalog into a version")
+
+    monkeypatch.setattr(system, "catalog_snapshot", pinned_read)
+    server = EMarketServer(system)
+
+    def call(payload):
+        return asyncio.run(server.dispatch("GET", "/search", json.dumps(payload).encode()))
+
+    status, body = call({"q": "kettle", "limit": 1})
+    assert status == 200 and [p["name"] for p in body["products"]] == ["Kettle"] and body["next_cursor"] is not None
+    assert [p["name"] for p in call({"q": "kettle", "limit": 1, "cursor": body["next_cursor"]})[1]["products"]] == \
+        ["Kettle Descaler"]
+    assert [p["product_id"] for p in call({"category": " kitchen "})[1]["products"]][0] == kettle.product_id
+
+    answers = iter(["2", "admin", "admin", "1", "descaler", "2", "Kitchen", "10", "3"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    monkeypatch.setattr(cli, "openSystem", lambda: system)
+    cli.main()
+    output = capsys.readouterr().out
+    assert "Name: Kettle Descaler" in output and "- Kitchen" in output and "Products in 'Kitchen'" in output
+
+# 92) --------------------------
+def test_repricing_moves_the_totals_of_exactly_the_carts_holding_the_row(system, monkeypatch):
+    buyers = [system.register_customer(cls(f"row{i}", "pass", f"row{i}@x.com", "R", "Addr", "1234567890", *extra))
+              for i, (cls, extra) in enumerate([(IndividualCustomer, ()), (RetailCustomer, ("LIC-9",))])]
+    lamp = system.add_product(Product("Lamp", "Desc", 100.0, 80.0, 20), "Home")
+    rug = system.add_product(Product("Rug", "Desc", 40.0, 30.0, 20), "Home")
+    vase = system.add_product(Product("Vase", "Desc", 25.0, 20.0, 20), "Home")
+    for buyer in buyers:
+        system.add_to_cart(buyer.user_id, lamp.product_id, 1)
+        system.add_to_cart(buyer.user_id, rug.product_id, 3)
+
+    repriced = []
+    line_repriced = ShoppingCart._line_repriced
+    monkeypatch.setattr(ShoppingCart, "_line_repriced",
+                        lambda cart, *args: repriced.append(cart.customer_id) or line_repriced(cart, *args))
+    vase.set_discount(30)  # No cart holds it, so no cart is touched
+    assert repriced == []
+
+    changes = [lambda: lamp.set_discount(15), lambda: setattr(rug, "product_retail_price", 35.5),
+               lambda: setattr(rug, "product_wholesale_price", 27.25), lambda: lamp.set_discount(0)]
+    for change in changes:
+        change()
+        for buyer in buyers:
+            cart = system.shopping_carts[buyer.user_id]
+            order = Order(buyer.user_id, cart.items)
+            order.place_order(buyer.customer_type)
+            assert cart.calculate_total(buyer.customer_type) == pytest.approx(order.order_total_amount)
+            other = CustomerType.RETAIL if buyer.customer_type == CustomerType.INDIVIDUAL else CustomerType.INDIVIDUAL
+            assert cart.calculate_total(other) == pytest.approx(sum(p.get_price(other) * q for p, q in cart.items))
+        individual_cart = system.shopping_carts[buyers[0].user_id]
+        assert individual_cart.view_cart().endswith(f"Total: ${individual_cart.calculate_total(CustomerType.INDIVIDUAL):.2f}")
+    assert sorted(set(repriced)) == sorted(buyer.user_id for buyer in buyers)
+
+    # Removed lines and dropped carts stop being repriced; lines follow a product into the shared store
+    del cart, individual_cart
+    system.shopping_carts[buyers[0].user_id].remove_item(lamp)
+    system.checkout_order(buyers[1].user_id)  # The checked-out cart is replaced and dropped
+    repriced.clear()
+    lamp.set_discount(5)
+    assert repriced == []
+    loose = Product("Loose", "Desc", 10.0, 8.0, 5)
+    cart = ShoppingCart("loose", system.reservations)
+    cart.add_item(loose, 2)
+    system.add_product(loose, "Home")
+    loose.set_discount(50)
+    assert cart.calculate_total(CustomerType.INDIVIDUAL) == pytest.approx(10.0)
+
+# 93) --------------------------
+def test_checkout_unregisters_cart_lines_from_the_store(system):
+    goods = system.add_products_bulk([(Product(f"Bolt {i}", "Desc", 2.0, 1.0, 1000), "Hardware") for i in range(4)])
+    buyers = [system.register_customer(IndividualCustomer(f"bolt{i}", "pass", f"bolt{i}@x.com", "B", "Addr",
+                                                          "1234567890")).user_id for i in range(3)]
+    kept = []  # Old carts stay referenced, so only unregistering them empties the store
+    for _ in range(20):
+        for buyer in buyers:
+            kept.append(system.shopping_carts[buyer])
+            for product in goods:
+                system.add_to_cart(buyer, product.product_id, 1)
+        system.checkout_order(buyers[0])
+        system.checkout_orders_bulk(buyers[1:])
+    assert system.product_store.store_row_carts == {}
+
+    cart = ShoppingCart("loose", system.reservations)
+    cart.add_items([(product, 1) for product in goods])
+    assert len(system.product_store.store_row_carts) == len(goods)
+    cart.clear_cart()
+    assert system.product_store.store_row_carts == {}
+
+# 94) --------------------------
+def test_facets_keep_products_listed_in_several_categories(system):
+    phone = system.add_product(Product("Phone", "Desc", 100.0, 80.0, 5), "Electronics")
+    system.add_product(phone, "Gadgets")
+    assert system.filter_products()[1] == {"Electronics": 1, "Gadgets": 1}
+    system.add_product(phone, "Mobile")  # Added once the index is built
+    assert system.filter_products()[1] == {"Electronics": 1, "Gadgets": 1, "Mobile": 1}
+
+    phone.set_discount(10)
+    for name in ["Electronics", "Gadgets", "Mobile"]:
+        assert system.filter_products(category_name=name, max_price=95)[0] == [phone]
+        assert system.filter_products(category_name=name, min_price=95)[0] == []
+    products, facets = system.filter_products(max_price=95, customer_type=CustomerType.RETAIL)
+    assert facets == {"Electronics": 1, "Gadgets": 1, "Mobile": 1} and products == [phone]
+
+# 95) --------------------------
+def test_version_search_pages_stop_after_the_page(system, monkeypatch):
+    for i in range(2000):
+        system.add_product(Product(f"Item {i} a", "Desc", 10.0, 9.0, 1), "Bulk")
+    system.add_product(Product("a", "Desc", 10.0, 9.0, 1), "Bulk")
+    version = system.catalog_snapshot()
+
+    ranked = []
+    real_rank = catalogVersion.match_rank
+    monkeypatch.setattr(catalogVersion, "match_rank", lambda name, query: ranked.append(name) or real_rank(name, query))
+    page, cursor = version.search_page("a", 5)
+    assert [p.product_name for p in page] == ["a", "Item 0 a", "Item 1 a", "Item 2 a", "Item 3 a"] and cursor is not None
+    assert len(ranked) < 50  # Bounded by the page, not by the 2,001 matches
+
+    ranked.clear()
+    page, cursor = version.search_page("a", 5, cursor)
+    assert [p.product_name for p in page] == [f"Item {i} a" for i in range(4, 9)] and len(ranked) < 50
+    live_page = system.search_products_page("a", 5, system.search_products_page("a", 5)[1])[0]
+    assert [p.product_id for p in page] == [p.product_id for p in live_page]
+
+# 96) --------------------------
+def test_concurrent_server_mutations_share_one_journal_commit(tmp_path, monkeypatch):
+    system = EMarketSystem(journal=Journal(str(tmp_path)))
+    kettle = system.add_product(Product("Kettle", "Steel", 30.0, 25.0, 9), "Kitchen")
+    for name in ["first", "second", "third"]:
+        system.register_customer(IndividualCustomer(name, "pw", f"{name}@x.com", name, "Addr", "1234567890"))
+    tokens = [system.create_session(name, "pw") for name in ["first", "second"]]
+    third = system.login_customer("third", "pw")
+
+    fsyncs, committing, real_fsync = [], threading.Event(), os.fsync
+
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        committing.set()
+        sleep(0.2 if len(fsyncs) == 1 else 0)  # Holds the first commit so later records queue up
+        real_fsync(fd)
+
+    monkeypatch.setattr("src.journal.os.fsync", slow_fsync)
+    server = EMarketServer(system)
+
+    async def run():
+        blocker = threading.Thread(target=system.add_to_cart, args=(third.user_id, kettle.product_id, 1))
+        blocker.start()
+        committing.wait()
+        payloads = [json.dumps({"token": token, "product_id": kettle.product_id, "quantity": 1}).encode()
+                    for token in tokens]
+        responses = await asyncio.gather(*(server.dispatch("POST", "/cart", body) for body in payloads))
+        blocker.join()
+        return responses
+
+    assert [status for status, _ in asyncio.run(run())] == [200, 200]
+    assert len(fsyncs) == 2  # The blocked commit, then one for both requests' records
+    assert system.journal.journal_durable == system.journal.journal_sequence
+
+# 97) --------------------------
+def test_bulk_checkout_batches_ids_and_restores_collection(system):
+    values = [0, 1, 2 ** 63, 2 ** 64 - 1] + [random.getrandbits(64) for _ in range(500)]
+    assert encode_ids(values) == [encode_id(value) for value in values] and encode_ids([]) == []
+
+    products = [system.add_product(Product(f"Cup {i}", "Desc", 3.0 + i, 2.0, 50), "Kitchen") for i in range(4)]
+    buyers = []
+    for i in range(6):
+        buyer = IndividualCustomer(f"cup{i}", "pass", f"cup{i}@example.com", "Cup", "Addr", "1234567890")
+        buyers.append(system.register_customer(buyer).user_id)
+        for product in products[:i % 4 + 1]:
+            system.add_to_cart(buyers[-1], product.product_id, 2)
+    orders = system.checkout_orders_bulk(buyers)
+    assert [order.order_total_amount for order in orders] == \
+        [sum(2 * p.get_price(CustomerType.INDIVIDUAL) for p in products[:i % 4 + 1]) for i in range(6)]
+    assert len({order.order_id for order in orders} | {system.deliveries.get(o.order_id).delivery_id for o in orders}) == 12
+    assert gc.isenabled() and not system.product_store.store_row_carts
+
+# 98) --------------------------
+def test_server_rejects_bad_numbers_and_answers_unexpected_errors(system, monkeypatch):
+    system.add_product(Product("Tea", "Green", 5.0, 4.0, 10), "Kitchen")
+    server = EMarketServer(system)
+
+    def call(body: bytes, target: str = "/search"):
+        return asyncio.run(server.dispatch("GET", target, body))
+
+    for limit in ["1e400", "-1e400", "NaN", "0", "1001", '"inf"']:
+        status, body = call(f'{{"q": "tea", "limit": {limit}}}'.encode())
+        assert status == 400 and "limit" in body["error"], limit
+    assert call(b'{"q": "tea", "cursor": -1}')[0] == 400
+    system.register_customer(IndividualCustomer("num", "pw", "num@x.com", "Num", "Addr", "1234567890"))
+    token = system.create_session("num", "pw")
+    assert call(f'{{"token": "{token}", "limit": 1e400}}'.encode(), "/orders")[0] == 400
+    assert call(b'{"max_price": 1e400}', "/products")[0] == 400
+    status, body = call(b'{"q": "tea", "limit": 1000}')
+    assert status == 200 and [p["name"] for p in body["products"]] == ["Tea"]
+
+    def broken(*args):
+        raise RuntimeError("index corrupted")
+
+    monkeypatch.setattr(system, "search_products_page", broken)
+    assert call(b'{"q": "tea"}') == (500, {"error": "Internal server error."})
+
+# 99) --------------------------
+@pytest.mark.parametrize("chunk_size", [5, 64 * 1024])
+def test_load_products_json_array_skips_malformed_elements(system, tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(catalogLoader, "CHUNK_SIZE", chunk_size)
+
+    def record(name: str, category: str = "Misc") -> str:
+        return json.dumps({"name": name, "description": "A, [b] {c}", "price": 2.0, "cost": 1.0, "stock": 3,
+                           "category": category})
+
+    elements = [record("First"), '{"name": "Broken", "price": }', record("Second"), '{"name": "Quote\\", ]",}',
+                record("Third") + " trailing", '[1, {"a": "]"}, nope]', record("Last " + "x" * 200)]
+    text = "  [\n" + ",\n".join(elements) + "\n]\n"
+    path = tmp_path / "products.json"
+    path.write_text(text)
+
+    reads = []
+    real_open = open
+    def counting_open(*args, **kwargs):
+        file = real_open(*args, **kwargs)
+        read = file.read
+        file.read = lambda size=-1: reads.append(size) or read(size)
+        return file
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    loaded, errors = catalogLoader.load_products(system, str(path))
+    assert loaded == 3
+    assert [p.product_name for p in system.search_category("misc")] == ["First", "Second", "Last " + "x" * 200]
+    assert [number for number, _, _ in errors] == [2, 4, 5, 6]
+    for (number, _, message), element in zip(errors, [elements[i] for i in (1, 3, 4, 5)]):
+        assert message.startswith(f"Invalid JSON in element at character {text.index(element)}:"), message
+    assert len(reads) <= len(text) // chunk_size + 2  # Every character is read once, nothing is re-read
+
+# 100) --------------------------
+def test_cart_totals_are_rounded_to_cents(system):
+    cust = system.register_customer(IndividualCustomer("cents", "pass", "cents@x.com", "C", "Addr", "1234567890"))
+    products = [system.add_product(Product(f"Pin {i}", "Desc", 19.99, 15.0, 100), "Office") for i in range(30)]
+    for product in products:
+        system.add_to_cart(cust.user_id, product.product_id, 3)
+    cart = system.shopping_carts[cust.user_id]
+    for product in products[::2]:
+        cart.remove_item(product)
+        system.add_to_cart(cust.user_id, product.product_id, 3)
+
+    assert cart.cart_totals[CustomerType.INDIVIDUAL] != 1799.1  # The running float sum carries residue
+    assert cart.calculate_total(CustomerType.INDIVIDUAL) == 1799.1
+    assert cart.calculate_total("retail") == round(sum(p.get_price(CustomerType.RETAIL) * 3 for p in products), 2)